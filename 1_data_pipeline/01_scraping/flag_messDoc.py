@@ -1,14 +1,23 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 import re
+import sys
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 import os
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from pipeline_common.ledger import LEDGER_COLLECTION, StageLedger, fingerprint
+
 # MongoDB connection
 load_dotenv("../../3_app_system/backend/.env")
 client = MongoClient(os.getenv("MONGODB_URI"))
 db = client["MyParliament"]
 collection = db["HansardDocument"]
+ledger = StageLedger(db[LEDGER_COLLECTION])
+
+# Bump when the heuristic changes; the ledger then reflags every document
+TEXT_QUALITY_VERSION = "1"
 
 # Heuristic OCR quality checker for 1981 and above
 def is_ocr_needed(text):
@@ -48,134 +57,78 @@ def is_ocr_needed(text):
     bad_ratio = bad_lines / len(lines) if lines else 1.0
     return bad_lines > 5 or bad_ratio > 0.05  
 
+def classify(doc):
+    """(ocr_status, text_quality) for a document."""
+    hansard_date = doc.get("hansardDate")
+    # Forced OCR for 1959–1980
+    if hansard_date and hansard_date.year <= 1980:
+        return "forced_ocr", "bad"  # "bad" means needs OCR (poor quality text)
+    # Heuristic check for 1981–2025
+    if is_ocr_needed(doc.get("content_text", "")):
+        return "need_ocr", "bad"
+    return "no_need_ocr", "ok"  # "ok" means no need for OCR (good quality text)
+
+def flag_update(ocr_status, text_quality):
+    # processable starts false and OCR sets it true; it is kept when the flags do not change
+    unchanged = {"$and": [{"$eq": ["$ocr_status", ocr_status]}, {"$eq": ["$text_quality", text_quality]}]}
+    return [
+        {"$set": {"processable": {"$cond": [unchanged, {"$ifNull": ["$processable", False]}, False]}}},
+        {"$set": {"ocr_status": ocr_status, "text_quality": text_quality}},
+    ]
+
 # Counters
 processed_count = 0
-forced_ocr = 0
-need_ocr = 0
-no_need_ocr = 0
-
-# Reset and reprocess all documents
-print("Resetting all text_quality fields for reprocessing...")
-collection.update_many({}, {"$unset": {"text_quality": "", "ocr_status": "", "processable": ""}})
+counts = {"forced_ocr": 0, "need_ocr": 0, "no_need_ocr": 0}
 
-# Make sure process ALL documents
-total_docs = collection.count_documents({})
-print(f"Total documents in database: {total_docs}")
+# Only documents that are new, whose content_text changed, or that an older
+# TEXT_QUALITY_VERSION flagged are read; the rest keep their flags.
+ledger.ensure_indexes()
+changed = ledger.sync_source(collection)
+print(f"New or changed documents since the last run: {changed}")
 
-# Count documents that need processing
-unprocessed_docs = collection.count_documents({"text_quality": {"$exists": False}})
-print(f"Unprocessed documents: {unprocessed_docs}")
+todo = {entry["doc_id"]: entry["input_fingerprint"] for entry in ledger.stale("text_quality", TEXT_QUALITY_VERSION)}
+stale_ids = list(todo)
+print(f"Total documents in database: {collection.estimated_document_count()}")
+print(f"Documents to flag: {len(stale_ids)}")
 
 # Process in batches
-batch_size = 1000  
+batch_size = 1000
 
-for skip in range(0, total_docs, batch_size):
-    # Only get documents that haven't been processed yet
-    docs = list(collection.find(
-        {"text_quality": {"$exists": False}},
+for start in range(0, len(stale_ids), batch_size):
+    docs = collection.find(
+        {"_id": {"$in": stale_ids[start:start + batch_size]}},
         {"_id": 1, "content_text": 1, "hansardDate": 1}
-    ).limit(batch_size))
-    
-    batch_count = len(docs)
-    if batch_count == 0:
-        print("No more documents to process. Exiting batch processing.")
-        break
-        
-    print(f"Processing batch of {batch_count} documents...")
-    
+    )
+    doc_ops, ledger_ops = [], []
     for doc in docs:
-        _id = doc["_id"]
-        text = doc.get("content_text", "")
-        hansard_date = doc.get("hansardDate")
-        
-        # Forced OCR for 1959–1980
-        if hansard_date and hansard_date.year <= 1980:
-            ocr_status = "forced_ocr"
-            text_quality = "bad"  # "bad" means needs OCR (poor quality text)
-            forced_ocr += 1
-        # Heuristic check for 1981–2025
-        else:
-            needs_ocr = is_ocr_needed(text)
-            if needs_ocr:
-                ocr_status = "need_ocr"
-                text_quality = "bad"  # "bad" means needs OCR (poor quality text)
-                need_ocr += 1
-            else:
-                ocr_status = "no_need_ocr"
-                text_quality = "ok"  # "ok" means no need for OCR (good quality text)
-                no_need_ocr += 1
-        
-        # Update MongoDB - always set processable to false initially
-        collection.update_one(
-            {"_id": _id},
-            {"$set": {
-                "ocr_status": ocr_status,
-                "text_quality": text_quality,
-                "processable": False  # Set to false initially, post OCR will be set to true
-            }}
-        )
+        began = time.perf_counter()
+        ocr_status, text_quality = classify(doc)
+        counts[ocr_status] += 1
+        doc_ops.append(UpdateOne({"_id": doc["_id"]}, flag_update(ocr_status, text_quality)))
+        # A changed flag marks the document stale for OCR
+        ledger_ops.extend(ledger.operations(
+            doc["_id"], "text_quality", TEXT_QUALITY_VERSION,
+            input_fingerprint=todo[doc["_id"]], output_fingerprint=fingerprint([ocr_status, text_quality]),
+            duration=time.perf_counter() - began))
         processed_count += 1
-    
-    print(f"Batch complete: Processed {processed_count} / {unprocessed_docs} documents")
-
-# Check if any documents were missed
-unprocessed_remaining = collection.count_documents({"text_quality": {"$exists": False}})
-print(f"Checking for missed documents: {unprocessed_remaining} documents still unprocessed")
 
-# If any documents were missed, process them now
-if unprocessed_remaining > 0:
-    print(f"Processing {unprocessed_remaining} remaining documents...")
-    
-    remaining_docs = list(collection.find(
-        {"text_quality": {"$exists": False}},
-        {"_id": 1, "content_text": 1, "hansardDate": 1}
-    ))
-    
-    for doc in remaining_docs:
-        _id = doc["_id"]
-        text = doc.get("content_text", "")
-        hansard_date = doc.get("hansardDate")
-        
-        # Forced OCR for 1959–1980
-        if hansard_date and hansard_date.year <= 1980:
-            ocr_status = "forced_ocr"
-            text_quality = "bad"  # "bad" means needs OCR (poor quality text)
-            forced_ocr += 1
-        # Heuristic check for 1981–2025
-        else:
-            needs_ocr = is_ocr_needed(text)
-            if needs_ocr:
-                ocr_status = "need_ocr"
-                text_quality = "bad"  # "bad" means needs OCR (poor quality text)
-                need_ocr += 1
-            else:
-                ocr_status = "no_need_ocr"
-                text_quality = "ok"  # "ok" means no need for OCR (good quality text)
-                no_need_ocr += 1
-        
-        # Update MongoDB
-        collection.update_one(
-            {"_id": _id},
-            {"$set": {
-                "ocr_status": ocr_status,
-                "text_quality": text_quality,
-                "processable": False
-            }}
-        )
-        processed_count += 1
+    if doc_ops:
+        collection.bulk_write(doc_ops, ordered=False)
+        ledger.write(ledger_ops)
+    print(f"Batch complete: Processed {processed_count} / {len(stale_ids)} documents")
 
 # Final Summary
 print("\nOCR Flagging Completed")
 print(f"Total documents processed: {processed_count}")
-print(f"Forced OCR (1959–1980): {forced_ocr}")
-print(f"Need OCR (heuristic 1981–2025): {need_ocr}")
-print(f"No need OCR: {no_need_ocr}")
+print(f"Forced OCR (1959–1980): {counts['forced_ocr']}")
+print(f"Need OCR (heuristic 1981–2025): {counts['need_ocr']}")
+print(f"No need OCR: {counts['no_need_ocr']}")
 
 # Final verification
-final_check = collection.count_documents({"text_quality": {"$exists": False}})
-print(f"Final verification - Documents without text_quality field: {final_check}")
+remaining = len(ledger.stale_ids("text_quality", TEXT_QUALITY_VERSION))
+print(f"Final verification - Documents still stale in the ledger: {remaining}")
 
-if final_check > 0:
+if remaining > 0:
     print("WARNING: Some documents were not processed. Please run the script again.")
 else:
     print("SUCCESS: All documents have been processed.")
@@ -184,4 +137,4 @@ else:
 total_bad = collection.count_documents({"text_quality": "bad"})
 total_ok = collection.count_documents({"text_quality": "ok"})
 print(f"Total documents marked as 'bad' (needs OCR): {total_bad}")
-print(f"Total documents marked as 'ok' (no OCR needed): {total_ok}")
\ No newline at end of file
+print(f"Total documents marked as 'ok' (no OCR needed): {total_ok}")
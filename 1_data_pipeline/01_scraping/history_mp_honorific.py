@@ -3,10 +3,10 @@
 # ============================================================================
 
 import requests
-from bs4 import BeautifulSoup
 import re
 import json
 import pymongo
+from bson import ObjectId
 from datetime import datetime
 import time
 from urllib.parse import urljoin
@@ -16,6 +16,16 @@ import urllib3
 from collections import defaultdict, Counter
 import string
 import dotenv
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from pipeline_common.honorifics import HonorificLexicon
+from pipeline_common.html_extract import archive_member_lists, full_soup
+from pipeline_common.http_cache import HttpCache
+from pipeline_common.http_fetch import HostRateLimiter, fetch_concurrently, make_session
+from pipeline_common.memo import LRUCache
+from pipeline_common.mp_matching import HAVE_CDIST, assign_one_to_one, gated_pairs
+from pipeline_common.textnorm import clean_name_text
 
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -39,6 +49,14 @@ if not MONGODB_URI:
     raise ValueError(f"MONGODB_URI not found in .env file at {env_path}")
 ARCHIVE_BASE_URL = "https://www.parlimen.gov.my/arkib-ahli.html?uweb=dr&arkib=yes&vol="
 SIMILARITY_THRESHOLD = 98
+# Archive term pages are fetched concurrently; requests that reach the network
+# share one per-host budget, parsing and cache hits are not throttled
+ARCHIVE_FETCH_WORKERS = 4
+ARCHIVE_REQUESTS_PER_SECOND = 0.5
+ARCHIVE_BURST = 2
+NAME_CACHE_SIZE = 8192  # memoised name extractions / standardisations
+EXTRACTION_COUNTERS = ('total_extractions', 'comma_based_extractions', 'tan_issue_fixes',
+                       'formatting_standardizations')
 
 # ============================================================================
 # Advanced Honorific Extractor - Consolidated Version
@@ -74,6 +92,13 @@ class AdvancedHonorificExtractor:
         ]
         
         self._load_existing_honorifics()
+        self.lexicon = HonorificLexicon(self.existing_honorifics)
+        
+        # Names recur across terms and every MP is extracted several times per
+        # run, so results are memoised by name. The honorific set is fixed for
+        # the run (discoveries are only written to the dictionary at the end).
+        self._extraction_cache = LRUCache(NAME_CACHE_SIZE)
+        self._standardize_cache = LRUCache(NAME_CACHE_SIZE)
         print(f"Advanced Honorific Extractor initialized with {len(self.existing_honorifics)} existing honorifics")
     
     def _load_existing_honorifics(self):
@@ -94,6 +119,13 @@ class AdvancedHonorificExtractor:
         except Exception as e:
             print(f"Could not load existing honorifics: {e}")
     
+    def cache_statistics(self):
+        """Hit/miss counts of the name memo caches"""
+        return {
+            'extraction': self._extraction_cache.stats(),
+            'standardization': self._standardize_cache.stats()
+        }
+    
     def _is_valid_honorific(self, word):
         """Check if a word is a valid standalone honorific with Tan issue fixing"""
         word_clean = word.strip("(),.''\"""").replace("'", "'").replace("'", "'")
@@ -128,7 +160,9 @@ class AdvancedHonorificExtractor:
         """Standardize name to title case with proper connector handling"""
         if not name:
             return None
-        
+        return self._standardize_cache.get_or_compute(name, lambda: self._standardize_name_uncached(name))
+    
+    def _standardize_name_uncached(self, name):
         words = name.split()
         standardized_words = []
         
@@ -143,7 +177,31 @@ class AdvancedHonorificExtractor:
         return ' '.join(standardized_words)
     
     def extract_and_store_honorifics(self, full_name):
-        """Main extraction method with comprehensive tracking"""
+        """Main extraction method with comprehensive tracking
+        
+        Memoised by name. A cached result replays the statistics
+        counters its original extraction changed, so extraction statistics
+        are the same as without the cache; new discoveries were already
+        recorded the first time.
+        """
+        if not full_name or full_name.strip() == '':
+            return self._extract_and_store_honorifics_uncached(full_name)
+        
+        cached = self._extraction_cache.get(full_name)
+        if cached is None:
+            before = {k: self.extracted_honorifics[k] for k in EXTRACTION_COUNTERS}
+            result = self._extract_and_store_honorifics_uncached(full_name)
+            deltas = {k: self.extracted_honorifics[k] - before[k] for k in EXTRACTION_COUNTERS}
+            self._extraction_cache.put(full_name, (result, deltas))
+        else:
+            result, deltas = cached
+            for counter, delta in deltas.items():
+                self.extracted_honorifics[counter] += delta
+        
+        # Callers keep and extend the honorific list; never hand out the cached one
+        return dict(result, extracted_honorifics=list(result['extracted_honorifics']))
+    
+    def _extract_and_store_honorifics_uncached(self, full_name):
         if not full_name or full_name.strip() == '':
             return {
                 'cleaned_name': None,
@@ -187,26 +245,16 @@ class AdvancedHonorificExtractor:
             name = main_name
             self.extracted_honorifics['comma_based_extractions'] += 1
         
-        # STEP 2: Remove known existing honorifics from main name
-        existing_removed = []
-        sorted_honorifics = sorted(self.existing_honorifics, key=lambda x: -len(x))
-        
-        for honorific in sorted_honorifics:
-            if honorific and honorific.lower() != 'tan':
-                pattern = rf'\b{re.escape(honorific)}\b\.?'
-                if re.search(pattern, name, flags=re.IGNORECASE):
-                    existing_removed.append(honorific)
-                    name = re.sub(pattern, '', name, flags=re.IGNORECASE)
+        # STEP 2: Remove known existing honorifics from main name (one trie
+        # walk; a bare 'Tan' is never removed)
+        name, existing_removed = self.lexicon.strip(name)
         
         extraction_result['extracted_honorifics'].extend(existing_removed)
         
         # STEP 3: Basic cleanup and standardization
-        name = re.sub(r'[()\']', '', name)
-        name = re.sub(r'\s+', ' ', name)
-        name = re.sub(r'^\s*[-]*\s*', '', name)
-        name = re.sub(r'\s*[-]*\s*$', '', name)
+        name = clean_name_text(name)
         
-        cleaned = name.strip() if name.strip() else None
+        cleaned = name if name else None
         extraction_result['cleaned_name'] = cleaned
         
         # STEP 4: Apply standardized formatting
@@ -231,50 +279,7 @@ class AdvancedHonorificExtractor:
     
     def categorize_honorifics(self, honorifics):
         """Categorize a list of honorifics"""
-        categorized = {
-            'royal_noble_titles': [],
-            'datuk_titles': [],
-            'parliamentary_titles': [],
-            'professional_titles': [],
-            'religious_titles': [],
-            'military_titles': [],
-            'gender_titles': [],
-            'regional_titles': []
-        }
-        
-        for honorific in honorifics:
-            honorific_lower = honorific.lower().replace("'", "'")
-            
-            if any(x in honorific_lower for x in [
-                'yab', 'yang amat berhormat', 'tan sri', 'tan seri', 'tun', 
-                'tengku', 'tunku', 'tuanku'
-            ]):
-                categorized['royal_noble_titles'].append(honorific)
-            elif any(x in honorific_lower for x in [
-                "dato", "dato'", "datuk", "dato seri", "dato' seri",
-                "dato sri", "dato' sri", "datuk seri", "datuk sri"
-            ]):
-                categorized['datuk_titles'].append(honorific)
-            elif honorific_lower in ['yb', 'yang berhormat']:
-                categorized['parliamentary_titles'].append(honorific)
-            elif honorific_lower in ['ir', 'ir.', 'ts', 'ts.', 'dr', 'dr.', 'prof', 'prof.']:
-                categorized['professional_titles'].append(honorific)
-            elif any(x in honorific_lower for x in [
-                'haji', 'hajah', 'sheikh', 'syeikh', 'ustaz', 'ustazah', 'hajjah', 'hj.'
-            ]):
-                categorized['religious_titles'].append(honorific)
-            elif any(x in honorific_lower for x in [
-                'kapten', 'komander', 'general', 'admiral', 'colonel', 'major', 'brigadier'
-            ]):
-                categorized['military_titles'].append(honorific)
-            elif honorific_lower in ['tuan', 'puan', 'encik', 'cik']:
-                categorized['gender_titles'].append(honorific)
-            elif any(x in honorific_lower for x in [
-                'panglima', 'wira', 'indera', 'paduka', 'utama'
-            ]):
-                categorized['regional_titles'].append(honorific)
-        
-        return categorized
+        return self.lexicon.categorize(honorifics)
 
 # ============================================================================
 # 98% Similarity Matcher
@@ -297,9 +302,25 @@ class AdvancedMPMatcher:
             'gender_mismatches': 0,
             'first_name_failures': 0,
             'last_name_failures': 0,
-            'penalty_applications': 0
+            'penalty_applications': 0,
+            'candidate_lookups': 0,
+            'candidates_scored': 0,
+            'candidates_pruned': 0
         }
         
+        # Blocking index over indexed identities, so full scoring only runs on
+        # pairs that can pass the mandatory rules: (gender, lower-cased first
+        # name) buckets for the first-name rule, and first-name lengths for the
+        # near-98% case. fuzz.ratio of two different strings is at most
+        # 2*min(len)/(len_a + len_b) and at most (len_a + len_b - 1)/(len_a + len_b),
+        # so differing first names can only reach 98% when both bounds allow it
+        # (in practice, first names of about 20+ characters).
+        self.first_name_min_ratio = 0.975  # fuzz.ratio rounds, so 97.5 scores 98
+        self._first_name_blocks = defaultdict(set)  # (gender, first name) -> keys
+        self._length_blocks = defaultdict(lambda: defaultdict(set))  # gender -> first name length -> keys
+        self._blocked = {}                          # key -> (gender, first name)
+        self._sequence = {}                         # key -> indexing order, so candidates keep collection order
+        
         print("Advanced 98% Threshold MP Matcher initialized")
     
     def extract_core_identity(self, name):
@@ -350,16 +371,74 @@ class AdvancedMPMatcher:
         
         return identity
     
-    def calculate_98_percent_similarity(self, historical_name, current_name):
-        """Calculate similarity with 98% minimum threshold"""
+    def _gender_buckets(self, identity):
+        # Rule 1 only rejects two known, different genders; connectors without
+        # a gender (anak) and non-connector names stay in the '' bucket.
+        gender = identity.get('gender', '')
+        return (gender, '') if gender else ('male', 'female', '')
+    
+    def _can_reach_first_name_threshold(self, len_a, len_b):
+        total = len_a + len_b
+        return (total - 1) / total >= self.first_name_min_ratio and 2 * min(len_a, len_b) / total >= self.first_name_min_ratio
+    
+    def index_identity(self, key, identity):
+        """Add (or re-add) an identity to the blocking index under ``key``"""
+        self.unindex_identity(key)
+        if not identity:
+            return
+        block = (identity.get('gender', ''), identity['first_name'].lower())
+        self._sequence.setdefault(key, len(self._sequence))
+        self._first_name_blocks[block].add(key)
+        self._length_blocks[block[0]][len(block[1])].add(key)
+        self._blocked[key] = block
+    
+    def unindex_identity(self, key):
+        block = self._blocked.pop(key, None)
+        if block:
+            self._first_name_blocks[block].discard(key)
+            self._length_blocks[block[0]][len(block[1])].discard(key)
+    
+    def clear_index(self):
+        self._first_name_blocks.clear()
+        self._length_blocks.clear()
+        self._blocked.clear()
+        self._sequence.clear()
+    
+    def candidate_keys(self, identity):
+        """Keys of indexed identities that can pass the gender and first-name rules
+        
+        Returned in the order they were first indexed (collection order), so
+        ties on the best score go to the same MP as a scan of the collection.
+        """
+        if not identity:
+            return []
+        first = identity['first_name'].lower()
+        candidates = set()
+        for gender in self._gender_buckets(identity):
+            candidates |= self._first_name_blocks.get((gender, first), set())
+            for length, keys in self._length_blocks[gender].items():
+                if keys and self._can_reach_first_name_threshold(len(first), length):
+                    candidates |= keys
+        self.matching_stats['candidate_lookups'] += 1
+        self.matching_stats['candidates_scored'] += len(candidates)
+        self.matching_stats['candidates_pruned'] += len(self._blocked) - len(candidates)
+        return sorted(candidates, key=self._sequence.__getitem__)
+    
+    def calculate_98_percent_similarity(self, historical_name, current_name,
+                                        historical_identity=None, current_identity=None):
+        """Calculate similarity with 98% minimum threshold
+        
+        Identities already computed by extract_core_identity (e.g. from the
+        MPIdentityIndex) can be passed in to skip re-extracting them.
+        """
         if not historical_name or not current_name:
             return 0, "No name provided", {}
         
         self.matching_stats['total_matches_attempted'] += 1
         
         # Extract identities
-        hist_id = self.extract_core_identity(historical_name)
-        curr_id = self.extract_core_identity(current_name)
+        hist_id = historical_identity or self.extract_core_identity(historical_name)
+        curr_id = current_identity or self.extract_core_identity(current_name)
         
         # MANDATORY VALIDATION RULES
         
@@ -465,6 +544,168 @@ class AdvancedMPMatcher:
         """Get comprehensive matching statistics"""
         return self.matching_stats
 
+# ============================================================================
+# MP Identity Index
+# ============================================================================
+
+class MPIdentityIndex:
+    """In-memory view of the MP collection for historical matching
+    
+    Loaded once per run instead of reading the whole collection for every
+    scraped MP. Each entry keeps the stored document together with its
+    comparison name (re-cleaned from full_name_with_titles, so stored and
+    scraped names are cleaned the same way) and its core identity. Inserts
+    and merges made by the scraper are applied to the entries in place.
+    """
+    
+    def __init__(self, mp_collection, honorific_extractor, mp_matcher):
+        self.mp_collection = mp_collection
+        self.honorific_extractor = honorific_extractor
+        self.mp_matcher = mp_matcher
+        self.entries = {}  # _id -> {'mp', 'name', 'identity'}
+        self.loaded = False
+    
+    def load(self):
+        """Read the collection once and precompute names and identities"""
+        self.mp_matcher.clear_index()
+        self.entries = {}
+        for mp in self.mp_collection.find({}):
+            self._index(mp)
+        self.loaded = True
+        print(f"MP identity index loaded: {len(self.entries)} MPs")
+        return self
+    
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+        return self
+    
+    def comparison_name(self, mp):
+        """Cleaned name used for matching, as find_existing_mp_with_98_threshold always compared"""
+        name = mp.get('name', '')
+        if name and mp.get('full_name_with_titles'):
+            extraction = self.honorific_extractor.extract_and_store_honorifics(mp['full_name_with_titles'])
+            name = extraction['standardized_name'] or extraction['cleaned_name'] or name
+        return name
+    
+    def _index(self, mp):
+        name = self.comparison_name(mp)
+        if not name:
+            self.entries.pop(mp['_id'], None)
+            self.mp_matcher.unindex_identity(mp['_id'])
+            return
+        identity = self.mp_matcher.extract_core_identity(name)
+        self.entries[mp['_id']] = {
+            'mp': mp,
+            'name': name,
+            'identity': identity
+        }
+        self.mp_matcher.index_identity(mp['_id'], identity)
+    
+    def add(self, mp):
+        """Index a newly inserted MP document (must carry its _id)"""
+        self._index(mp)
+    
+    def apply_update(self, mp_id, updates, pushes=None):
+        """Apply a $set (and $push entries) written or queued for the database to the indexed document"""
+        entry = self.entries.get(mp_id)
+        if entry is None:
+            return
+        mp = entry['mp']
+        mp.update(updates)
+        for field, values in (pushes or {}).items():
+            mp.setdefault(field, []).extend(values)
+        if 'full_name_with_titles' in updates or 'name' in updates:
+            self._index(mp)
+    
+    def candidates(self, identity):
+        """Entries that survive the matcher's blocking for ``identity``"""
+        return [self.entries[mp_id] for mp_id in self.mp_matcher.candidate_keys(identity)]
+    
+    def __iter__(self):
+        return iter(self.entries.values())
+    
+    def __len__(self):
+        return len(self.entries)
+
+# ============================================================================
+# Buffered MP Writes
+# ============================================================================
+
+class MPWriteBuffer:
+    """Collects a term's MP inserts and merges and writes them in one bulk_write
+    
+    New documents get their _id up front and are flushed as they are at flush
+    time; they are the same objects the identity index holds, so a merge into
+    an MP created earlier in the same term is already part of the document and
+    needs no separate write. Merges into stored MPs are coalesced per _id
+    ($set fields, later values win; $push entries appended in order), so the
+    unordered bulk write never holds two updates for one document. Reads in
+    the meantime go through MPIdentityIndex, which is updated immediately.
+    """
+    
+    def __init__(self, mp_collection, flush_threshold=1000):
+        self.mp_collection = mp_collection
+        self.flush_threshold = flush_threshold
+        self._inserts = {}  # _id -> document
+        self._updates = {}  # _id -> {'$set': {...}, '$push': {field: [...]}}
+        self.stats = {'flushes': 0, 'inserted': 0, 'modified': 0}
+        self._errors = []
+    
+    def insert(self, document):
+        document.setdefault('_id', ObjectId())
+        self._inserts[document['_id']] = document
+        self._maybe_flush()
+        return document['_id']
+    
+    def update(self, mp_id, set_fields=None, push_fields=None):
+        if mp_id in self._inserts:
+            return
+        pending = self._updates.setdefault(mp_id, {'$set': {}, '$push': {}})
+        pending['$set'].update(set_fields or {})
+        for field, values in (push_fields or {}).items():
+            pending['$push'].setdefault(field, []).extend(values)
+        self._maybe_flush()
+    
+    def __len__(self):
+        return len(self._inserts) + len(self._updates)
+    
+    def flush(self):
+        """Write everything buffered; returns error messages since the last flush() call"""
+        self._write()
+        errors, self._errors = self._errors, []
+        return errors
+    
+    def _maybe_flush(self):
+        if len(self) >= self.flush_threshold:
+            self._write()
+    
+    def _write(self):
+        operations = [pymongo.InsertOne(document) for document in self._inserts.values()]
+        for mp_id, pending in self._updates.items():
+            update = {}
+            if pending['$set']:
+                update['$set'] = pending['$set']
+            if pending['$push']:
+                update['$push'] = {field: {'$each': values} for field, values in pending['$push'].items()}
+            if update:
+                operations.append(pymongo.UpdateOne({'_id': mp_id}, update))
+        self._inserts = {}
+        self._updates = {}
+        if not operations:
+            return
+        
+        self.stats['flushes'] += 1
+        try:
+            result = self.mp_collection.bulk_write(operations, ordered=False)
+            self.stats['inserted'] += result.inserted_count
+            self.stats['modified'] += result.modified_count
+        except pymongo.errors.BulkWriteError as e:
+            details = e.details
+            self.stats['inserted'] += details.get('nInserted', 0)
+            self.stats['modified'] += details.get('nModified', 0)
+            self._errors.extend(f"Bulk write error: {error.get('errmsg')}" for error in details.get('writeErrors', []))
+
 # ============================================================================
 # Enhanced Parliament Scraper - Consolidated
 # ============================================================================
@@ -472,21 +713,34 @@ class AdvancedMPMatcher:
 class EnhancedParliamentScraper:
     """Comprehensive scraper with 98% matching and multi-term support"""
     
-    def __init__(self, db_connection_string):
+    def __init__(self, db_connection_string, http_cache_mode=None, batch_resolution=True):
         self.client = pymongo.MongoClient(db_connection_string)
         self.db = self.client["MyParliament"]
         self.mp_collection = self.db["MP"]
         
-        # Setup session
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        # Setup session: archive pages are cached on disk (they only change when
+        # a term's member list is corrected) and network requests share a
+        # per-host token bucket; cached pages skip the wait.
+        # HANSARD_HTTP_CACHE=offline replays a previous run without the network.
+        self.session = make_session(
+            pool_size=ARCHIVE_FETCH_WORKERS,
+            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
+            rate_limiter=HostRateLimiter(ARCHIVE_REQUESTS_PER_SECOND, burst=ARCHIVE_BURST),
+            cache=HttpCache(),
+            mode=http_cache_mode,
+            ttls=[(r'arkib-ahli\.html', 30 * 24 * 3600)]
+        )
         self.session.verify = False
+        self.cache_adapter = self.session.get_adapter(ARCHIVE_BASE_URL)
         
         # Initialize components
         self.honorific_extractor = AdvancedHonorificExtractor(db_connection_string)
         self.mp_matcher = AdvancedMPMatcher()
+        self.identity_index = MPIdentityIndex(self.mp_collection, self.honorific_extractor, self.mp_matcher)
+        self.write_buffer = MPWriteBuffer(self.mp_collection)
+        # Resolve each term as a batch (one-to-one, order independent) instead
+        # of one MP at a time against a growing collection
+        self.batch_resolution = batch_resolution
         
         # Party mappings
         self.party_mappings = {
@@ -511,6 +765,7 @@ class EnhancedParliamentScraper:
             'existing_mps_updated': 0,
             'merges_98_percent': 0,
             'separate_records_below_98': 0,
+            'parse_seconds': 0.0,
             'errors': []
         }
         
@@ -556,35 +811,25 @@ class EnhancedParliamentScraper:
     def find_existing_mp_with_98_threshold(self, cleaned_name, constituency_code):
         """Find existing MP using advanced 98% threshold"""
         
-        all_mps = list(self.mp_collection.find({}))
+        self.identity_index.ensure_loaded()
+        query_identity = self.mp_matcher.extract_core_identity(cleaned_name)
         
         best_match = None
         best_score = 0
         best_reason = ""
         best_details = {}
         
-        for existing_mp in all_mps:
-            # CRITICAL FIX: Ensure we're comparing cleaned names consistently
-            existing_name = existing_mp.get('name', '')  # This should be cleaned name
-            
-            if not existing_name:
-                continue
-            
-            # ADDITIONAL SAFETY: Re-clean the existing name to ensure consistency
-            if existing_mp.get('full_name_with_titles'):
-                # Re-extract to ensure consistent cleaning
-                existing_extraction = self.honorific_extractor.extract_and_store_honorifics(
-                    existing_mp['full_name_with_titles']
-                )
-                existing_cleaned = existing_extraction['standardized_name'] or existing_extraction['cleaned_name']
-                if existing_cleaned:
-                    existing_name = existing_cleaned
+        # Only MPs that can pass the gender and first-name rules are scored
+        for entry in self.identity_index.candidates(query_identity):
+            existing_mp = entry['mp']
+            existing_name = entry['name']
             
             print(f"      Comparing: '{cleaned_name}' vs '{existing_name}'")
             
             # Calculate similarity
             similarity, reason, details = self.mp_matcher.calculate_98_percent_similarity(
-                cleaned_name, existing_name
+                cleaned_name, existing_name,
+                historical_identity=query_identity, current_identity=entry['identity']
             )
             
             # Additional boost if same constituency
@@ -760,13 +1005,15 @@ class EnhancedParliamentScraper:
             'match_confidence': match_details.get('similarity_score', 0) if isinstance(match_details, dict) else 0
         }
         
+        # New array entries are $push-ed rather than rewriting the arrays
+        pushes = {}
+        
         existing_history = existing_mp.get('parliamentary_history', [])
         # Check if this term already exists
         term_exists = any(h.get('term_number') == parliament_term for h in existing_history)
         
         if not term_exists:
-            existing_history.append(new_term_entry)
-            updates['parliamentary_history'] = existing_history
+            pushes['parliamentary_history'] = [new_term_entry]
         
         # Update party changes if party changed
         existing_party_changes = existing_mp.get('party_changes', [])
@@ -782,8 +1029,7 @@ class EnhancedParliamentScraper:
                     'duration_terms': 1,
                     'change_detected_at': datetime.now()
                 }
-                existing_party_changes.append(new_party_change)
-                updates['party_changes'] = existing_party_changes
+                pushes['party_changes'] = [new_party_change]
         
         # Keep latest term data as primary (only if this is more recent)
         existing_term_num = int(existing_mp.get('parliament_term', '0').replace('th', ''))
@@ -799,22 +1045,35 @@ class EnhancedParliamentScraper:
                 'full_name_with_titles': mp_data['name']
             })
         
-        # Perform update
-        result = self.mp_collection.update_one(
-            {'_id': existing_mp['_id']},
-            {'$set': updates}
-        )
+        # Queue the write; later lookups in this run read the in-memory copy
+        self.write_buffer.update(existing_mp['_id'], updates, pushes)
+        self.identity_index.apply_update(existing_mp['_id'], updates, pushes)
         
-        if result.modified_count > 0:
-            self.stats['existing_mps_updated'] += 1
-            print(f"     UPDATED: {existing_mp['name']} with {parliament_term}th Parliament data")
-            print(f"      Added honorifics: {new_honorifics}")
-            print(f"      Party: {party}, Constituency: {constituency_code}")
+        self.stats['existing_mps_updated'] += 1
+        print(f"     UPDATED: {existing_mp['name']} with {parliament_term}th Parliament data")
+        print(f"      Added honorifics: {new_honorifics}")
+        print(f"      Party: {party}, Constituency: {constituency_code}")
         
-        return result.modified_count > 0
+        return True
+    
+    def fetch_term_page(self, parliament_term):
+        """Download one archive term page; returns (content, error). Safe on worker threads."""
+        url = f"{ARCHIVE_BASE_URL}{parliament_term}"
+        try:
+            response = self.session.get(url, timeout=30)
+            if response.status_code != 200:
+                raise Exception(f"HTTP {response.status_code}")
+            return response.content, None
+        except Exception as e:
+            return None, str(e)
     
     def scrape_parliament_term(self, parliament_term):
-        """Scrape one parliament term with enhanced container detection"""
+        """Fetch and parse one parliament term"""
+        content, error = self.fetch_term_page(parliament_term)
+        return self.parse_term_page(parliament_term, content, error)
+    
+    def parse_term_page(self, parliament_term, content, error=None):
+        """Parse one downloaded parliament term with enhanced container detection"""
         
         url = f"{ARCHIVE_BASE_URL}{parliament_term}"
         term_start_time = datetime.now()
@@ -825,21 +1084,14 @@ class EnhancedParliamentScraper:
         print(f"URL: {url}")
         
         try:
-            # Rate limiting
-            time.sleep(3)
-            
-            response = self.session.get(url, timeout=30)
-            
-            if response.status_code != 200:
-                raise Exception(f"HTTP {response.status_code}")
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            if error:
+                raise Exception(error)
             
             # Extract MP data - try multiple container patterns
             mp_entries = []
             
-            # METHOD 1: Try current format containers
-            mp_lists = soup.find_all('ul', class_='list tiles member-of-parliament')
+            # METHOD 1: Try current format containers (parses only those <ul>s)
+            mp_lists = archive_member_lists(content)
             print(f"  Found {len(mp_lists)} current format MP containers")
             
             if mp_lists:
@@ -848,11 +1100,11 @@ class EnhancedParliamentScraper:
                         mp_data = self.extract_mp_from_html(li)
                         if mp_data:
                             mp_entries.append(mp_data)
-                        time.sleep(0.1)
             
             # METHOD 2: If no current format, try historical format containers
             if not mp_entries:
                 print("  No current format containers found, trying historical format...")
+                soup = full_soup(content)
                 
                 # Try different historical container patterns
                 historical_containers = [
@@ -875,7 +1127,6 @@ class EnhancedParliamentScraper:
                                     mp_data = self.extract_mp_from_html(div)
                                     if mp_data:
                                         mp_entries.append(mp_data)
-                            time.sleep(0.1)
                         break  # Stop after finding first working container type
             
             # METHOD 3: If still no data, try direct search for name patterns
@@ -893,10 +1144,10 @@ class EnhancedParliamentScraper:
                         mp_data = self.extract_mp_from_html(parent_container)
                         if mp_data:
                             mp_entries.append(mp_data)
-                    time.sleep(0.1)
             
             processing_time = (datetime.now() - term_start_time).total_seconds()
             
+            self.stats['parse_seconds'] += processing_time
             print(f"  Extracted {len(mp_entries)} MPs in {processing_time:.1f}s")
             
             # Show sample of extracted data for verification
@@ -1046,6 +1297,10 @@ class EnhancedParliamentScraper:
             cleaned_name, constituency_code
         )
         
+        return self.apply_mp_resolution(mp_data, parliament_term, cleaned_name, existing_mp, details)
+    
+    def apply_mp_resolution(self, mp_data, parliament_term, cleaned_name, existing_mp, details):
+        """Merge into the matched MP, or create a new one when there is no match"""
         if existing_mp:
             # 98%+ match found - update existing MP
             success = self.update_existing_mp_with_historical_term(
@@ -1056,23 +1311,119 @@ class EnhancedParliamentScraper:
             # Below 98% threshold - create new MP
             new_mp_doc = self.create_mp_document(mp_data, parliament_term)
             
-            try:
-                result = self.mp_collection.insert_one(new_mp_doc)
-                self.stats['new_mps_created'] += 1
-                print(f"     NEW MP CREATED: {cleaned_name}")
-                return True
-                
-            except Exception as e:
-                error_msg = f"Insert error for {cleaned_name}: {str(e)}"
-                self.stats['errors'].append(error_msg)
-                print(f"     Insert failed: {e}")
-                return False
+            # Queued for the term's bulk write; indexed now so later lookups see it
+            self.write_buffer.insert(new_mp_doc)
+            self.identity_index.add(new_mp_doc)
+            self.stats['new_mps_created'] += 1
+            print(f"     NEW MP CREATED: {cleaned_name}")
+            return True
     
-    def process_parliament_term(self, parliament_term):
+    def resolve_term_batch(self, mp_entries):
+        """Match a whole term against the identity index in one pass
+        
+        Candidate pairs come from a vectorised name-gate matrix (rapidfuzz
+        cdist) or, without rapidfuzz, from the matcher's blocking index. Each
+        pair is then scored with the same 98% rules as the per-MP path, and
+        matches are assigned one-to-one by descending score. Returns
+        (mp_data, cleaned_name, existing_mp, score, reason, details) per
+        entry; cleaned_name is None when the name could not be cleaned.
+        """
+        self.identity_index.ensure_loaded()
+        entries = list(self.identity_index)
+        
+        queries = []
+        for mp_data in mp_entries:
+            extraction_result = self.honorific_extractor.extract_and_store_honorifics(mp_data['name'])
+            cleaned_name = extraction_result['standardized_name'] or extraction_result['cleaned_name']
+            constituency_code, _, _ = self.parse_constituency(mp_data['constituency'])
+            identity = self.mp_matcher.extract_core_identity(cleaned_name) if cleaned_name else {}
+            queries.append((mp_data, cleaned_name, constituency_code, identity))
+        
+        resolvable = [q for q, (_, cleaned_name, _, _) in enumerate(queries) if cleaned_name]
+        if HAVE_CDIST:
+            gated = gated_pairs([queries[q][3] for q in resolvable], [entry['identity'] for entry in entries])
+            pairs = [(resolvable[q], c) for q, c in gated]
+        else:
+            position = {entry['mp']['_id']: c for c, entry in enumerate(entries)}
+            pairs = [(q, position[mp_id]) for q in resolvable
+                     for mp_id in self.mp_matcher.candidate_keys(queries[q][3])]
+        
+        scored = []
+        explanations = {}  # (query, candidate) -> (reason, details)
+        for q, c in pairs:
+            _, cleaned_name, constituency_code, identity = queries[q]
+            entry = entries[c]
+            similarity, reason, details = self.mp_matcher.calculate_98_percent_similarity(
+                cleaned_name, entry['name'],
+                historical_identity=identity, current_identity=entry['identity']
+            )
+            if similarity <= 0:
+                continue
+            if entry['mp'].get('constituency_code') == constituency_code:
+                similarity += 2
+                reason += " + same_constituency"
+            scored.append((similarity, q, c))
+            explanations[(q, c)] = (reason, details)
+        
+        # Ties go by name and constituency rather than position on the page
+        assignment = assign_one_to_one(
+            scored, SIMILARITY_THRESHOLD,
+            tie_key=lambda q, c: (queries[q][1], queries[q][2], str(entries[c]['mp']['_id']))
+        )
+        
+        # Best pair per query, to report near misses of unmatched names
+        best = {}
+        for similarity, q, c in scored:
+            if similarity > best.get(q, (0, None))[0]:
+                best[q] = (similarity, c)
+        
+        resolutions = []
+        for q, (mp_data, cleaned_name, _, _) in enumerate(queries):
+            if q in assignment:
+                c, score = assignment[q]
+                resolutions.append((mp_data, cleaned_name, entries[c]['mp'], score) + explanations[(q, c)])
+            elif q in best:
+                score, c = best[q]
+                resolutions.append((mp_data, cleaned_name, None, score) + explanations[(q, c)])
+            else:
+                resolutions.append((mp_data, cleaned_name, None, 0, "", {}))
+        return resolutions
+    
+    def process_term_per_mp(self, mp_entries, parliament_term):
+        """Resolve and write MPs one at a time; yields success per MP"""
+        for i, mp_data in enumerate(mp_entries, 1):
+            print(f"\n  [{i}/{len(mp_entries)}] {mp_data['name']}")
+            yield self.process_mp_with_98_threshold(mp_data, parliament_term)
+    
+    def process_term_batch(self, mp_entries, parliament_term):
+        """Resolve the whole term with resolve_term_batch, then write; yields success per MP"""
+        resolutions = self.resolve_term_batch(mp_entries)
+        
+        for i, (mp_data, cleaned_name, existing_mp, score, reason, details) in enumerate(resolutions, 1):
+            print(f"\n  [{i}/{len(mp_entries)}] {mp_data['name']}")
+            if not cleaned_name:
+                print(f"     Could not clean name: {mp_data['name']}")
+                yield False
+                continue
+            
+            if existing_mp:
+                self.stats['merges_98_percent'] += 1
+                print(f"     98% MATCH ({score:.1f}%): '{cleaned_name}' -> '{existing_mp['name']}'")
+                print(f"      Reason: {reason}")
+            else:
+                self.stats['separate_records_below_98'] += 1
+                print(f"     NEW MP ({score:.1f}%): '{cleaned_name}' (below 98% threshold)")
+                if score > 80:  # Show near misses
+                    print(f"      Near miss reason: {reason}")
+            
+            yield self.apply_mp_resolution(mp_data, parliament_term, cleaned_name, existing_mp, details)
+    
+    def process_parliament_term(self, parliament_term, mp_entries=None):
         """Process entire parliament term with advanced 98% matching"""
         
-        # Scrape this term
-        mp_entries = self.scrape_parliament_term(parliament_term)
+        # Scrape this term unless process_all_terms already fetched and parsed it
+        if mp_entries is None:
+            mp_entries = self.scrape_parliament_term(parliament_term)
         self.stats['total_mps_scraped'] += len(mp_entries)
         
         if not mp_entries:
@@ -1084,11 +1435,12 @@ class EnhancedParliamentScraper:
         processed_count = 0
         failed_count = 0
         
-        for i, mp_data in enumerate(mp_entries, 1):
-            print(f"\n  [{i}/{len(mp_entries)}] {mp_data['name']}")
-            
-            success = self.process_mp_with_98_threshold(mp_data, parliament_term)
-            
+        if self.batch_resolution:
+            outcomes = self.process_term_batch(mp_entries, parliament_term)
+        else:
+            outcomes = self.process_term_per_mp(mp_entries, parliament_term)
+        
+        for i, success in enumerate(outcomes, 1):
             if success:
                 processed_count += 1
             else:
@@ -1098,6 +1450,13 @@ class EnhancedParliamentScraper:
             if i % 10 == 0:
                 print(f"  Progress: {i}/{len(mp_entries)} processed")
         
+        # One unordered bulk write for the term's inserts and merges
+        queued = len(self.write_buffer)
+        write_errors = self.write_buffer.flush()
+        self.stats['errors'].extend(write_errors)
+        print(f"\n  Wrote {queued} MP inserts/updates in one bulk write"
+              f"{f' ({len(write_errors)} errors)' if write_errors else ''}")
+        
         self.stats['terms_processed'] += 1
         
         print(f"\n  Parliament {parliament_term} completed:")
@@ -1183,18 +1542,34 @@ class EnhancedParliamentScraper:
         print(f"Advanced 98% threshold matching: ENABLED")
         print(f"Advanced honorific extraction: ENABLED")
         print(f"Multi-term MP consolidation: ENABLED")
+        print(f"Term resolution: {'batch, one-to-one' if self.batch_resolution else 'per MP'}"
+              f"{' (rapidfuzz cdist)' if self.batch_resolution and HAVE_CDIST else ''}")
         
         total_processed = 0
         total_failed = 0
         
-        for parliament_term in PARLIAMENT_TERMS:
-            processed, failed = self.process_parliament_term(parliament_term)
-            total_processed += processed
-            total_failed += failed
+        # Stage 1 (worker threads): download term pages under the host rate limit.
+        # Stage 2 (here): parse each page as soon as it arrives.
+        # Stage 3 (here): match terms in order, each once every earlier term is
+        # parsed, while later pages are still downloading.
+        parsed_terms = {}
+        next_term = 0
+        pages = fetch_concurrently(self.fetch_term_page, PARLIAMENT_TERMS, max_workers=ARCHIVE_FETCH_WORKERS)
+        for parliament_term, (content, error) in pages:
+            parsed_terms[parliament_term] = self.parse_term_page(parliament_term, content, error)
             
-            # Rate limiting between terms
-            print(f"\n  Waiting 5 seconds before next term...")
-            time.sleep(5)
+            while next_term < len(PARLIAMENT_TERMS) and PARLIAMENT_TERMS[next_term] in parsed_terms:
+                term = PARLIAMENT_TERMS[next_term]
+                processed, failed = self.process_parliament_term(term, parsed_terms.pop(term))
+                total_processed += processed
+                total_failed += failed
+                next_term += 1
+        
+        print(f"\nParsing: {self.stats['parse_seconds']:.1f}s for {len(PARLIAMENT_TERMS)} term pages")
+        print(f"MP writes: {self.write_buffer.stats['inserted']} inserted, {self.write_buffer.stats['modified']} modified "
+              f"in {self.write_buffer.stats['flushes']} bulk writes")
+        print(f"\nHTTP cache: {self.cache_adapter.stats['hits']} hits, {self.cache_adapter.stats['revalidated']} revalidated, "
+              f"{self.cache_adapter.stats['fetched']} fetched")
         
         # Update honorific dictionary
         print(f"\n{'='*60}")
@@ -1222,6 +1597,7 @@ class EnhancedParliamentScraper:
             'processing_time': self.stats['total_processing_time'],
             'updated_honorific_categories': updated_categories,
             'advanced_matching_stats': matching_stats,
+            'name_cache_stats': self.honorific_extractor.cache_statistics(),
             'errors': self.stats['errors']
         }
     
@@ -1255,6 +1631,19 @@ class EnhancedParliamentScraper:
             print(f"  First name failures: {matching_stats.get('first_name_failures', 0)}")
             print(f"  Last name failures: {matching_stats.get('last_name_failures', 0)}")
             print(f"  Penalty applications: {matching_stats.get('penalty_applications', 0)}")
+            lookups = matching_stats.get('candidate_lookups', 0)
+            if lookups:
+                print(f"  Candidates scored per MP: {matching_stats['candidates_scored'] / lookups:.1f} "
+                      f"({matching_stats['candidates_pruned']} pairs pruned by blocking)")
+        
+        name_cache_stats = results.get('name_cache_stats', {})
+        if name_cache_stats:
+            print(f"\nNAME CACHE HIT RATES:")
+            for cache_name, cache_stats in name_cache_stats.items():
+                rate = cache_stats['hit_rate']
+                rate_text = f"{rate:.1%}" if rate is not None else "n/a"
+                print(f"  {cache_name.capitalize()}: {rate_text} "
+                      f"({cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['size']} cached)")
         
         # Database verification
         total_historical = self.mp_collection.count_documents({'status': 'historical'})
@@ -6,18 +6,29 @@ import requests
 from bs4 import BeautifulSoup
 import re
 import json
+import hashlib
 import pymongo
 from datetime import datetime
 from collections import defaultdict, Counter
 import pandas as pd
 import time
 import os
+import threading
 from urllib.parse import urljoin, urlparse
 from dotenv import load_dotenv
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from pipeline_common.honorifics import HonorificLexicon, categorize_honorific
+from pipeline_common.html_extract import parse_profile_page
+from pipeline_common.http_cache import HttpCache
+from pipeline_common.http_fetch import HostRateLimiter, fetch_concurrently, make_session
+from pipeline_common.textnorm import clean_name_text
 
 # CELL 3: Comprehensive MP Scraper Class
 class ComprehensiveMPScraper:
-    def __init__(self, db_connection_string, database_name="MyParliament", mp_collection_name="MP", honorific_collection_name="honorific_dictionary"):
+    def __init__(self, db_connection_string, database_name="MyParliament", mp_collection_name="MP", honorific_collection_name="honorific_dictionary",
+                 max_workers=8, requests_per_second=4.0, burst=4, http_cache_mode=None):
         self.client = pymongo.MongoClient(db_connection_string)
         self.db = self.client[database_name]
         self.mp_collection = self.db[mp_collection_name]
@@ -27,17 +38,33 @@ class ComprehensiveMPScraper:
         self.base_url = "https://www.parlimen.gov.my/"
         self.main_listing_url = "https://www.parlimen.gov.my/ahli-dewan.html?uweb=dr&"
         
-        # Session for requests
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Session for requests, shared by the fetch workers; the rate limiter
+        # keeps every worker together under requests_per_second per host.
+        # Pages are cached on disk and revalidated with ETag/Last-Modified;
+        # HANSARD_HTTP_CACHE=offline replays a previous run without the network.
+        self.max_workers = max_workers
+        self.rate_limiter = HostRateLimiter(requests_per_second, burst)
+        self.session = make_session(
+            pool_size=max_workers,
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            },
+            rate_limiter=self.rate_limiter,
+            cache=HttpCache(),
+            mode=http_cache_mode,
+            ttls=[
+                (r'ahli-dewan\.html', 6 * 3600),      # listing: membership changes are rare but matter
+                (r'profile-ahli\.html', 24 * 3600),   # profiles
+            ]
+        )
+        self.cache_adapter = self.session.get_adapter(self.base_url)
         
         print(f"Initialized ComprehensiveMPScraper:")
         print(f"  Database: {database_name}")
         print(f"  MP Collection: {mp_collection_name}")
         print(f"  Honorific Collection: {honorific_collection_name}")
         print(f"  Main listing URL: {self.main_listing_url}")
+        print(f"  Fetching: {max_workers} workers, {requests_per_second} requests/s per host, HTTP cache {self.cache_adapter.mode}")
         
         # Test connection
         try:
@@ -46,8 +73,10 @@ class ComprehensiveMPScraper:
         except Exception as e:
             print(f"  MongoDB connection: FAILED - {str(e)}")
         
-        # Initialize honorific storage
+        # Initialize honorific storage (shared by the fetch workers)
         self.all_honorifics = set()
+        self.honorific_lexicon = HonorificLexicon()
+        self._honorific_lock = threading.Lock()
         self.honorific_dict = {
             'royal_noble_titles': set(),
             'datuk_titles': set(),
@@ -72,6 +101,26 @@ class ComprehensiveMPScraper:
             'MUDA': 'Malaysian United Democratic Alliance',
             'BEBAS': 'Independent'
         }
+        
+        # Fields the app maintains on MP records; the scraper only sets them on insert
+        self.app_owned_fields = ('created_at', 'performance', 'mentionedInHansard')
+        self._indexes_ensured = False
+        
+        # Profile page text patterns -> MP record field
+        self.text_field_targets = {
+            'name': 'full_name_with_titles',
+            'position_parliament': 'positionInParliament',
+            'position_cabinet': 'positionInCabinet',
+            'party': 'party',
+            'seat': 'seatNumber',
+            'parliament_code': 'constituency_code',
+            'constituency': 'constituency_name',
+            'state': 'state',
+            'phone': 'phone',
+            'fax': 'fax',
+            'email': 'email',
+            'address': 'address'
+        }
     
     def scrape_main_listing(self):
         """Scrape the main MP listing page to get all profile URLs"""
@@ -123,13 +172,9 @@ class ComprehensiveMPScraper:
     def scrape_mp_profile(self, profile_url, mp_id):
         """Scrape individual MP profile page"""
         try:
-            time.sleep(1)  
-            
             response = self.session.get(profile_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
             # Initialize MP data
             mp_data = {
                 # Schema fields
@@ -170,83 +215,17 @@ class ComprehensiveMPScraper:
                 'address': 'unknown'
             }
             
-            # Extract profile data from the structured format 
-            # Look for the table/info section with key-value pairs
-            
-            # Method 1: Look for table rows with Malay labels
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 2:
-                        key = cells[0].get_text(strip=True)
-                        value = cells[1].get_text(strip=True)
-                        
-                        self._extract_field_from_key_value(key, value, mp_data)
-            
-            # Method 2: Look for div/span structure with classes
-            info_sections = soup.find_all(['div', 'section'], class_=re.compile(r'info|profile|detail'))
-            for section in info_sections:
-                # Look for pattern: label followed by value
-                labels = section.find_all(['label', 'span', 'div'], text=re.compile(r'Nama|Jawatan|Parti|Parlimen|Kawasan|Negeri|Telefon|Faks|Email|Alamat'))
-                for label in labels:
-                    key = label.get_text(strip=True)
-                    # Find the next sibling or nearby element with the value
-                    value_element = label.find_next_sibling() or label.parent.find_next_sibling()
-                    if value_element:
-                        value = value_element.get_text(strip=True)
-                        self._extract_field_from_key_value(key, value, mp_data)
+            # Extract profile data from the structured format: table rows and
+            # labelled info sections first, then the label patterns over the page text
+            page = parse_profile_page(response.content)
             
-            # Method 3: Look for specific text patterns in the entire page
-            page_text = soup.get_text()
-            
-            # Extract using regex patterns for the exact format 
-            patterns = {
-                'name': r'Nama\s*([^Jawatan]+?)(?=Jawatan|$)',
-                'position_parliament': r'Jawatan dalam Parlimen\s*([^Jawatan]+?)(?=Jawatan dalam Kabinet|Parti|$)',
-                'position_cabinet': r'Jawatan dalam Kabinet\s*([^Parti]+?)(?=Parti|$)',
-                'party': r'Parti\s*([^Tempat]+?)(?=Tempat|$)',
-                'seat': r'Tempat Duduk\s*([^Parlimen]+?)(?=Parlimen|$)',
-                'parliament_code': r'Parlimen\s*([^Kawasan]+?)(?=Kawasan|$)',
-                'constituency': r'Kawasan\s*([^Negeri]+?)(?=Negeri|$)',
-                'state': r'Negeri\s*([^No\.\s*Telefon]+?)(?=No\.\s*Telefon|$)',
-                'phone': r'No\.\s*Telefon\s*([^No\.\s*Faks]+?)(?=No\.\s*Faks|$)',
-                'fax': r'No\.\s*Faks\s*([^Email]+?)(?=Email|$)',
-                'email': r'Email\s*([^Alamat]+?)(?=Alamat|$)',
-                'address': r'Alamat Surat-menyurat\s*(.+?)(?=\n|$)'
-            }
+            for key, value in page.key_values:
+                self._extract_field_from_key_value(key, value, mp_data)
             
-            for field, pattern in patterns.items():
-                match = re.search(pattern, page_text, re.DOTALL | re.IGNORECASE)
-                if match:
-                    value = match.group(1).strip()
-                    
-                    if field == 'name' and value:
-                        mp_data['full_name_with_titles'] = value
-                    elif field == 'position_parliament' and value:
-                        mp_data['positionInParliament'] = value
-                    elif field == 'position_cabinet' and value:
-                        mp_data['positionInCabinet'] = value
-                    elif field == 'party' and value:
-                        mp_data['party'] = value
-                        mp_data['party_full_name'] = self.party_full_names.get(value, value)
-                    elif field == 'seat' and value:
-                        mp_data['seatNumber'] = value
-                    elif field == 'parliament_code' and value:
-                        mp_data['constituency_code'] = value
-                    elif field == 'constituency' and value:
-                        mp_data['constituency_name'] = value
-                    elif field == 'state' and value:
-                        mp_data['state'] = value
-                    elif field == 'phone' and value:
-                        mp_data['phone'] = value
-                    elif field == 'fax' and value:
-                        mp_data['fax'] = value
-                    elif field == 'email' and value:
-                        mp_data['email'] = value
-                    elif field == 'address' and value:
-                        mp_data['address'] = value
+            for field, value in page.text_fields.items():
+                mp_data[self.text_field_targets[field]] = value
+                if field == 'party':
+                    mp_data['party_full_name'] = self.party_full_names.get(value, value)
             
             # Combine constituency code and name for the constituency field
             if mp_data['constituency_code'] != 'unknown' and mp_data['constituency_name'] != 'unknown':
@@ -257,18 +236,15 @@ class ComprehensiveMPScraper:
                 mp_data['constituency'] = mp_data['constituency_name']
             
             # Extract profile picture URL if available
-            img_elements = soup.find_all('img', src=True)
-            for img in img_elements:
-                src = img.get('src')
-                if src and ('profile' in src.lower() or 'mp' in src.lower() or 'ahli' in src.lower()):
-                    mp_data['profilePicture'] = urljoin(self.base_url, src)
-                    break
+            if page.picture_src:
+                mp_data['profilePicture'] = urljoin(self.base_url, page.picture_src)
             
             # Process honorifics and clean name
             if mp_data['full_name_with_titles'] != 'unknown':
-                honorifics = self.extract_honorifics_from_name(mp_data['full_name_with_titles'])
-                mp_data['honorifics'] = honorifics
-                mp_data['name'] = self.clean_name_from_honorifics(mp_data['full_name_with_titles'])
+                with self._honorific_lock:
+                    honorifics = self.extract_honorifics_from_name(mp_data['full_name_with_titles'])
+                    mp_data['honorifics'] = honorifics
+                    mp_data['name'] = self.clean_name_from_honorifics(mp_data['full_name_with_titles'])
             
             print(f"Scraped MP {mp_id}: {mp_data['name']} ({mp_data['party']}) - {mp_data['constituency']}")
             return mp_data
@@ -338,6 +314,7 @@ class ComprehensiveMPScraper:
             if is_honorific:
                 honorifics.append(word_clean)
                 self.all_honorifics.add(word_clean)
+                self.honorific_lexicon.add(word_clean)
 
             # Detect combined titles
             if i < len(words) - 1:
@@ -353,98 +330,127 @@ class ComprehensiveMPScraper:
                 ]):
                     honorifics.append(combined)
                     self.all_honorifics.add(combined)
+                    self.honorific_lexicon.add(combined)
 
         return honorifics
 
     
     def clean_name_from_honorifics(self, full_name_with_titles):
         """Remove honorifics from full name to get clean name"""
-        name = full_name_with_titles.replace('’', "'")  # Normalize apostrophes early
-
-        # Remove detected honorifics (longest first to avoid partial match issues)
-        for honorific in sorted(self.all_honorifics, key=lambda x: -len(x)):
-            name = re.sub(rf'\b{re.escape(honorific)}\b\.?', '', name, flags=re.IGNORECASE)
+        # Remove detected honorifics in one pass over the name (longest title
+        # wins at each position)
+        name, _ = self.honorific_lexicon.strip(full_name_with_titles)
 
-        # Final cleanup
-        name = re.sub(r'[()\']', '', name)       # Remove brackets and apostrophes
-        name = re.sub(r'\s+', ' ', name)         # Normalize multiple spaces
-        name = re.sub(r'^\s*[-]*\s*', '', name)  # Remove leading hyphen or whitespace
-        name = re.sub(r'\s*[-]*\s*$', '', name)  # Remove trailing hyphen or whitespace
-        return name.strip()
+        # Final cleanup: brackets, apostrophes, spacing and stray hyphens
+        return clean_name_text(name)
 
     
     def categorize_honorifics(self):
         """Categorize all collected honorifics"""
         for title in self.all_honorifics:
-            title_lower = title.lower().replace("’", "'")  # Normalize apostrophes
-
-            # Royal/Noble titles
-            if any(x in title_lower for x in ['yab','yang amat berhormat', 'tan sri','tan seri', 'tun', 'tengku', 'tunku', 'tuanku']):
-                self.honorific_dict['royal_noble_titles'].add(title)
-
-            # Datuk titles
-            elif any(x in title_lower for x in [ 
-                "dato", "dato'", "datuk",
-                "dato seri", "dato' seri",
-                "dato sri", "dato' sri",
-                "datuk seri", "datuk sri"]):
-                self.honorific_dict['datuk_titles'].add(title)
-
-            # Parliamentary titles
-            elif title_lower in ['yb', 'yang berhormat']:
-                self.honorific_dict['parliamentary_titles'].add(title)
-
-            # Professional titles 
-            elif title_lower in ['ir', 'ir.', 'ts', 'ts.','dr','dr.','prof','prof.']:
-                self.honorific_dict['professional_titles'].add(title)
-
-            # Religious titles
-            elif any(x in title_lower for x in ['haji', 'hajah', 'sheikh', 'syeikh', 'ustaz', 'ustazah','hajjah','hj.']):
-                self.honorific_dict['religious_titles'].add(title)
-
-            # Military titles
-            elif any(x in title_lower for x in ['kapten', 'komander', 'general', 'admiral', 'colonel', 'major', 'brigadier']):
-                self.honorific_dict['military_titles'].add(title)
-
-            # Gender titles
-            elif title_lower in ['tuan', 'puan', 'encik', 'cik']:
-                self.honorific_dict['gender_titles'].add(title)
-
-            # Regional or chivalric titles
-            elif any(x in title_lower for x in ['panglima', 'wira', 'indera', 'paduka', 'utama']):
-                self.honorific_dict['regional_titles'].add(title)
+            category = categorize_honorific(title)
+            if category:
+                self.honorific_dict[category].add(title)
 
     
-    def save_mp_records(self, mp_records):
-        """Save MP records to MongoDB"""
-        print(f"Saving {len(mp_records)} MP records to database...")
+    def _profile_hash(self, record):
+        """Hash of the scraped fields of a record (app-owned fields excluded)"""
+        fields = {k: v for k, v in record.items() if k not in self.app_owned_fields}
+        payload = json.dumps(fields, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def ensure_mp_indexes(self):
+        """Create any missing MP indexes (once per scraper, not per save)"""
+        if self._indexes_ensured:
+            return
+        wanted = [
+            pymongo.IndexModel('name'),
+            pymongo.IndexModel('party'),
+            pymongo.IndexModel('constituency_code'),
+            pymongo.IndexModel('parliament_term'),
+            pymongo.IndexModel('service'),
+            pymongo.IndexModel('mp_id'),
+            pymongo.IndexModel([('service', 1), ('parliament_term', 1)]),
+            pymongo.IndexModel([('mp_id', 1), ('parliament_term', 1)]),
+        ]
+        existing = set(self.mp_collection.index_information())
+        missing = [index for index in wanted if index.document['name'] not in existing]
+        if missing:
+            self.mp_collection.create_indexes(missing)
+            print(f"Created {len(missing)} database indexes")
+        self._indexes_ensured = True
+    
+    def save_mp_records(self, mp_records, listed_ids=None):
+        """Sync scraped MP records into MongoDB; returns the scraped records.
+
+        ``mp_records`` may be a list or a generator still being filled by the
+        fetch workers. Each record's scraped fields are hashed and compared with
+        the stored ``content_hash``: only new or changed profiles are upserted,
+        and 15th parliament records whose ``mp_id`` is no longer on the listing
+        (``listed_ids``) are deleted, all in one bulk write. Profiles that failed
+        to fetch keep their stored record. App-owned fields (performance,
+        Hansard mentions, created_at) are only written on insert.
+        """
+        print("Syncing MP records with the database as they are scraped...")
+        
+        saved = []
+        operations = []
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
         
         try:
-            # Clear existing records for 15th parliament
-            self.mp_collection.delete_many({'parliament_term': '15th'})
-            
-            # Filter out None records
-            valid_records = [record for record in mp_records if record is not None]
+            stored_hashes = {
+                doc['mp_id']: doc.get('content_hash')
+                for doc in self.mp_collection.find(
+                    {'parliament_term': '15th', 'mp_id': {'$exists': True}},
+                    {'_id': 0, 'mp_id': 1, 'content_hash': 1}
+                )
+            }
             
-            if valid_records:
-                result = self.mp_collection.insert_many(valid_records)
-                print(f"Successfully saved {len(result.inserted_ids)} MP records")
-                
-                # Create indexes
-                self.mp_collection.create_index('name')
-                self.mp_collection.create_index('party')
-                self.mp_collection.create_index('constituency_code')
-                self.mp_collection.create_index('parliament_term')
-                self.mp_collection.create_index('service')
-                self.mp_collection.create_index('mp_id')
-                self.mp_collection.create_index([('service', 1), ('parliament_term', 1)])
+            now = datetime.now()
+            for record in mp_records:
+                # Filter out None records
+                if record is None:
+                    continue
+                saved.append(record)
+                content_hash = self._profile_hash(record)
+                stored_hash = stored_hashes.get(record['mp_id'])
+                if stored_hash == content_hash:
+                    counts['unchanged'] += 1
+                    continue
+                counts['updated' if record['mp_id'] in stored_hashes else 'inserted'] += 1
                 
-                print("Database indexes created")
+                scraped = {k: v for k, v in record.items() if k not in self.app_owned_fields}
+                scraped['content_hash'] = content_hash
+                scraped['updated_at'] = now
+                operations.append(pymongo.UpdateOne(
+                    {'mp_id': record['mp_id'], 'parliament_term': '15th'},
+                    {'$set': scraped,
+                     '$setOnInsert': {k: record[k] for k in self.app_owned_fields if k in record}},
+                    upsert=True
+                ))
+            
+            if listed_ids is not None:
+                stale = set(stored_hashes) - set(listed_ids)
+            else:
+                stale = set(stored_hashes) - {record['mp_id'] for record in saved}
+            if stale and saved:
+                counts['deleted'] = len(stale)
+                operations.append(pymongo.DeleteMany({'parliament_term': '15th', 'mp_id': {'$in': sorted(stale)}}))
+            
+            if operations:
+                self.mp_collection.bulk_write(operations, ordered=False)
+            print(f"MP sync: {counts['inserted']} inserted, {counts['updated']} updated, "
+                  f"{counts['unchanged']} unchanged, {counts['deleted']} deleted")
+            
+            if saved:
+                self.ensure_mp_indexes()
             else:
                 print("No valid MP records to save")
                 
         except Exception as e:
             print(f"Error saving MP records: {str(e)}")
+        
+        return saved
     
     def save_honorific_dictionary(self):
         """Save honorific dictionary to file and database"""
@@ -556,28 +562,32 @@ class ComprehensiveMPScraper:
         
         print(f"Found {len(profile_links)} MP profiles to scrape")
         
-        # Step 2: Scrape each MP profile
-        mp_records = []
-        failed_count = 0
-        
-        for i, link in enumerate(profile_links, 1):
-            print(f"Scraping {i}/{len(profile_links)}: ID {link['id']}")
-            
-            mp_data = self.scrape_mp_profile(link['url'], link['id'])
-            if mp_data:
-                mp_records.append(mp_data)
-            else:
-                failed_count += 1
-            
-            # Progress update every 20 MPs
-            if i % 20 == 0:
-                print(f"Progress: {i}/{len(profile_links)} completed, {failed_count} failed")
-        
-        print(f"Scraping completed: {len(mp_records)} successful, {failed_count} failed")
+        # Step 2: Scrape MP profiles concurrently and stream them into the save step
+        stats = {'done': 0, 'failed': 0}
+        
+        def scraped_profiles():
+            profiles = fetch_concurrently(
+                lambda link: self.scrape_mp_profile(link['url'], link['id']),
+                profile_links,
+                max_workers=self.max_workers
+            )
+            for link, mp_data in profiles:
+                stats['done'] += 1
+                if mp_data is None:
+                    stats['failed'] += 1
+                
+                # Progress update every 20 MPs
+                if stats['done'] % 20 == 0:
+                    print(f"Progress: {stats['done']}/{len(profile_links)} completed, {stats['failed']} failed")
+                yield mp_data
         
         # Step 3: Save data
+        mp_records = self.save_mp_records(scraped_profiles(), listed_ids=[link['id'] for link in profile_links])
+        failed_count = stats['failed']
+        print(f"Scraping completed: {len(mp_records)} successful, {failed_count} failed")
+        print(f"HTTP cache: {self.cache_adapter.stats['hits']} hits, {self.cache_adapter.stats['revalidated']} revalidated, "
+              f"{self.cache_adapter.stats['fetched']} fetched")
         self.save_honorific_dictionary()
-        self.save_mp_records(mp_records)
         
         # Step 4: Generate report
         self.generate_analysis_report(mp_records)
@@ -1,55 +1,64 @@
 import os
-import re
+import sys
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 from datetime import datetime
 from pymongo import MongoClient
-from google.cloud import vision
-from google.cloud.vision_v1 import types
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from pipeline_common.ledger import FAILED, LEDGER_COLLECTION, SKIPPED, StageLedger, fingerprint
+from pipeline_common.ocr_cache import OcrCache, OcrKey, sha256_bytes
+from pipeline_common.textnorm import clean_ocr_text
+from pipeline_common.vision_client import GoogleVisionClient, RestVisionClient, ocr_pdf
+
 # === CONFIG ===
 lang_hint = ["en", "ms"]
+vision_model = "builtin/stable"
+max_in_flight = 8  # concurrent 5-page Vision requests, across all documents
 load_dotenv("../../../3_app_system/backend/.env")
 mongo_uri = os.getenv("MONGODB_URI")
 client = MongoClient(mongo_uri)
 collection = client["MyParliament"]["HansardDocument"]
-vision_client = vision.ImageAnnotatorClient()
+ledger = StageLedger(client["MyParliament"][LEDGER_COLLECTION])
+ocr_cache = OcrCache()
+OCR_VERSION = "1"  # bump when the Vision settings or cleaning change
+
+# VISION_ENDPOINT points the script at another files:annotate server,
+# e.g. the local stub: python benchmarks/vision_stub.py
+vision_endpoint = os.getenv("VISION_ENDPOINT")
+if vision_endpoint:
+    vision_client = RestVisionClient(vision_endpoint, lang_hint, vision_model, api_key=os.getenv("VISION_API_KEY"))
+else:
+    vision_client = GoogleVisionClient(lang_hint, vision_model)
+vision_pool = ThreadPoolExecutor(max_workers=max_in_flight)
 
 # === TEXT CLEANING ===
 def clean_text(text):
-    text = text.replace('\t', ' ')
-    text = re.sub(r'[ \t]{2,}', ' ', text)
-    text = re.sub(r'(\w+)-\n(\w+)', r'\1\2', text)
-    text = re.sub(r'(?<![.!?:;])\n(?=\w)', ' ', text)
-    text = re.sub(r'\s*\|\s*', ' | ', text)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    return text.strip()
-
-# === OCR USING GOOGLE VISION WITHOUT PAGE HEADERS ===
-def ocr_with_vision(pdf_bytes):
-    input_config = types.InputConfig(content=pdf_bytes, mime_type="application/pdf")
-    feature = types.Feature(type_=types.Feature.Type.DOCUMENT_TEXT_DETECTION)
-
-    request = types.AnnotateFileRequest(
-        input_config=input_config,
-        features=[feature],
-        image_context=types.ImageContext(language_hints=lang_hint)
-    )
-
-    response = vision_client.batch_annotate_files(requests=[request])
-    responses = response.responses[0].responses
+    return clean_ocr_text(text)
 
+def join_pages(pages):
     all_text = ""
-    for page_response in responses:
-        if page_response.error.message:
-            raise Exception(f"OCR error: {page_response.error.message}")
-        text = page_response.full_text_annotation.text.strip()
+    for page in pages:
+        text = page.strip()
         if text:
             all_text += "\n" + text
-
     return all_text.strip()
 
+# === OCR USING GOOGLE VISION WITHOUT PAGE HEADERS ===
+def cached_ocr(pdf_bytes, key):
+    """Vision page texts for ``key``, requesting only pages missing from the cache."""
+    pages = ocr_cache.get_document(key)
+    if pages is None:
+        pages = ocr_pdf(vision_client, pdf_bytes, vision_pool,
+                        done=ocr_cache.get_pages(key),
+                        on_pages=lambda batch: ocr_cache.put_pages(key, batch),
+                        total_pages=ocr_cache.page_count(key))
+        ocr_cache.mark_complete(key, len(pages))
+    return pages
+
 # === DOWNLOAD PDF ===
 def download_pdf(url) -> bytes:
     r = requests.get(url)
@@ -57,12 +66,58 @@ def download_pdf(url) -> bytes:
         raise Exception(f"Download failed: {url}")
     return r.content
 
+def reclean_from_cache():
+    """Re-apply the cleaning rules to cached Vision output without calling Vision."""
+    docs = list(collection.find({"ocr_source.engine": "google-vision"}, {"_id": 1, "ocr_source": 1}))
+    print(f"Re-cleaning {len(docs)} documents from the OCR cache")
+    for doc in tqdm(docs, desc="Re-cleaning"):
+        pages = ocr_cache.get_document(OcrKey(**doc["ocr_source"]))
+        if pages is None:
+            print(f"[{doc['_id']}]  No complete OCR cache entry, skipped.")
+            continue
+        collection.update_one({"_id": doc["_id"]}, {
+            "$set": {"ocr_text": clean_text(join_pages(pages))}
+        })
+
+if "--reclean" in sys.argv:
+    reclean_from_cache()
+    sys.exit(0)
+
 # === GET LOW RESOL DOCS ===
-docs = list(collection.find({
-    "low_ocr_resol": True,
-    "ocr_text": {"$exists": False}
-}, {"_id": 1, "hansardDate": 1}))
+# Documents Tesseract newly flagged (or whose Vision run failed last time)
+entries = list(ledger.stale("ocr_vision", OCR_VERSION))
+todo = {entry["doc_id"]: entry["input_fingerprint"] for entry in entries}
+stale_ids = list(todo)
+
+# Documents this stage has never recorded but that Vision solved before the
+# ledger are recorded from their stored text, not sent to Vision again
+unrecorded_ids = [entry["doc_id"] for entry in entries if entry["version"] is None]
+seeded_ids = set()
+for start in range(0, len(unrecorded_ids), 1000):
+    seed_ops = []
+    for doc in collection.find({
+        "_id": {"$in": unrecorded_ids[start:start + 1000]},
+        "low_ocr_resol": "solved"
+    }, {"_id": 1, "ocr_text": 1}):
+        seed_ops += ledger.operations(doc["_id"], "ocr_vision", OCR_VERSION, input_fingerprint=todo[doc["_id"]],
+                                      output_fingerprint=fingerprint(doc.get("ocr_text")))
+        seeded_ids.add(doc["_id"])
+    ledger.write(seed_ops)
+
+docs = []
+for start in range(0, len(stale_ids), 1000):
+    docs += collection.find({
+        "_id": {"$in": stale_ids[start:start + 1000]},
+        "low_ocr_resol": True
+    }, {"_id": 1, "hansardDate": 1})
+
+# The rest were OCRed by Tesseract
+low_resol_ids = {doc["_id"] for doc in docs}
+ledger.write([op for _id in stale_ids if _id not in low_resol_ids and _id not in seeded_ids
+              for op in ledger.operations(_id, "ocr_vision", OCR_VERSION, status=SKIPPED,
+                                          input_fingerprint=todo[_id])])
 
+print(f"Recorded from earlier Vision output: {len(seeded_ids)}")
 print(f"Low resolution documents to process: {len(docs)}")
 
 # === PROCESS LOOP ===
@@ -72,20 +127,28 @@ for doc in tqdm(docs, desc="Solving low_ocr_resol"):
     date_str = date.strftime("%d%m%Y")
     url = f"https://www.parlimen.gov.my/files/hindex/pdf/DR-{date_str}.pdf"
 
+    began = time.perf_counter()
     try:
         pdf_bytes = download_pdf(url)
-        raw_text = ocr_with_vision(pdf_bytes)
+        key = OcrKey(sha256_bytes(pdf_bytes), "google-vision", "+".join(lang_hint), 0, vision_client.version)
+        raw_text = join_pages(cached_ocr(pdf_bytes, key))
         cleaned = clean_text(raw_text)
 
         collection.update_one({"_id": _id}, {
             "$set": {
                 "ocr_text": cleaned,
+                "ocr_source": key.as_dict(),
                 "processable": True,
                 "low_ocr_resol": "solved"
             }
         })
 
+        # New text marks the document stale for segmentation
+        ledger.record(_id, "ocr_vision", OCR_VERSION, input_fingerprint=todo[_id],
+                      output_fingerprint=fingerprint(cleaned), duration=time.perf_counter() - began)
         print(f"[{date_str}]  OCR solved and updated")
 
     except Exception as e:
+        ledger.record(_id, "ocr_vision", OCR_VERSION, status=FAILED, input_fingerprint=todo[_id],
+                      duration=time.perf_counter() - began)
         print(f"[{date_str}]  Error: {e}")
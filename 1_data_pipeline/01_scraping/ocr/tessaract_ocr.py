@@ -1,16 +1,24 @@
 import os
 import re
+import sys
 import requests
 import subprocess
 import tempfile
+import time
 from datetime import datetime
 from pymongo import MongoClient
 from tqdm import tqdm
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from pipeline_common.ledger import FAILED, LEDGER_COLLECTION, SKIPPED, StageLedger, fingerprint
+from pipeline_common.ocr_cache import OcrCache, OcrKey, sha256_file
+from pipeline_common.textnorm import clean_ocr_text
+
 # === CONFIG ===
 lang = "eng+msa"
 threads = "56"
+dpi = 0  # 0 = OCR at the PDF's own resolution, otherwise passed to --oversample
 load_dotenv("../../../3_app_system/backend/.env")
 mongo_uri = os.getenv("MONGODB_URI")
 db_name = "MyParliament"
@@ -18,17 +26,14 @@ collection_name = "HansardDocument"
 
 client = MongoClient(mongo_uri)
 collection = client[db_name][collection_name]
+ledger = StageLedger(client[db_name][LEDGER_COLLECTION])
+ocr_cache = OcrCache()
+OCR_VERSION = "1"  # bump when the OCR settings or reconstruction change
 
 # === TEXT CLEANING FUNCTIONS ===
 
 def clean_column_text(text):
-    text = text.replace('\t', ' ')
-    text = re.sub(r'[ \t]{2,}', ' ', text)
-    text = re.sub(r'(\w+)-\n(\w+)', r'\1\2', text)
-    text = re.sub(r'(?<![.!?:;])\n(?=\w)', ' ', text)
-    text = re.sub(r'\s*\|\s*', ' | ', text)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    return text.strip()
+    return clean_ocr_text(text)
 
 def reconstruct_paragraphs_from_layout(raw_text):
     pages = raw_text.split("\f")
@@ -71,9 +76,26 @@ def download_pdf(url) -> str:
     else:
         raise Exception(f"Failed to download PDF from {url}")
 
-def run_ocr(input_path: str) -> str:
+def tool_version(cmd) -> str:
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    output = result.stdout.strip() or result.stderr.strip()
+    return output.splitlines()[0] if output else "unknown"
+
+def engine_version() -> str:
+    ocrmypdf = tool_version(["ocrmypdf", "--version"])
+    tesseract = tool_version(["tesseract", "--version"])
+    return f"ocrmypdf {ocrmypdf}; {tesseract}"
+
+def count_pages(pdf_path: str) -> int:
+    result = subprocess.run(["pdfinfo", pdf_path], capture_output=True, text=True, check=True)
+    match = re.search(r"^Pages:\s+(\d+)", result.stdout, re.MULTILINE)
+    if not match:
+        raise Exception(f"Could not read page count of {pdf_path}")
+    return int(match.group(1))
+
+def run_ocr(input_path: str, pages=None) -> str:
     output_path = input_path.replace(".pdf", "-ocr.pdf")
-    subprocess.run([
+    cmd = [
         "ocrmypdf",
         "--force-ocr",
         "--rotate-pages",
@@ -81,27 +103,100 @@ def run_ocr(input_path: str) -> str:
         "--output-type", "pdfa",
         "-l", lang,
         "--jobs", threads,
-        input_path, output_path
-    ], check=True)
+    ]
+    if dpi:
+        cmd += ["--oversample", str(dpi)]
+    if pages:
+        cmd += ["--pages", ",".join(str(p) for p in pages)]
+    subprocess.run(cmd + [input_path, output_path], check=True)
     return output_path
 
-def extract_layout_text(pdf_path: str) -> str:
-    txt_path = pdf_path.replace(".pdf", "-layout.txt")
-    subprocess.run(["pdftotext", "-layout", pdf_path, txt_path], check=True)
-    with open(txt_path, "r", encoding="utf-8") as f:
-        return f.read()
+def extract_page_text(pdf_path: str, page_no: int) -> str:
+    # Keeps pdftotext's trailing form feed so joined pages match a whole-file extract
+    result = subprocess.run(
+        ["pdftotext", "-layout", "-f", str(page_no), "-l", str(page_no), pdf_path, "-"],
+        capture_output=True, check=True
+    )
+    return result.stdout.decode("utf-8", errors="replace")
+
+def ocr_pages(pdf_path: str, key: OcrKey) -> str:
+    """Raw layout text of every page, OCRing only pages missing from the cache."""
+    cached = ocr_cache.get_document(key)
+    if cached is not None:
+        return "".join(cached)
+
+    page_count = count_pages(pdf_path)
+    missing = ocr_cache.missing_pages(key, page_count)
+    batch_size = int(threads)
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        ocr_pdf = run_ocr(pdf_path, pages=batch)
+        try:
+            ocr_cache.put_pages(key, {p: extract_page_text(ocr_pdf, p) for p in batch})
+        finally:
+            os.remove(ocr_pdf)
+    ocr_cache.mark_complete(key, page_count)
+    return "".join(ocr_cache.get_document(key))
+
+def reclean_from_cache():
+    """Re-apply the cleaning rules to cached raw OCR without running OCR again."""
+    docs = list(collection.find({"ocr_source.engine": "tesseract"}, {"_id": 1, "ocr_source": 1}))
+    print(f"Re-cleaning {len(docs)} documents from the OCR cache")
+    for doc in tqdm(docs, desc="Re-cleaning"):
+        pages = ocr_cache.get_document(OcrKey(**doc["ocr_source"]))
+        if pages is None:
+            print(f"[{doc['_id']}]  No complete OCR cache entry, skipped.")
+            continue
+        collection.update_one({"_id": doc["_id"]}, {
+            "$set": {"ocr_text": reconstruct_paragraphs_from_layout("".join(pages))}
+        })
+
+if "--reclean" in sys.argv:
+    reclean_from_cache()
+    sys.exit(0)
 
 # === PROCESSING LOOP ===
 
-flagged_docs = list(collection.find({
-    "text_quality": "bad",
-    "ocr_status": {"$in": ["forced_ocr", "need_ocr"]},
-    "ocr_text": {"$exists": False},
-    "processable": False,
-    "low_ocr_resol": {"$ne": True}
-}, {"_id": 1, "hansardDate": 1}))
+# Documents the ledger lists as new or reflagged since their last OCR (or failed last time)
+entries = list(ledger.stale("ocr_tesseract", OCR_VERSION))
+todo = {entry["doc_id"]: entry["input_fingerprint"] for entry in entries}
+stale_ids = list(todo)
+flagged = {"text_quality": "bad", "ocr_status": {"$in": ["forced_ocr", "need_ocr"]}}
+
+# Documents this stage has never recorded but that were OCRed before the ledger
+# (ocr_text stored, or flagged low_ocr_resol) are recorded from that output, not OCRed again
+unrecorded_ids = [entry["doc_id"] for entry in entries if entry["version"] is None]
+seeded_ids = set()
+for start in range(0, len(unrecorded_ids), 1000):
+    seed_ops = []
+    for doc in collection.find({
+        "_id": {"$in": unrecorded_ids[start:start + 1000]},
+        **flagged,
+        "$or": [{"ocr_text": {"$exists": True}}, {"low_ocr_resol": {"$in": [True, "solved"]}}]
+    }, {"_id": 1, "ocr_text": 1, "low_ocr_resol": 1}):
+        output = "low_ocr_resol" if doc.get("low_ocr_resol") in (True, "solved") else doc["ocr_text"]
+        seed_ops += ledger.operations(doc["_id"], "ocr_tesseract", OCR_VERSION, input_fingerprint=todo[doc["_id"]],
+                                      output_fingerprint=fingerprint(output))
+        seeded_ids.add(doc["_id"])
+    ledger.write(seed_ops)
+
+flagged_docs = []
+for start in range(0, len(stale_ids), 1000):
+    flagged_docs += collection.find({
+        "_id": {"$in": [_id for _id in stale_ids[start:start + 1000] if _id not in seeded_ids]},
+        **flagged
+    }, {"_id": 1, "hansardDate": 1})
+
+# The rest were reflagged as not needing OCR
+flagged_ids = {doc["_id"] for doc in flagged_docs}
+ledger.write([op for _id in stale_ids if _id not in flagged_ids and _id not in seeded_ids
+              for op in ledger.operations(_id, "ocr_tesseract", OCR_VERSION, status=SKIPPED,
+                                          input_fingerprint=todo[_id])])
+
+print(f"Recorded from earlier OCR output: {len(seeded_ids)}")
 
 print(f"Total flagged for OCR: {len(flagged_docs)}")
+tesseract_version = engine_version()
 
 for doc in tqdm(flagged_docs, desc="OCR Processing"):
     _id = doc["_id"]
@@ -109,27 +204,29 @@ for doc in tqdm(flagged_docs, desc="OCR Processing"):
     date_str = date.strftime("%d%m%Y")
     url = f"https://www.parlimen.gov.my/files/hindex/pdf/DR-{date_str}.pdf"
 
+    began = time.perf_counter()
     try:
         local_pdf = download_pdf(url)
-        ocr_pdf = run_ocr(local_pdf)
-        layout_text = extract_layout_text(ocr_pdf)
+        key = OcrKey(sha256_file(local_pdf), "tesseract", lang, dpi, tesseract_version)
+        try:
+            layout_text = ocr_pages(local_pdf, key)
+        finally:
+            os.remove(local_pdf)
         enhanced_text = reconstruct_paragraphs_from_layout(layout_text)
 
         collection.update_one({"_id": _id}, {
             "$set": {
                 "ocr_text": enhanced_text,
+                "ocr_source": key.as_dict(),
                 "processable": True
             }
         })
 
+        # New text marks the document stale for segmentation
+        ledger.record(_id, "ocr_tesseract", OCR_VERSION, input_fingerprint=todo[_id],
+                      output_fingerprint=fingerprint(enhanced_text), duration=time.perf_counter() - began)
         print(f"[{date_str}]  Document inserted.")
 
-        os.remove(local_pdf)
-        os.remove(ocr_pdf)
-        layout_txt = ocr_pdf.replace("-ocr.pdf", "-layout.txt")
-        if os.path.exists(layout_txt):
-            os.remove(layout_txt)
-
     except subprocess.CalledProcessError as e:
         # Flagging if it's a layout/image problem (safe generalization)
         collection.update_one({"_id": _id}, {
@@ -137,7 +234,12 @@ for doc in tqdm(flagged_docs, desc="OCR Processing"):
                 "low_ocr_resol": True
             }
         })
+        # Done as far as Tesseract goes; marks the document stale for Google Vision
+        ledger.record(_id, "ocr_tesseract", OCR_VERSION, input_fingerprint=todo[_id],
+                      output_fingerprint=fingerprint("low_ocr_resol"), duration=time.perf_counter() - began)
         print(f"[{date_str}]  OCR subprocess error. Flagged as low_ocr_resol.")
 
     except Exception as e:
+        ledger.record(_id, "ocr_tesseract", OCR_VERSION, status=FAILED, input_fingerprint=todo[_id],
+                      duration=time.perf_counter() - began)
         print(f"[{date_str}]  Unexpected error: {e}")
@@ -0,0 +1,137 @@
+"""
+Keep HansardDocument sampling flags (scrapMethod, docLength, decade,
+wordCount) current from a MongoDB change stream.
+
+Inserts, replacements and updates that touch content_text, ocr_text,
+low_ocr_resol or hansardDate are re-flagged as they happen, so the
+sampling notebook never needs a full-corpus pass. The stream's resume token
+is saved after each write, and a restart continues from it. On the very
+first start (no token yet) the stream is opened first and then every
+unflagged document is flagged once, so nothing written in between is
+missed.
+
+Change streams need a replica set. Locally, a single-node one works:
+
+    mongod --replSet rs0 --dbpath ~/hansard_rs0 --port 27017
+    mongosh --eval 'rs.initiate()'
+    python 02_sampling/flag_watcher.py --uri "mongodb://localhost:27017/?replicaSet=rs0"
+
+Usage:
+    python 02_sampling/flag_watcher.py           # MONGODB_URI from the backend .env
+    python 02_sampling/flag_watcher.py --once    # flag unflagged documents and exit
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import dotenv
+from bson import json_util
+from pymongo import MongoClient, UpdateOne
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from pipeline_common.doc_flags import FLAG_PROJECTION, SOURCE_FIELDS, compute_flags, flag_documents, flags_changed
+
+env_path = os.path.join(os.path.dirname(__file__), '../../3_app_system/backend/.env')
+dotenv.load_dotenv(env_path)
+
+DEFAULT_RESUME_FILE = Path.home() / "hansard_flagger" / "resume_token.json"
+
+
+def change_pipeline():
+    """Only changes that can affect the flags; the document is projected like FLAG_PROJECTION."""
+    source_changed = [{f'updateDescription.updatedFields.{field}': {'$exists': True}} for field in SOURCE_FIELDS]
+    source_changed.append({'updateDescription.removedFields': {'$in': list(SOURCE_FIELDS)}})
+    projection = {f'fullDocument.{field}': 1 for field, spec in FLAG_PROJECTION.items() if spec == 1}
+    projection['fullDocument._id'] = 1
+    projection['fullDocument.has_ocr_text'] = {'$ne': [{'$type': '$fullDocument.ocr_text'}, 'missing']}
+    projection['operationType'] = 1
+    return [
+        {'$match': {'$or': [
+            {'operationType': {'$in': ['insert', 'replace']}},
+            {'operationType': 'update', '$or': source_changed},
+        ]}},
+        {'$project': projection},
+    ]
+
+
+def load_resume_token(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json_util.loads(path.read_text())
+
+
+def save_resume_token(path, token):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json_util.dumps(token))
+    tmp.replace(path)
+
+
+def watch(collection, resume_file, batch_size=100, max_await_ms=1000):
+    token = load_resume_token(resume_file)
+    counts = {'changes': 0, 'updated': 0, 'unchanged': 0}
+    operations = []
+    saved_token = token
+
+    with collection.watch(change_pipeline(), full_document='updateLookup', resume_after=token,
+                          max_await_time_ms=max_await_ms) as stream:
+        if token is None:
+            print("No resume token: flagging unflagged documents before following the stream...")
+            result = flag_documents(collection)
+            print(f"  {result['updated']} flagged, {result['unchanged']} already current "
+                  f"({result['processing_time']:.1f}s)")
+
+        print("Watching HansardDocument for changes (Ctrl+C to stop)")
+        while stream.alive:
+            change = stream.try_next()
+            if change is not None:
+                counts['changes'] += 1
+                doc = change.get('fullDocument')
+                if doc:  # None if the document was deleted before the lookup
+                    flags = compute_flags(doc)
+                    if flags_changed(doc, flags):
+                        operations.append(UpdateOne({'_id': doc['_id']}, {'$set': flags}))
+                    else:
+                        counts['unchanged'] += 1
+
+            # Write when the batch is full or the stream is idle, then persist
+            # the token so a restart resumes after what has been written
+            if operations and (len(operations) >= batch_size or change is None):
+                counts['updated'] += collection.bulk_write(operations, ordered=False).modified_count
+                operations = []
+                print(f"  {counts['changes']} changes seen, {counts['updated']} documents re-flagged")
+            if not operations and stream.resume_token != saved_token:
+                saved_token = stream.resume_token
+                save_resume_token(resume_file, saved_token)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv('MONGODB_URI'), help="MongoDB URI (replica set for watching)")
+    parser.add_argument("--resume-file", default=str(DEFAULT_RESUME_FILE))
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--once", action="store_true", help="flag unflagged documents and exit")
+    args = parser.parse_args()
+
+    if not args.uri:
+        raise ValueError(f"MONGODB_URI not found in .env file at {env_path} and no --uri given")
+    collection = MongoClient(args.uri)["MyParliament"]["HansardDocument"]
+
+    if args.once:
+        result = flag_documents(collection)
+        print(json.dumps({k: round(v, 2) if isinstance(v, float) else v for k, v in result.items()}))
+        return
+
+    try:
+        watch(collection, args.resume_file, batch_size=args.batch_size)
+    except KeyboardInterrupt:
+        print("Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+CPATF token filtering per segment: cpatf.ipynb's ``process_segment`` (a
+redundancy window rebuilt for every token) and ``process_long_segment``
+(2,000-token chunks with 200 tokens of overlap) versus
+pipeline_common.cpatf.TokenScorer.
+
+Segments are cut from hansard_fixture sittings at lengths from a few dozen
+tokens to well past the chunking limit. fastText is not involved: the
+language indicator is a cached stand-in (alphabetic words, minus a fixed
+quarter of them by CRC) so both sides pay the same for it.
+
+Checks:
+- ``filter_segment(max_chars=6000)`` keeps exactly what ``process_segment``
+  keeps, on every segment;
+- ``filter_segment`` equals the notebook's per-token scoring run over the
+  whole segment, with no cut, on every segment;
+- how many segments ``process_long_segment`` filtered differently (its
+  chunks and every segment over 6,000 characters went through the cut) and
+  how many kept tokens it lost.
+
+Usage:
+    python benchmarks/bench_cpatf.py
+    python benchmarks/bench_cpatf.py --segments 400 --max-tokens 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_pattern_analysis import TITLES
+from hansard_fixture import synthetic_hansard
+from pipeline_common.cpatf import (CONTENT_POS_TAGS, REDUNDANCY_WINDOW, THRESHOLD, W_LANG, W_POS, W_RED,
+                                   TokenScorer, is_attendance_list, rule_based_pos, simple_malay_stem)
+
+HONORIFICS = {t.lower() for t in TITLES}
+
+
+@lru_cache(maxsize=30000)
+def lang_indicator(token):
+    return 1 if token.isalpha() and zlib.crc32(token.encode("utf-8")) % 4 else 0
+
+
+def get_redundancy_penalty(tokens, idx):
+    start = max(0, idx - REDUNDANCY_WINDOW // 2)
+    end = min(len(tokens), idx + REDUNDANCY_WINDOW // 2 + 1)
+    counts = Counter(t for t in (tok.lower() for tok in tokens[start:end]) if t in HONORIFICS)
+    repeated = sum(c - 1 for c in counts.values())
+    return min(repeated * 0.15, 0.4)
+
+
+def notebook_tokens(words):
+    # cpatf.ipynb's per-token loop
+    pos_tags = [rule_based_pos(word) for word in words]
+    retained = []
+    for idx, word in enumerate(words):
+        lang_ind = lang_indicator(word)
+        pos_ind = 1 if pos_tags[idx] in CONTENT_POS_TAGS else 0
+        red_pen = get_redundancy_penalty(words, idx)
+        score = W_LANG * lang_ind + W_POS * pos_ind - W_RED * red_pen
+        force_retain = pos_tags[idx] == 'PROPN' or pos_tags[idx] == 'NUM' or len(word) > 8
+        if force_retain or score >= THRESHOLD:
+            word_lower = word.lower()
+            retained.append(simple_malay_stem(word_lower) if lang_ind == 1 and not word[0].isupper() else word_lower)
+    return retained
+
+
+def process_segment(segment, max_chars=6000):
+    if isinstance(segment, list):
+        segment = " ".join([s.strip() for s in segment if s.strip()])
+    if not segment or not segment.strip() or is_attendance_list(segment):
+        return ""
+    if max_chars is not None:
+        segment = segment[:max_chars]
+    return " ".join(notebook_tokens(segment.split()))
+
+
+def process_long_segment(segment, max_chunk_tokens=2000):
+    words = segment.split()
+    total_tokens = len(words)
+    if total_tokens <= max_chunk_tokens:
+        return process_segment(segment)
+    retained_words = []
+    overlap = 200
+    start = 0
+    while start < total_tokens:
+        end = min(start + max_chunk_tokens, total_tokens)
+        chunk_words = process_segment(" ".join(words[start:end])).split()
+        if chunk_words:
+            if retained_words and chunk_words[:50] == retained_words[-50:]:
+                retained_words.extend(chunk_words[50:])
+            else:
+                retained_words.extend(chunk_words)
+        start = end - overlap if end < total_tokens else end
+    return " ".join(retained_words)
+
+
+def synthetic_segments(rng, count, max_tokens):
+    # Speech bodies from fixture sittings, with the honorific runs of real debate
+    words = synthetic_hansard(max_tokens * 12, seed=rng.randrange(1000)).split("DOA", 1)[-1].split()
+    titles = sorted(TITLES)
+    segments = []
+    for _ in range(count):
+        length = min(int(rng.expovariate(1 / 900)) + 20, max_tokens)
+        start = rng.randrange(max(1, len(words) - length))
+        segment = words[start:start + length]
+        for _ in range(length // 25):
+            segment.insert(rng.randrange(len(segment) + 1), rng.choice(titles).split()[0])
+        segments.append(" ".join(segment))
+    return segments
+
+
+def timed(fn, items):
+    lang_indicator.cache_clear()
+    start = time.perf_counter()
+    results = [fn(item) for item in items]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=200, help="segments to filter")
+    parser.add_argument("--max-tokens", type=int, default=12000, help="longest segment, in tokens")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    segments = synthetic_segments(rng, args.segments, args.max_tokens)
+    scorer = TokenScorer(HONORIFICS, lang_indicator)
+    tokens = sum(len(s.split()) for s in segments)
+    long_segments = [s for s in segments if len(s.split()) > 2000]
+    print(f"{len(segments)} segments, {tokens} tokens, {len(long_segments)} over 2,000 tokens")
+
+    old_short, old_seconds = timed(process_segment, segments)
+    new_short, new_seconds = timed(lambda s: scorer.filter_segment(s, max_chars=6000), segments)
+    print(f"  process_segment (6,000-char cut)   notebook {old_seconds:6.2f} s   TokenScorer {new_seconds:6.2f} s"
+          f"  ({old_seconds / new_seconds:.1f}x)  same tokens: {old_short == new_short}")
+
+    old_long, old_long_seconds = timed(process_long_segment, segments)
+    new_long, new_long_seconds = timed(scorer.filter_segment, segments)
+    print(f"  process_long_segment               notebook {old_long_seconds:6.2f} s   TokenScorer {new_long_seconds:6.2f} s"
+          f"  ({old_long_seconds / new_long_seconds:.1f}x)")
+
+    reference = [process_segment(s, max_chars=None) for s in segments]
+    print(f"  TokenScorer == per-token scoring of the whole segment: {new_long == reference}")
+    changed = [(old, new) for old, new in zip(old_long, new_long) if old != new]
+    lost = sum(len(new.split()) - len(old.split()) for old, new in changed)
+    print(f"  segments process_long_segment cut or stitched differently: {len(changed)} ({lost} kept tokens missing)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Pages per second of the old full BeautifulSoup parse versus pipeline_common.html_extract,
+for MP profile pages and parliament archive term pages.
+
+Usage:
+    python benchmarks/bench_html_extract.py
+    python benchmarks/bench_html_extract.py --input-dir saved_pages/   # profile-*.html, archive-*.html
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bs4 import BeautifulSoup
+from html_fixture import load_pages
+from pipeline_common.html_extract import PARSER, archive_member_lists, parse_profile_page
+
+
+def legacy_profile(content):
+    # The three extraction methods of scrape_mp_profile, as they were
+    soup = BeautifulSoup(content, 'html.parser')
+    key_values = []
+    for table in soup.find_all('table'):
+        for row in table.find_all('tr'):
+            cells = row.find_all(['td', 'th'])
+            if len(cells) >= 2:
+                key_values.append((cells[0].get_text(strip=True), cells[1].get_text(strip=True)))
+    for section in soup.find_all(['div', 'section'], class_=re.compile(r'info|profile|detail')):
+        labels = section.find_all(['label', 'span', 'div'], string=re.compile(r'Nama|Jawatan|Parti|Parlimen|Kawasan|Negeri|Telefon|Faks|Email|Alamat'))
+        for label in labels:
+            value_element = label.find_next_sibling() or label.parent.find_next_sibling()
+            if value_element:
+                key_values.append((label.get_text(strip=True), value_element.get_text(strip=True)))
+    page_text = soup.get_text()
+    patterns = {
+        'name': r'Nama\s*([^Jawatan]+?)(?=Jawatan|$)',
+        'position_parliament': r'Jawatan dalam Parlimen\s*([^Jawatan]+?)(?=Jawatan dalam Kabinet|Parti|$)',
+        'position_cabinet': r'Jawatan dalam Kabinet\s*([^Parti]+?)(?=Parti|$)',
+        'party': r'Parti\s*([^Tempat]+?)(?=Tempat|$)',
+        'seat': r'Tempat Duduk\s*([^Parlimen]+?)(?=Parlimen|$)',
+        'parliament_code': r'Parlimen\s*([^Kawasan]+?)(?=Kawasan|$)',
+        'constituency': r'Kawasan\s*([^Negeri]+?)(?=Negeri|$)',
+        'state': r'Negeri\s*([^No\.\s*Telefon]+?)(?=No\.\s*Telefon|$)',
+        'phone': r'No\.\s*Telefon\s*([^No\.\s*Faks]+?)(?=No\.\s*Faks|$)',
+        'fax': r'No\.\s*Faks\s*([^Email]+?)(?=Email|$)',
+        'email': r'Email\s*([^Alamat]+?)(?=Alamat|$)',
+        'address': r'Alamat Surat-menyurat\s*(.+?)(?=\n|$)'
+    }
+    text_fields = {}
+    for field, pattern in patterns.items():
+        match = re.search(pattern, page_text, re.DOTALL | re.IGNORECASE)
+        if match and match.group(1).strip():
+            text_fields[field] = match.group(1).strip()
+    picture = None
+    for img in soup.find_all('img', src=True):
+        src = img.get('src')
+        if src and ('profile' in src.lower() or 'mp' in src.lower() or 'ahli' in src.lower()):
+            picture = src
+            break
+    return key_values, text_fields, picture
+
+
+def new_profile(content):
+    page = parse_profile_page(content)
+    return page.key_values, page.text_fields, page.picture_src
+
+
+def legacy_archive(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    return [li.get_text(strip=True)
+            for ul in soup.find_all('ul', class_='list tiles member-of-parliament')
+            for li in ul.find_all('li')]
+
+
+def new_archive(content):
+    return [li.get_text(strip=True) for ul in archive_member_lists(content) for li in ul.find_all('li')]
+
+
+def timed(label, fn, pages, repeat):
+    best = float("inf")
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(page) for page in pages]
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:34} {best * 1000:9.1f} ms  {len(pages) / best:8.1f} pages/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input-dir", help="directory of saved profile-*.html / archive-*.html pages")
+    parser.add_argument("--profiles", type=int, default=50, help="synthetic profile pages")
+    parser.add_argument("--archives", type=int, default=3, help="synthetic archive pages")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    profiles, archives = load_pages(args.input_dir, args.profiles, args.archives)
+    print(f"Parser backend: {PARSER}")
+
+    if profiles:
+        size = sum(len(p) for p in profiles) / len(profiles) / 1000
+        print(f"MP profile pages ({len(profiles)} pages, {size:.0f} KB avg):")
+        old = timed("legacy html.parser, 3 methods", legacy_profile, profiles, args.repeat)
+        new = timed("html_extract.parse_profile_page", new_profile, profiles, args.repeat)
+        print(f"  identical output: {old == new}")
+
+    if archives:
+        size = sum(len(p) for p in archives) / len(archives) / 1000
+        print(f"Archive term pages ({len(archives)} pages, {size:.0f} KB avg):")
+        old = timed("legacy full html.parser", legacy_archive, archives, args.repeat)
+        new = timed("html_extract.archive_member_lists", new_archive, archives, args.repeat)
+        print(f"  identical output: {old == new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Per-pair 98% rule checks versus the vectorised name-gate matrix of
+pipeline_common.mp_matching, on a synthetic identity set and parliament term.
+
+Checks that every pair passing the matcher's mandatory rules (gender, first
+name 98%+, last name 95%+; scored with difflib like fuzzywuzzy without
+python-Levenshtein, and with rounded InDel like python-Levenshtein) is kept
+by the gate matrix, and that the one-to-one assignment is the same however
+the term's names are ordered.
+
+Usage:
+    python benchmarks/bench_mp_matching.py
+    python benchmarks/bench_mp_matching.py --stored 5000 --term 222
+"""
+
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from rapidfuzz import fuzz
+from pipeline_common.mp_matching import assign_one_to_one, gated_pairs
+
+FIRST = ["Ahmad", "Mohd", "Muhammad", "Mohamad", "Siti", "Nurul", "Abdul", "Lim", "Tan", "Lee", "Wong",
+         "Kulasegaran", "Gobind", "Hannah", "Fadillah", "Anwar", "Rafizi", "Zahid", "Ismail", "Wan"]
+LAST = ["Ibrahim", "Hassan", "Razak", "Aziz", "Rahman", "Ismail", "Yusof", "Hamidi", "Guan Eng",
+        "Kit Siang", "Singh Deo", "Yeoh", "Abdullah", "Othman", "Sabri", "Ramli", "Karim"]
+CONNECTORS = ["bin", "binti", "a/l", "a/p", "anak", "", ""]
+GENDER = {"bin": "male", "a/l": "male", "binti": "female", "a/p": "female"}
+
+
+def identity(name):
+    # The fields of AdvancedMPMatcher.extract_core_identity the rules use
+    words = name.split()
+    connector = next((w.lower() for w in words if w.lower() in GENDER or w.lower() == "anak"), "")
+    return {"first_name": words[0], "last_name": words[-1], "gender": GENDER.get(connector, "")}
+
+
+def random_name(rng):
+    connector = rng.choice(CONNECTORS)
+    middle = [rng.choice(FIRST)] if rng.random() < 0.3 else []
+    return " ".join([rng.choice(FIRST)] + middle + ([connector] if connector else []) + [rng.choice(LAST)])
+
+
+def variant(rng, name):
+    roll = rng.random()
+    if roll < 0.5:
+        return name
+    if roll < 0.7:
+        return name.upper()
+    if roll < 0.85:  # typo in the last name
+        words = name.split()
+        last = list(words[-1])
+        last[rng.randrange(len(last))] = rng.choice("aeiou")
+        return " ".join(words[:-1] + ["".join(last)])
+    return random_name(rng)
+
+
+def difflib_ratio(a, b):
+    return int(round(100 * difflib.SequenceMatcher(None, a, b).ratio()))
+
+
+def indel_ratio(a, b):
+    return int(round(fuzz.ratio(a, b)))
+
+
+def passes_rules(q, c, ratio):
+    if q["gender"] and c["gender"] and q["gender"] != c["gender"]:
+        return False
+    return (ratio(q["first_name"].lower(), c["first_name"].lower()) >= 98 and
+            ratio(q["last_name"].lower(), c["last_name"].lower()) >= 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stored", type=int, default=3000, help="stored MP identities")
+    parser.add_argument("--term", type=int, default=222, help="scraped names in the term")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    stored = [random_name(rng) for _ in range(args.stored)]
+    term = [variant(rng, rng.choice(stored)) for _ in range(args.term)]
+    stored_ids = [identity(n) for n in stored]
+    term_ids = [identity(n) for n in term]
+    print(f"{len(term)} scraped names x {len(stored)} stored identities")
+
+    reference = {}
+    for label, ratio in (("difflib", difflib_ratio), ("InDel", indel_ratio)):
+        start = time.perf_counter()
+        reference[label] = {(q, c) for q, qi in enumerate(term_ids) for c, ci in enumerate(stored_ids)
+                             if passes_rules(qi, ci, ratio)}
+        print(f"  per-pair rules ({label:7}) {time.perf_counter() - start:8.3f} s  {len(reference[label])} pairs")
+
+    start = time.perf_counter()
+    gated = set(gated_pairs(term_ids, stored_ids))
+    print(f"  name_gate_matrix (cdist)  {time.perf_counter() - start:8.3f} s  {len(gated)} pairs")
+    for label, pairs in reference.items():
+        print(f"  keeps every {label} rule pair: {pairs <= gated}")
+
+    # One-to-one assignment on a simple full-name score, under shuffled page order
+    def assignment(order):
+        position = {q: i for i, q in enumerate(order)}
+        scored = [(fuzz.ratio(term[q].lower(), stored[c].lower()) + 2 * (term[q][-1] == stored[c][-1]),
+                   position[q], c) for q, c in gated]
+        tie_key = lambda q, c: (term[order[q]], stored[c], c)
+        return {order[q]: c for q, (c, _) in assign_one_to_one(scored, 98, tie_key).items()}
+
+    baseline = assignment(list(range(len(term))))
+    stable = True
+    for _ in range(5):
+        order = list(range(len(term)))
+        rng.shuffle(order)
+        stable &= assignment(order) == baseline
+    print(f"  {len(baseline)} one-to-one matches, same under shuffled term order: {stable}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Per-document time of the pattern analyzer's hot paths before and after the
+precompiled matchers in pipeline_common.pattern_analysis: speaker-line
+detection (one regex per honorific per line before, a first-word index now),
+honorific counting in ``_analyze_patterns`` and the language marker counts
+(eight lower-cased copies and ``findall``s before, one pass now).
+
+Checks that speaker lines and pattern discoveries are identical.
+
+Usage:
+    python benchmarks/bench_pattern_analysis.py                  # 3 synthetic ~1 MB sittings
+    python benchmarks/bench_pattern_analysis.py --docs 5 --size 4000000
+    python benchmarks/bench_pattern_analysis.py --input dumped_full_text.txt
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hansard_fixture import load_text, synthetic_hansard
+from pipeline_common.pattern_analysis import CombinedParliamentaryAnalyzer
+
+# honorific_dictionary style titles, with the case and punctuation variants it holds
+TITLES = [
+    "Tun", "Tan Sri", "Tan Seri", "Tengku", "Tunku", "Tuanku", "Raja", "Pengiran", "Dato'", "Dato",
+    "Datuk", "Dato' Seri", "Dato Seri", "Dato' Sri", "Datuk Seri", "Datuk Sri", "Datuk Patinggi",
+    "Datin", "Datin Paduka", "Yang Berhormat", "YB", "Yang Amat Berhormat", "YAB",
+    "Yang di-Pertua", "Tuan Yang di-Pertua", "Timbalan Yang di-Pertua", "Menteri", "Timbalan Menteri",
+    "Dr.", "Dr", "Prof.", "Prof", "Ir.", "Ts.", "Haji", "Hajah", "Hj.", "Hjh.", "Sheikh", "Syeikh",
+    "Ustaz", "Ustazah", "Kapten", "Mejar", "Kolonel", "Jeneral", "Laksamana", "Tuan", "Puan", "Cik",
+    "Encik", "Enche'", "Enche", "Mr.", "Mr", "Mrs.", "Madam", "Speaker", "Mr. Speaker", "Wakil",
+]
+HONORIFICS = {title: title for title in TITLES + [t.upper() for t in TITLES] + [t.lower() for t in TITLES]}
+
+
+class LegacyAnalyzer(CombinedParliamentaryAnalyzer):
+    """The analyzer's hot paths as they were before the precompiled matchers."""
+
+    def _analyze_patterns(self, decade: str, txt: str):
+        lines = txt.split('\n')
+        for line in lines[:25]:
+            line = line.strip()
+            if not line: continue
+            if self._is_header(line):
+                self.pattern_discoveries['decade_headers'][decade][line] += 1
+        for line in self._extract_speakers(txt)[:15]:
+            for raw, std in self.honorific_dict.items():
+                if re.search(rf'\b{re.escape(raw)}\b', line, re.I):
+                    self.pattern_discoveries['honorific_variations'][decade][std] += 1
+        self._analyze_language(txt, decade)
+
+    def _extract_speakers(self, txt: str, limit=None) -> List[str]:
+        lines = txt.split('\n')
+        speaker_lines = []
+        for line in lines:
+            line = line.strip()
+            if not line or len(line) > 250 or line.startswith('('): continue
+            if ':' not in line: continue
+            if any(re.search(rf'\b{re.escape(raw)}\b', line, re.I) for raw in self.honorific_dict.keys()):
+                speaker_lines.append(line)
+        return speaker_lines
+
+    def _analyze_language(self, txt: str, decade: str):
+        malay = sum(len(re.findall(rf'\b{w}\b', txt.lower())) for w in ['yang','dan','adalah','akan'])
+        eng = sum(len(re.findall(rf'\b{w}\b', txt.lower())) for w in ['the','and','is','with'])
+        total = malay + eng
+        if total > 10:
+            if malay > eng * 1.5:
+                self.pattern_discoveries['language_code_switching'][decade]['malay'] += 1
+            elif eng > malay * 1.5:
+                self.pattern_discoveries['language_code_switching'][decade]['english'] += 1
+            else:
+                self.pattern_discoveries['language_code_switching'][decade]['mixed'] += 1
+
+
+def per_doc(fn, texts):
+    start = time.perf_counter()
+    results = [fn(text) for text in texts]
+    return (time.perf_counter() - start) / len(texts), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="text file to use as the sitting")
+    parser.add_argument("--docs", type=int, default=3, help="synthetic sittings")
+    parser.add_argument("--size", type=int, default=1_000_000, help="characters per synthetic sitting")
+    args = parser.parse_args()
+
+    texts = [load_text(args.input)] if args.input else \
+        [synthetic_hansard(args.size, seed=seed) for seed in range(args.docs)]
+    print(f"{len(texts)} sitting(s), {sum(map(len, texts)) / len(texts) / 1e6:.1f} MB each, "
+          f"{len(HONORIFICS)} honorifics")
+
+    legacy, current = LegacyAnalyzer(HONORIFICS), CombinedParliamentaryAnalyzer(HONORIFICS)
+    checks = []
+    for label, method in (("_extract_speakers", lambda a: a._extract_speakers),
+                          ("_analyze_language", lambda a: lambda t: a._analyze_language(t, "1990s")),
+                          ("_analyze_patterns", lambda a: lambda t: a._analyze_patterns("1990s", t))):
+        before, old = per_doc(method(legacy), texts)
+        after, new = per_doc(method(current), texts)
+        print(f"  {label:18} {before * 1000:10.1f} ms/doc -> {after * 1000:8.1f} ms/doc  ({before / after:5.1f}x)")
+        checks.append(old == new)
+
+    same = json.dumps(legacy.pattern_discoveries, sort_keys=True) == \
+        json.dumps(current.pattern_discoveries, sort_keys=True)
+    print(f"  identical speaker lines and pattern discoveries: {all(checks) and same}")
+
+
+if __name__ == "__main__":
+    main()
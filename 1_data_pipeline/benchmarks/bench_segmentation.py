@@ -0,0 +1,84 @@
+"""
+Segmentation throughput over a stream of sittings: the notebook's
+20-thread ``ThreadPoolExecutor`` versus pipeline_common.segmentation's
+process-pool engine (``segment_stream``) at increasing worker counts.
+
+Sittings come from hansard_fixture and MPs are synthetic, with the fixture's
+speakers among them, all sitting in the 14th parliament. No database is
+involved: this measures the CPU side that ``run_segmentation`` spreads over
+processes. Checks that every configuration produces the same records.
+
+Usage:
+    python benchmarks/bench_segmentation.py
+    python benchmarks/bench_segmentation.py --docs 64 --size 400000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_mp_matching import random_name
+from bench_pattern_analysis import TITLES
+from hansard_fixture import SPEAKERS, synthetic_hansard
+from pipeline_common.segmentation import Segmenter, segment_stream
+from pipeline_common.tenure import TenureIndex
+
+HONORIFICS = {t.rstrip("'") for t in TITLES} | {"Yang Berhormat", "Timbalan Yang di-Pertua", "Enche'", "Mr."}
+
+
+def synthetic_mps(rng, count):
+    names = [re.sub(r"\s*\[.*\]", "", speaker) for speaker in SPEAKERS]
+    names += [random_name(rng) for _ in range(count - len(names))]
+    return [{"full_name_with_titles": name, "parliamentary_history": [{"term_number": 14}]} for name in names]
+
+
+def thread_pool_run(docs, segmenter):
+    # segmentation.ipynb before: every document submitted at once, 20 threads
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        futures = [executor.submit(segmenter.segmented_record, doc) for doc in docs]
+        return [future.result() for future in as_completed(futures)]
+
+
+def by_id(records):
+    return sorted((r for r in records if r), key=lambda r: r["original_id"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=24, help="sittings")
+    parser.add_argument("--size", type=int, default=200_000, help="characters per sitting")
+    parser.add_argument("--mps", type=int, default=250, help="MPs in the term")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="process counts to try")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    mps = synthetic_mps(rng, args.mps)
+    docs = [{"_id": f"doc{i:04}", "hansardDate": datetime(2019, 3, 1 + i % 28), "full_text": synthetic_hansard(args.size, seed=i)}
+            for i in range(args.docs)]
+    print(f"{args.docs} sittings x {args.size / 1e3:.0f}k chars, {len(mps)} MPs, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    expected = by_id(thread_pool_run(docs, Segmenter(HONORIFICS, TenureIndex(mps))))
+    baseline = time.perf_counter() - start
+    print(f"  {'ThreadPoolExecutor(20)':36} {args.docs / baseline:7.2f} docs/s")
+    print(f"  segments per sitting: {sum(r['segment_count'] for r in expected) / len(expected):.0f}")
+
+    for workers in [0] + args.workers:
+        start = time.perf_counter()
+        records = by_id(record for _, record, _ in segment_stream(iter(docs), HONORIFICS, mps, workers=workers))
+        seconds = time.perf_counter() - start
+        label = "in process" if workers == 0 else f"{workers} worker process{'es' if workers > 1 else ''}"
+        print(f"  {'segment_stream, ' + label:36} {args.docs / seconds:7.2f} docs/s  ({baseline / seconds:.1f}x)"
+              f"  same records: {records == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Speaker-tag resolution throughput: one ``extractOne`` over every MP name per
+candidate (as segmentation did) versus pipeline_common.speakers.SpeakerResolver
+(exact-name fast path, LRU cache, batched ``cdist`` for new tags).
+
+Candidates follow a sitting's shape: a few hundred distinct tags, a handful
+of which (the chair, ministers) make up most lines, with OCR noise on some.
+The baseline uses fuzzywuzzy when it is installed, rapidfuzz's ``extractOne``
+otherwise. Checks that both pick the same MP for every candidate.
+
+Then compares an uncached lookup against every MP with one against the
+members of the sitting's parliament only (pipeline_common.tenure), on a
+synthetic 15-term membership.
+
+Usage:
+    python benchmarks/bench_speaker_resolution.py
+    python benchmarks/bench_speaker_resolution.py --mps 3000 --lines 20000 --docs 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_mp_matching import random_name
+from pipeline_common.speakers import MIN_SPEAKER_SCORE, DatedSpeakerResolver, SpeakerResolver, normalize_speaker
+from pipeline_common.tenure import TenureIndex
+
+TITLES = ["Tuan", "Puan", "Dato'", "Dato' Seri", "Datuk", "Tan Sri", "Dr.", "Yang Berhormat", "Enche'"]
+
+try:
+    from fuzzywuzzy import process as fuzzy_process
+    BASELINE = "fuzzywuzzy extractOne"
+
+    def baseline_extract(candidate, names):
+        return fuzzy_process.extractOne(candidate, names)
+except ImportError:
+    from rapidfuzz import fuzz, process, utils
+    BASELINE = "rapidfuzz extractOne"
+
+    def baseline_extract(candidate, names):
+        # fuzzywuzzy's defaults: WRatio on default-processed strings, integer score
+        best_match, score, _ = process.extractOne(candidate, names, scorer=fuzz.WRatio,
+                                                  processor=utils.default_process)
+        return best_match, int(round(score))
+
+
+def baseline_match(candidate, names):
+    best_match, score = baseline_extract(candidate, names)
+    return best_match if score > MIN_SPEAKER_SCORE else None
+
+
+def noisy(rng, text):
+    if rng.random() < 0.97:
+        return text
+    chars = list(text)
+    chars[rng.randrange(len(chars))] = rng.choice("ilo1 ")
+    return "".join(chars)
+
+
+def sitting_candidates(rng, names, lines):
+    # Zipf-like: the first few speakers dominate, the rest speak a few times
+    speakers = rng.sample(names, 250)
+    weights = [1 / (rank + 1) for rank in range(len(speakers))]
+    tags = [f"{rng.choice(TITLES)} {name}" if rng.random() < 0.5 else name for name in speakers]
+    return [noisy(rng, tag) for tag in rng.choices(tags, weights, k=lines)] + ["Tuan Yang di-Pertua"] * (lines // 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mps", type=int, default=3000, help="MP names to match against")
+    parser.add_argument("--lines", type=int, default=5000, help="speaker-tag candidates per sitting")
+    parser.add_argument("--docs", type=int, default=3, help="sittings")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = list(dict.fromkeys(random_name(rng) for _ in range(args.mps)))
+    docs = [sitting_candidates(rng, names, args.lines) for _ in range(args.docs)]
+    total = sum(map(len, docs))
+    print(f"{args.docs} sittings x {args.lines} candidates against {len(names)} MP names")
+
+    start = time.perf_counter()
+    expected = [baseline_match(candidate, names) for doc in docs for candidate in doc]
+    before = time.perf_counter() - start
+    print(f"  {BASELINE:24} {total / before:10.0f} candidates/s")
+
+    resolver = SpeakerResolver(names)
+    start = time.perf_counter()
+    resolved = []
+    for doc in docs:
+        resolver.prime(doc)
+        resolved.extend(resolver.match(candidate) for candidate in doc)
+    after = time.perf_counter() - start
+    print(f"  {'SpeakerResolver':24} {total / after:10.0f} candidates/s  ({before / after:.0f}x)")
+    print(f"  {resolver.stats()}")
+
+    same = sum(a == b for a, b in zip(expected, resolved))
+    print(f"  same MP for {same}/{total} candidates")
+
+    # Date-aware candidates: each MP serves 1-3 consecutive terms; one 10th-parliament sitting
+    mps = []
+    for name in names:
+        first = rng.randint(1, 15)
+        terms = range(first, min(15, first + rng.randint(0, 2)) + 1)
+        mps.append({"full_name_with_titles": name, "parliamentary_history": [{"term_number": t} for t in terms]})
+    tenure = TenureIndex(mps)
+    sitting_date = "2001-03-12"
+    members = tenure.names_on(sitting_date)
+    keys = list(dict.fromkeys(normalize_speaker(c) for c in sitting_candidates(rng, list(members), args.lines)))
+    timings = {}
+    for label, resolver in (("all MPs", SpeakerResolver(names)),
+                            ("term 10 only", DatedSpeakerResolver(tenure).for_date(sitting_date))):
+        start = time.perf_counter()
+        matches = [resolver.match(key) for key in keys]
+        timings[label] = (time.perf_counter() - start) / len(keys)
+        outside = sum(1 for match in matches if match and match not in members)
+        print(f"  uncached lookup, {label:13} {len(resolver.names):5} names  "
+              f"{timings[label] * 1e6:8.1f} us  matches outside the term: {outside}")
+    print(f"  tenure index: {timings['all MPs'] / timings['term 10 only']:.0f}x cheaper per lookup")
+
+
+if __name__ == "__main__":
+    main()
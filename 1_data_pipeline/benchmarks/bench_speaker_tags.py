@@ -0,0 +1,160 @@
+"""
+Speaker-tag extraction per document: segmentation's three regexes
+(PRIMARY_PATTERN with the honorific trie alternation, FALLBACK_PATTERN,
+ENGLISH_OLD_PATTERN) versus pipeline_common.speaker_tags.SpeakerTagLexer,
+reported for the slowest documents.
+
+The current regexes do less work than they should (see below), so the
+greedy-name versions are timed too.
+
+Checks run on every line:
+- the lexer returns exactly what the regexes return once their name groups
+  are greedy (what they were written to capture);
+- the lexer fires the same grammars with the same honorific as the current
+  lazy regexes, which only kept the first one or two letters of each name
+  (counted separately).
+
+Usage:
+    python benchmarks/bench_speaker_tags.py                    # 12 synthetic sittings
+    python benchmarks/bench_speaker_tags.py --docs 30 --top 5
+    python benchmarks/bench_speaker_tags.py --input-dir dumped_texts/
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_pattern_analysis import TITLES
+from hansard_fixture import synthetic_hansard
+from pipeline_common.honorifics import trie_regex
+from pipeline_common.speaker_tags import SpeakerTagLexer
+from pipeline_common.textnorm import iter_content_lines
+
+BASE_HONORIFICS = {t.rstrip("'") for t in TITLES + [t.upper() for t in TITLES]}
+BASE_HONORIFICS.update(["Yang Berhormat", "Timbalan Yang di-Pertua", "Enche'", "Mr."])
+STYLES = ["Dato'", "Datuk", "Dato' Sri", "Datuk Seri", "Tan Sri", "Tun", "Haji", "Hajah", "Dr.", "Ir.", "Prof.",
+          "Panglima", "Wira", "Kapten", "Mejar", "Ustaz", "Tuan", "Puan"]
+
+
+def honorific_dictionary(rng, size):
+    # The scraped honorific document lists compound styles ("Tan Sri Dato' Haji") besides the base titles
+    titles = set(BASE_HONORIFICS)
+    while len(titles) < size:
+        titles.add(" ".join(rng.sample(STYLES, rng.randint(2, 4))))
+    return titles
+
+
+def patterns(honorifics, lazy):
+    q = "?" if lazy else ""
+    honorific_regex = trie_regex(honorifics, ignore_case=True)
+    return (
+        re.compile(rf"^({honorific_regex})\s+([A-Za-z'\s]+{q})\s*(\[([A-Za-z\s\-]+)\])?:?\s*", re.IGNORECASE),
+        re.compile(rf"^([A-Z][A-Za-z'\s]+{q})\s*(\[.*?\])?:?\s*", re.IGNORECASE),
+        re.compile(r"^(Mr\.|Encik|Tuan|Enche')\s+([A-Za-z\s]+?):", re.IGNORECASE),
+    )
+
+
+def regex_candidates(line, decade, compiled):
+    # speaker_candidates as segmentation.ipynb had it
+    primary, fallback, english_old = compiled
+    if ':' not in line:
+        return []
+    found = []
+    if decade == "pre1970":
+        m = english_old.match(line)
+        if m:
+            found.append((m.group(1) + " " + m.group(2).strip(), None))
+    m = primary.match(line)
+    if m:
+        found.append((f"{m.group(1).strip()} {m.group(2).strip()}", m.group(4) if m.group(4) else None))
+    m = fallback.match(line)
+    if m:
+        found.append((m.group(1).strip(), m.group(2)[1:-1] if m.group(2) else None))
+    return found
+
+
+def extends(full, truncated):
+    # Same grammars fired, each lexer name starting with the (truncated) current one
+    return len(full) == len(truncated) and all(a.startswith(b) for (a, _), (b, _) in zip(full, truncated))
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def noisy_sitting(rng, size, seed):
+    # Fixture sittings plus English-era tags and colon-bearing prose
+    text = synthetic_hansard(size, seed=seed)
+    extra = [f"{rng.choice(['Mr.', 'Tuan', 'Encik', 'Enche'])} {rng.choice(['Tan Siew Sin', 'Lim Kit Siang', 'V T Sambanthan'])}: "
+             f"{rng.choice(['Sir', 'Tuan Speaker'])}, the motion is as follows: one, two." for _ in range(size // 800)]
+    extra += [f"{rng.choice(['Jadual', 'Nota', 'Soalan', 'Masa', 'Jumlah'])}: {rng.randint(1, 99)} perkara "
+              f"dibentangkan pada {rng.randint(1, 28)}.{rng.randint(1, 12)}.1985" for _ in range(size // 800)]
+    lines = text.split("\n")
+    for line in extra:
+        lines.insert(rng.randrange(len(lines)), line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input-dir", help="directory of dumped sitting texts (*.txt)")
+    parser.add_argument("--docs", type=int, default=12, help="synthetic sittings")
+    parser.add_argument("--top", type=int, default=3, help="slowest documents to report")
+    parser.add_argument("--honorifics", type=int, default=600, help="size of the honorific dictionary")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per document (best kept)")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.input_dir:
+        docs = [(name, open(os.path.join(args.input_dir, name), encoding="utf-8").read())
+                for name in sorted(os.listdir(args.input_dir)) if name.endswith(".txt")]
+    else:
+        docs = [(f"synthetic-{i}", noisy_sitting(rng, rng.choice([200_000, 600_000, 1_500_000]), i))
+                for i in range(args.docs)]
+
+    honorifics = honorific_dictionary(rng, args.honorifics)
+    current, greedy = patterns(honorifics, lazy=True), patterns(honorifics, lazy=False)
+    lexer = SpeakerTagLexer(honorifics)
+    rows = []
+    mismatches = grammar_mismatches = truncated = tagged = 0
+    for name, text in docs:
+        lines = list(iter_content_lines(text.splitlines()))
+        decade = rng.choice(["pre1970", "post1970"])
+
+        old, old_seconds = best_of(args.repeat, lambda: [regex_candidates(line, decade, current) for line in lines])
+        new, new_seconds = best_of(args.repeat, lambda: [lexer.candidates(line, decade) for line in lines])
+
+        reference, greedy_seconds = best_of(args.repeat, lambda: [regex_candidates(line, decade, greedy) for line in lines])
+        mismatches += sum(a != b for a, b in zip(new, reference))
+        grammar_mismatches += sum(not extends(a, b) for a, b in zip(new, old))
+        truncated += sum(a != b for a, b in zip(new, old))
+        tagged += sum(1 for c in new if c)
+        rows.append((old_seconds, new_seconds, greedy_seconds, name, len(lines), len(text)))
+
+    rows.sort(reverse=True)
+    print(f"{len(docs)} documents, {len(honorifics)} honorifics; slowest {args.top} under the current regexes:")
+    for old_seconds, new_seconds, greedy_seconds, name, n_lines, n_chars in rows[:args.top]:
+        print(f"  {name:14} {n_chars / 1e6:5.1f} MB {n_lines:7} lines  regexes {old_seconds * 1000:7.1f} ms"
+              f"  greedy regexes {greedy_seconds * 1000:7.1f} ms  lexer {new_seconds * 1000:7.1f} ms")
+    total_old, total_new, total_greedy = (sum(r[i] for r in rows) for i in range(3))
+    print(f"  all documents: regexes {total_old:.2f} s, greedy regexes {total_greedy:.2f} s, lexer {total_new:.2f} s")
+    print(f"  lines with candidates: {tagged}")
+    print(f"  lexer == greedy-name regexes on every line: {mismatches == 0} ({mismatches} differ)")
+    print(f"  same grammars as the current regexes, names extending theirs: "
+          f"{grammar_mismatches == 0} ({grammar_mismatches} differ)")
+    print(f"  lines whose candidates were truncated names under the current regexes: {truncated}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Throughput of the shared text normaliser versus the old per-stage regex chains.
+
+Usage:
+    python benchmarks/bench_textnorm.py                # ~4 MB synthetic sitting
+    python benchmarks/bench_textnorm.py --size 16000000
+    python benchmarks/bench_textnorm.py --input dumped_ocr_text.txt
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hansard_fixture import load_text
+from pipeline_common.textnorm import clean_ocr_text, iter_content_lines, ocr_normalizer
+
+
+def legacy_clean_text(text):
+    text = text.replace('\t', ' ')
+    text = re.sub(r'[ \t]{2,}', ' ', text)
+    text = re.sub(r'(\w+)-\n(\w+)', r'\1\2', text)
+    text = re.sub(r'(?<![.!?:;])\n(?=\w)', ' ', text)
+    text = re.sub(r'\s*\|\s*', ' | ', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def legacy_clean_line(line):
+    line = re.sub(r'\s+', ' ', line.strip())
+    if not line or re.match(r'^[\d\W]+$', line):
+        return None
+    return line
+
+
+def legacy_lines(text):
+    return [legacy_clean_line(l) for l in text.splitlines() if legacy_clean_line(l)]
+
+
+def timed(label, fn, size, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:32} {best * 1000:9.1f} ms  {size / best / 1e6:8.1f} MB/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="text file to normalise instead of the synthetic sitting")
+    parser.add_argument("--size", type=int, default=4_000_000, help="synthetic text size in characters")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = load_text(args.input, args.size)
+    size = len(text.encode("utf-8"))
+    print(f"Input: {size / 1e6:.1f} MB")
+
+    print("OCR cleaning:")
+    old = timed("legacy 6-pass clean_text", lambda: legacy_clean_text(text), size, args.repeat)
+    new = timed("textnorm.clean_ocr_text", lambda: clean_ocr_text(text), size, args.repeat)
+    streamed = timed("textnorm stream (1 MB chunks)",
+                     lambda: "".join(ocr_normalizer.normalize_stream(text.splitlines(keepends=True))),
+                     size, args.repeat)
+    print(f"  identical output: {old == new == streamed}")
+
+    print("Segmentation line cleaning:")
+    old = timed("legacy clean_line (x2 per line)", lambda: legacy_lines(text), size, args.repeat)
+    new = timed("textnorm.iter_content_lines", lambda: list(iter_content_lines(text.splitlines())), size, args.repeat)
+    print(f"  identical output: {old == new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Windowed concurrent Vision OCR versus the old one-request-per-document call,
+run against the local Vision stub.
+
+Usage:
+    python benchmarks/bench_vision.py
+    python benchmarks/bench_vision.py --docs 4 --pages 60 --latency 0.5 --in-flight 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from vision_stub import fake_pdf, page_text, start_stub
+from pipeline_common.vision_client import RestVisionClient, ocr_pdf
+
+
+def legacy_ocr(client, pdf_bytes, page_count):
+    # One request for the whole file, as before: Vision answers the first 5 pages only
+    batch = client.annotate_pages(pdf_bytes, list(range(1, page_count + 1)))
+    return [batch.pages[p] for p in sorted(batch.pages)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=40, help="pages per document")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub seconds per request")
+    parser.add_argument("--in-flight", type=int, default=8)
+    args = parser.parse_args()
+
+    server, url, state = start_stub(latency=args.latency)
+    client = RestVisionClient(url, ["en", "ms"])
+    pdf = fake_pdf(args.pages)
+    expected = [page_text(p) for p in range(1, args.pages + 1)]
+    print(f"{args.docs} documents x {args.pages} pages, {args.latency * 1000:.0f} ms per request")
+
+    start = time.perf_counter()
+    for _ in range(args.docs):
+        old = legacy_ocr(client, pdf, args.pages)
+    elapsed = time.perf_counter() - start
+    print(f"  legacy single request     {elapsed:7.2f} s  pages returned: {len(old)}/{args.pages}")
+
+    for in_flight in (1, args.in_flight):
+        state.peak_in_flight = 0
+        with ThreadPoolExecutor(max_workers=in_flight) as pool:
+            start = time.perf_counter()
+            for _ in range(args.docs):
+                new = ocr_pdf(client, pdf, pool)
+            elapsed = time.perf_counter() - start
+        label = f"windowed, {in_flight} in flight"
+        print(f"  {label:25} {elapsed:7.2f} s  pages returned: {len(new)}/{args.pages}  "
+              f"in order: {new == expected}  peak in flight: {state.peak_in_flight}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
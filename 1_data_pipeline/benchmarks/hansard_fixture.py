@@ -0,0 +1,69 @@
+"""
+Synthetic Hansard text for benchmarks.
+
+The real corpus lives in MongoDB, so benchmarks default to generated sittings
+that mimic OCR layout output: speaker tags, bracketed constituencies, hyphenated
+line breaks, table pipes, tabs and blank-line runs. Pass ``--input`` to any
+benchmark to run it on a dumped document instead.
+"""
+
+import random
+
+SPEAKERS = [
+    "Tuan Yang di-Pertua",
+    "Dato' Seri Anwar bin Ibrahim [Tambun]",
+    "Tuan Lim Guan Eng [Bagan]",
+    "Datuk Seri Haji Fadillah bin Haji Yusof [Petra Jaya]",
+    "Puan Hannah Yeoh Tseow Suan [Segambut]",
+    "Enche' Tan Siew Sin [Melaka Tengah]",
+    "Mr. Speaker",
+    "Dr. Kelly bin Dahlan [Ulu Sebuai]",
+]
+
+WORDS = (
+    "yang berhormat kerajaan rakyat dewan parlimen soalan jawapan menteri "
+    "pembangunan ekonomi pendidikan kesihatan negeri projek peruntukan "
+    "the government minister house question answer development budget "
+    "bill amendment committee report policy dan akan adalah dengan untuk "
+    "daripada kepada mengenai telah sudah belum juga ini itu tersebut"
+).split()
+
+
+def synthetic_hansard(size_chars: int = 4_000_000, seed: int = 42) -> str:
+    """Return roughly ``size_chars`` characters of OCR-style sitting text."""
+    rng = random.Random(seed)
+    out = [
+        "DEWAN RAKYAT\nPARLIMEN KELIMA BELAS\nPENGGAL KEDUA\nMESYUARAT PERTAMA\n\n\n",
+        "KEHADIRAN AHLI-AHLI\n",
+    ]
+    for i in range(1, 60):
+        out.append(f"{i}. {rng.choice(SPEAKERS)}\n")
+    out.append("\nDOA\n\n")
+    total = sum(len(s) for s in out)
+    while total < size_chars:
+        speaker = rng.choice(SPEAKERS)
+        lines = [f"{speaker}: "]
+        for _ in range(rng.randint(3, 25)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 14))]
+            roll = rng.random()
+            if roll < 0.15:
+                words[-1] = words[-1][:3] + "-\n" + words[-1][3:]
+            elif roll < 0.20:
+                words.insert(rng.randrange(len(words)), "|")
+            elif roll < 0.25:
+                words.insert(rng.randrange(len(words)), "\t ")
+            sep = rng.choice([".\n", "\n", "\n", ",\n", "  \n", "\n\n\n"])
+            lines.append(" ".join(words) + sep)
+        if rng.random() < 0.1:
+            lines.append(f"{rng.randint(1, 400)}\n")
+        block = "".join(lines) + "\n"
+        out.append(block)
+        total += len(block)
+    return "".join(out)
+
+
+def load_text(path: str = None, size_chars: int = 4_000_000) -> str:
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    return synthetic_hansard(size_chars)
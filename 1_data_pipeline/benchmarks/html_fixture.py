@@ -0,0 +1,88 @@
+"""
+Synthetic parliament website pages for the HTML extraction benchmark.
+
+Pages follow the layout the scrapers expect: a profile page with the
+label/value table, an info panel and the usual header/footer/script noise, and
+an archive term page with the ``list tiles member-of-parliament`` tiles. Saved
+real pages can be used instead: ``profile-*.html`` and ``archive-*.html``
+files in a directory passed as ``--input-dir``.
+"""
+
+import random
+from pathlib import Path
+
+from hansard_fixture import SPEAKERS, WORDS
+
+PARTIES = ["PH", "BN", "PN", "GPS", "GRS", "WARISAN", "BEBAS"]
+STATES = ["Perak", "Selangor", "Johor", "Sabah", "Sarawak", "Kedah", "Pulau Pinang"]
+
+
+def _noise(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _page(rng, body: str) -> str:
+    menu = "".join(f'<li class="item-{i}"><a href="/menu-{i}.html">{_noise(rng, 2).title()}</a>'
+                   f'<ul class="sub">{"".join(f"<li><a href=/s{i}-{j}.html>{_noise(rng, 3)}</a></li>" for j in range(8))}</ul></li>'
+                   for i in range(14))
+    script = "\n".join(f"var v{i} = '{_noise(rng, 6)}'; function f{i}(a) {{ return a + v{i}; }}" for i in range(120))
+    footer = "".join(f'<div class="footer-col"><h4>{_noise(rng, 2)}</h4><p>{_noise(rng, 40)}</p></div>' for _ in range(6))
+    return (
+        '<!DOCTYPE html>\n<html lang="ms"><head><meta charset="utf-8"><title>Parlimen Malaysia</title>'
+        f'<style>.menu li {{ float: left; }} .footer-col {{ width: 16%; }}</style><script>{script}</script></head>\n'
+        f'<body><div id="header"><ul class="menu">{menu}</ul></div>\n'
+        f'<div id="content">{body}</div>\n'
+        f'<!-- footer -->\n<div id="footer">{footer}</div></body></html>\n'
+    )
+
+
+def profile_page(mp_id: int, seed: int = 7) -> str:
+    rng = random.Random(seed * 100_003 + mp_id)
+    name = rng.choice(SPEAKERS).split(" [")[0]
+    rows = [
+        ("Nama", name),
+        ("Jawatan dalam Parlimen", "Ahli Parlimen"),
+        ("Jawatan dalam Kabinet", rng.choice(["Menteri Kewangan", "Timbalan Menteri", ""])),
+        ("Parti", rng.choice(PARTIES)),
+        ("Tempat Duduk", str(rng.randint(1, 222))),
+        ("Parlimen", f"P{rng.randint(1, 222):03d}"),
+        ("Kawasan", _noise(rng, 2).title()),
+        ("Negeri", rng.choice(STATES)),
+        ("No. Telefon", f"03-{rng.randint(1000000, 9999999)}"),
+        ("No. Faks", f"03-{rng.randint(1000000, 9999999)}"),
+        ("Email", f"mp{mp_id}@parlimen.gov.my"),
+        ("Alamat Surat-menyurat", f"{_noise(rng, 6).title()}, Kuala Lumpur"),
+    ]
+    table = "".join(f"<tr><td>{k}</td><td>{v}</td></tr>" for k, v in rows)
+    panel = "".join(f'<div><span>{k}</span><span>{v}</span></div>' for k, v in rows[3:6])
+    body = (
+        f'<div class="profile-box"><img src="/images/webuser/ahli/2022/mp{mp_id}.jpg" alt="{name}">'
+        f'<table class="table">{table}</table></div>\n'
+        f'<div class="info-panel">{panel}</div>\n'
+        f'<div class="news">{"".join(f"<p>{_noise(rng, 50)}</p>" for _ in range(20))}</div>'
+    )
+    return _page(rng, body)
+
+
+def archive_page(term: int, members: int = 222, seed: int = 7) -> str:
+    rng = random.Random(seed * 1_000_003 + term)
+    tiles = "".join(
+        f'<li><div class="tile"><a href="profile-ahli.html?uweb=dr&amp;id={4000 + i}">'
+        f'{rng.choice(SPEAKERS).split(" [")[0]}</a>'
+        f'<div class="constituency">P{i + 1:03d} {_noise(rng, 2).title()}</div>'
+        f'<div class="province">{rng.choice(STATES)}</div>'
+        f'<div class="caucus">{rng.choice(PARTIES)}</div></div></li>'
+        for i in range(members)
+    )
+    body = f'<h2>Parlimen ke-{term}</h2><ul class="list tiles member-of-parliament">{tiles}</ul>'
+    return _page(rng, body)
+
+
+def load_pages(input_dir: str = None, profiles: int = 50, archives: int = 3):
+    """(profile pages, archive pages) as bytes, from ``input_dir`` or generated."""
+    if input_dir:
+        root = Path(input_dir)
+        return ([p.read_bytes() for p in sorted(root.glob("profile-*.html"))],
+                [p.read_bytes() for p in sorted(root.glob("archive-*.html"))])
+    return ([profile_page(i).encode("utf-8") for i in range(profiles)],
+            [archive_page(13 + i).encode("utf-8") for i in range(archives)])
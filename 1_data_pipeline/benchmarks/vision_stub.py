@@ -0,0 +1,111 @@
+"""
+Local stand-in for the Google Vision ``files:annotate`` endpoint.
+
+Answers the same JSON as the REST API with deterministic synthetic text per
+page after a fixed latency, and like the real service returns at most 5 pages
+per request. Page counts are read from ``/Type /Page`` objects in the posted
+PDF, so ``fake_pdf(n)`` is enough to drive it.
+
+Usage:
+    python benchmarks/vision_stub.py --port 8765 --latency 0.5
+    VISION_ENDPOINT=http://127.0.0.1:8765/v1/files:annotate python 01_scraping/ocr/googlevision_ocr.py
+"""
+
+import argparse
+import base64
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from hansard_fixture import synthetic_hansard
+
+MAX_PAGES_PER_REQUEST = 5
+_PAGE_OBJECT = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+def fake_pdf(page_count: int) -> bytes:
+    """Bytes that the stub treats as a PDF with ``page_count`` pages."""
+    body = b"".join(b"%d 0 obj << /Type /Page >> endobj\n" % (i + 3) for i in range(page_count))
+    return b"%PDF-1.4\n" + body + b"%%EOF\n"
+
+
+def page_text(page_no: int) -> str:
+    return f"[page {page_no}]\n" + synthetic_hansard(1500, seed=page_no)
+
+
+class StubState:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.pages = 0
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            with state.lock:
+                state.in_flight += 1
+                state.requests += 1
+                state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length))["requests"][0]
+                pdf = base64.b64decode(request["inputConfig"]["content"])
+                total = len(_PAGE_OBJECT.findall(pdf))
+                wanted = request.get("pages") or list(range(1, total + 1))
+                wanted = [p for p in wanted if 1 <= p <= total][:MAX_PAGES_PER_REQUEST]
+                time.sleep(state.latency)
+                with state.lock:
+                    state.pages += len(wanted)
+                body = {"responses": [{
+                    "responses": [{"fullTextAnnotation": {"text": page_text(p)},
+                                   "context": {"pageNumber": p}} for p in wanted],
+                    "totalPages": total,
+                }]}
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+    return Handler
+
+
+def start_stub(port: int = 0, latency: float = 0.2):
+    """Serve in a background thread; returns (server, endpoint URL, state)."""
+    state = StubState(latency)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/files:annotate"
+    return server, url, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per request")
+    args = parser.parse_args()
+
+    server, url, _ = start_stub(args.port, args.latency)
+    print(f"Vision stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
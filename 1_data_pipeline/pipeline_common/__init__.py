@@ -0,0 +1 @@
+"""Helpers shared by the data pipeline scripts and notebooks."""
@@ -0,0 +1,175 @@
+"""
+CPATF token filtering (Code-switched Parliament-Aware Token Filtering).
+
+``cpatf.ipynb`` scores every token of a speech segment
+
+    W_LANG * language indicator + W_POS * content-POS indicator - W_RED * redundancy penalty
+
+and keeps it if the score reaches ``THRESHOLD`` or the token is forced (a
+proper noun, a number, or longer than 8 characters). The redundancy penalty
+is ``min(0.15 * repeats, 0.4)``, where repeats counts the honorifics that
+occur again within the ``REDUNDANCY_WINDOW`` tokens centred on the token.
+
+The notebook rebuilt that window for every token: 15 lower-cased tokens in a
+``Counter`` (before that, ``window.count(h)`` for every honorific).
+Segments over 2,000 tokens were split into chunks that overlapped by 200
+tokens, and the chunks were stitched back together by comparing 50 tokens.
+Each chunk also went through ``process_segment``'s 6,000-character cut, so
+most of every long chunk was dropped. ``TokenScorer`` does three things
+instead:
+
+- It slides one multiset of the window's honorifics along the segment. Each
+  step adds the token that enters and removes the one that leaves, so the
+  repeat count costs O(1) per token (``repeated_honorifics``).
+- It works out the language, POS, forced flag and normalised form once per
+  distinct token. It then combines them with the penalties for all positions
+  at once, as numpy arrays when numpy is installed.
+- It scores a segment of any length in one pass. Every window is the one the
+  whole segment gives, so nothing needs stitching.
+
+The scores use the same floating-point operations as the notebook. For any
+segment it used to score in one piece, the kept tokens are unchanged.
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:  # optional speed-up
+    HAVE_NUMPY = False
+
+W_LANG = 0.30
+W_POS = 0.30
+W_RED = 0.15
+THRESHOLD = 0.40
+REDUNDANCY_WINDOW = 15
+REPEAT_PENALTY = 0.15  # per repeated honorific in the window
+MAX_PENALTY = 0.4
+
+CONTENT_POS_TAGS = frozenset({'NOUN', 'PROPN', 'VERB', 'ADJ', 'ADV', 'NUM'})
+MALAY_SUFFIXES = ('kan', 'an', 'i', 'lah', 'kah', 'nya', 'tah', 'pun', 'mu', 'ku')
+VERB_SUFFIXES = ('kan', 'i', 'lah', 'nya', 'tah')
+
+ATTENDANCE_DOT_PATTERN = re.compile(r'(\.\s+[A-Z][a-z]+){5,}')
+ATTENDANCE_NUM_PATTERN = re.compile(r'^\d+\.', re.MULTILINE)
+_LEADING_DIGIT = re.compile(r'^\d')
+
+
+def is_attendance_list(text: str) -> bool:
+    return bool(ATTENDANCE_DOT_PATTERN.search(text) or len(ATTENDANCE_NUM_PATTERN.findall(text)) > 5)
+
+
+def simple_malay_stem(word: str) -> str:
+    word_lower = word.lower()
+    if len(word_lower) <= 4:
+        return word_lower
+    for suffix in MALAY_SUFFIXES:
+        if word_lower.endswith(suffix):
+            return word_lower[:-len(suffix)]
+    return word_lower
+
+
+def rule_based_pos(word: str) -> str:
+    if word and word[0].isupper():
+        return 'PROPN'
+    if word.isdigit() or _LEADING_DIGIT.match(word):
+        return 'NUM'
+    if word.lower().endswith(VERB_SUFFIXES):
+        return 'VERB'
+    return 'NOUN'
+
+
+def repeated_honorifics(keys: Sequence[Optional[str]], window: int = REDUNDANCY_WINDOW) -> List[int]:
+    """Honorifics repeated within the window around each position.
+
+    ``keys`` holds the lower-cased honorific at each position and None
+    elsewhere. The window of position ``i`` is ``keys[i - window // 2 :
+    i + window // 2 + 1]``, clipped to the segment. Each value is the sum
+    of (count - 1) over the distinct honorifics in that window.
+    """
+    half = window // 2
+    n = len(keys)
+    counts: Dict[str, int] = {}
+    repeated = 0
+    result = []
+    # Position i's window gains keys[i + half] and loses keys[i - half - 1]
+    for i in range(-half, n):
+        if i + half < n:
+            key = keys[i + half]
+            if key is not None:
+                count = counts.get(key, 0)
+                repeated += count > 0
+                counts[key] = count + 1
+        if i - half - 1 >= 0:
+            key = keys[i - half - 1]
+            if key is not None:
+                count = counts[key]
+                repeated -= count > 1
+                counts[key] = count - 1
+        if i >= 0:
+            result.append(repeated)
+    return result
+
+
+class TokenScorer:
+    """CPATF's keep/drop decision and normalised form for every token of a segment."""
+
+    def __init__(self, honorifics: Iterable[str], lang_indicator: Callable[[str], int],
+                 w_lang: float = W_LANG, w_pos: float = W_POS, w_red: float = W_RED,
+                 threshold: float = THRESHOLD, window: int = REDUNDANCY_WINDOW):
+        self.honorifics = frozenset(h.lower() for h in honorifics)
+        self.lang_indicator = lang_indicator
+        self.w_lang = w_lang
+        self.w_pos = w_pos
+        self.w_red = w_red
+        self.threshold = threshold
+        self.window = window
+
+    def token_features(self, word: str) -> Tuple[float, bool, str]:
+        """(score before the redundancy penalty, forced, normalised form) for ``word``."""
+        lang_ind = self.lang_indicator(word)
+        pos = rule_based_pos(word)
+        base = self.w_lang * lang_ind + self.w_pos * (1 if pos in CONTENT_POS_TAGS else 0)
+        forced = pos == 'PROPN' or pos == 'NUM' or len(word) > 8
+        word_lower = word.lower()
+        normalized = simple_malay_stem(word_lower) if lang_ind == 1 and not word[0].isupper() else word_lower
+        return base, forced, normalized
+
+    def retained(self, words: Sequence[str]) -> List[str]:
+        """Normalised forms of the tokens of ``words`` that CPATF keeps, in order."""
+        distinct: Dict[str, int] = {}
+        inverse = [distinct.setdefault(word, len(distinct)) for word in words]
+        features = [self.token_features(word) for word in distinct]
+        honorific = [word.lower() if word.lower() in self.honorifics else None for word in distinct]
+        repeated = repeated_honorifics([honorific[i] for i in inverse], self.window)
+
+        if HAVE_NUMPY and inverse:
+            at = np.array(inverse)
+            base = np.array([f[0] for f in features])[at]
+            forced = np.array([f[1] for f in features])[at]
+            penalty = np.minimum(np.array(repeated) * REPEAT_PENALTY, MAX_PENALTY)
+            kept = np.flatnonzero(forced | (base - self.w_red * penalty >= self.threshold)).tolist()
+        else:
+            kept = [position for position, (i, repeats) in enumerate(zip(inverse, repeated))
+                    if features[i][1]
+                    or features[i][0] - self.w_red * min(repeats * REPEAT_PENALTY, MAX_PENALTY) >= self.threshold]
+        return [features[inverse[position]][2] for position in kept]
+
+    def filter_segment(self, segment: Union[str, List[str]], max_chars: Optional[int] = None) -> str:
+        """The kept tokens of ``segment``, space-joined; '' for empty segments and attendance lists.
+
+        A list segment is joined with single spaces after dropping blank
+        items. Whitespace inside an item is kept, so line starts still
+        count for ``ATTENDANCE_NUM_PATTERN``.
+        ``max_chars`` cuts the segment before tokenising, as the notebook's
+        ``process_segment`` does at 6,000 characters.
+        """
+        if isinstance(segment, list):
+            segment = " ".join([s.strip() for s in segment if s.strip()])
+        if not segment or not segment.strip() or is_attendance_list(segment):
+            return ""
+        if max_chars is not None:
+            segment = segment[:max_chars]
+        return " ".join(self.retained(segment.split()))
@@ -0,0 +1,130 @@
+"""
+Sampling metadata for HansardDocument: ``scrapMethod``, ``docLength``,
+``decade`` and ``wordCount``.
+
+Shared by ``docsCat_flagging.ipynb`` (one-off catch-up pass) and
+``02_sampling/flag_watcher.py`` (keeps the flags current from a change
+stream). Both read documents through ``FLAG_PROJECTION`` so only
+``content_text`` and a few small fields cross the wire; ``ocr_text`` is
+reduced to a ``has_ocr_text`` boolean on the server.
+
+``count_words`` counts ``\\w+`` runs with ``finditer`` instead of building a
+lower-cased copy of the text and a list of every word, so memory stays
+constant however long the sitting is. It matches the old
+``len(re.findall(r'\\b\\w+\\b', text.lower()))`` except for the rare
+characters whose lower-case form adds a combining mark.
+"""
+
+import re
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+FLAG_FIELDS = ('scrapMethod', 'docLength', 'decade')
+
+# Fields whose changes can change the flags
+SOURCE_FIELDS = ('content_text', 'ocr_text', 'low_ocr_resol', 'hansardDate')
+
+# Aggregation stage projecting a document down to what compute_flags reads
+# (plus the current flags, so unchanged documents are not rewritten)
+FLAG_PROJECTION = {
+    'content_text': 1,
+    'hansardDate': 1,
+    'low_ocr_resol': 1,
+    'has_ocr_text': {'$ne': [{'$type': '$ocr_text'}, 'missing']},
+    'scrapMethod': 1,
+    'docLength': 1,
+    'decade': 1,
+    'wordCount': 1,
+}
+
+UNFLAGGED_QUERY = {'$or': [{field: {'$exists': False}} for field in FLAG_FIELDS]}
+
+_WORD = re.compile(r'\w+')
+
+
+def count_words(text) -> int:
+    """Number of words (``\\w+`` runs) in ``text``, in constant memory."""
+    if not text or not isinstance(text, str):
+        return 0
+    count = 0
+    for _ in _WORD.finditer(text):
+        count += 1
+    return count
+
+
+def determine_scrap_method(doc: Dict) -> str:
+    """pdfplumber (no OCR text), googlevision (OCR re-solved) or tesseract.
+
+    Accepts a full document or one projected with ``FLAG_PROJECTION``.
+    """
+    has_ocr_text = doc['has_ocr_text'] if 'has_ocr_text' in doc else 'ocr_text' in doc
+    if not has_ocr_text:
+        return 'pdfplumber'
+    if doc.get('low_ocr_resol') == 'solved':
+        return 'googlevision'
+    return 'tesseract'
+
+
+def categorize_doc_length(word_count: int) -> str:
+    """short: <2,000 words, medium: 2,000-10,000, long: >10,000."""
+    if word_count < 2000:
+        return 'short'
+    elif word_count <= 10000:
+        return 'medium'
+    return 'long'
+
+
+def extract_decade(hansard_date) -> str:
+    """'1980s' style decade of a datetime or 'YYYY-MM-DD...' string; 'unknown' if unparsable."""
+    try:
+        if isinstance(hansard_date, str):
+            hansard_date = datetime.strptime(hansard_date[:10], '%Y-%m-%d')
+        return f"{(hansard_date.year // 10) * 10}s"
+    except (AttributeError, TypeError, ValueError):
+        return 'unknown'
+
+
+def compute_flags(doc: Dict, now: Optional[datetime] = None) -> Dict:
+    """The ``$set`` of sampling metadata for one document."""
+    word_count = count_words(doc.get('content_text', ''))
+    return {
+        'scrapMethod': determine_scrap_method(doc),
+        'docLength': categorize_doc_length(word_count),
+        'decade': extract_decade(doc.get('hansardDate')),
+        'wordCount': word_count,
+        'flagged_timestamp': now or datetime.now(),
+    }
+
+
+def flags_changed(doc: Dict, flags: Dict) -> bool:
+    """True if ``doc`` does not already carry ``flags`` (timestamp ignored)."""
+    return any(doc.get(field) != flags[field] for field in FLAG_FIELDS + ('wordCount',))
+
+
+def flag_documents(collection, query: Optional[Dict] = None, batch_size: int = 500) -> Dict:
+    """Flag every document matching ``query`` (default: unflagged ones).
+
+    Streams projected documents from an aggregation cursor and writes one
+    unordered ``bulk_write`` per ``batch_size`` changed documents.
+    """
+    from pymongo import UpdateOne
+
+    start = time.time()
+    counts = {'scanned': 0, 'updated': 0, 'unchanged': 0}
+    operations = []
+    pipeline = [{'$match': UNFLAGGED_QUERY if query is None else query}, {'$project': FLAG_PROJECTION}]
+    for doc in collection.aggregate(pipeline, batchSize=batch_size):
+        counts['scanned'] += 1
+        flags = compute_flags(doc)
+        if not flags_changed(doc, flags):
+            counts['unchanged'] += 1
+            continue
+        operations.append(UpdateOne({'_id': doc['_id']}, {'$set': flags}))
+        if len(operations) >= batch_size:
+            counts['updated'] += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        counts['updated'] += collection.bulk_write(operations, ordered=False).modified_count
+    counts['processing_time'] = time.time() - start
+    return counts
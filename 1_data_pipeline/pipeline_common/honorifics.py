@@ -0,0 +1,207 @@
+"""
+One honorific lexicon for the scrapers, segmentation and CPATF.
+
+Titles come from the ``honorific_dictionary`` collection (or are added as the
+MP scraper discovers them) and are compiled once:
+
+- a token trie, so ``extract``/``strip`` walk a name once instead of running
+  one regex per known honorific;
+- ``trie_regex``, a prefix-factored alternation for embedding the lexicon in
+  a larger regex (segmentation's speaker pattern) without the engine trying
+  every title at every position;
+- precompiled keyword rules for ``categorize_honorific``.
+
+Tokens are compared case-insensitively, with curly apostrophes straightened
+and surrounding ``(),.'"`` removed, so "Dato'", "DATO" and "(Dato)" are the
+same title. A bare "Tan" is never treated as an honorific on its own because
+it is also a common surname; "Tan Sri" still is.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+HONORIFIC_CATEGORIES = (
+    'royal_noble_titles',
+    'datuk_titles',
+    'parliamentary_titles',
+    'professional_titles',
+    'religious_titles',
+    'military_titles',
+    'gender_titles',
+    'regional_titles',
+)
+
+AMBIGUOUS_STANDALONE = frozenset({'tan'})
+
+_END = object()  # trie terminal marker; cannot equal a token or character key, even ""
+_TOKEN_PUNCT = "(),.'\""
+
+
+def normalize_token(token: str) -> str:
+    return token.replace('’', "'").strip(_TOKEN_PUNCT).lower()
+
+
+def _tokens(text: str) -> List[str]:
+    return text.replace('’', "'").split()
+
+
+def trie_regex(strings: Iterable[str], ignore_case: bool = False) -> str:
+    """Regex source matching exactly ``strings``, factored on shared prefixes.
+
+    Longer matches are tried first, like an alternation sorted by length. With
+    ``ignore_case`` the strings are lower-cased first; compile the result with
+    ``re.IGNORECASE``.
+    """
+    root: Dict = {}
+    for s in strings:
+        if ignore_case:
+            s = s.lower()
+        node = root
+        for ch in s:
+            node = node.setdefault(ch, {})
+        node[_END] = True
+    return _node_regex(root)
+
+
+def _node_regex(node: Dict) -> str:
+    branches = [re.escape(ch) + _node_regex(child)
+                for ch, child in sorted((ch, child) for ch, child in node.items() if ch is not _END)]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if _END in node:
+        return "(?:" + body + ")?"
+    return body
+
+
+# Keyword rules for categorising a title; the first category that matches wins.
+# "contains" rules match anywhere in the title, "exact" rules the whole title.
+_CATEGORY_RULES = (
+    ('royal_noble_titles', 'contains',
+     ['yab', 'yang amat berhormat', 'tan sri', 'tan seri', 'tun', 'tengku', 'tunku', 'tuanku']),
+    ('datuk_titles', 'contains',
+     ["dato", "dato'", "datuk", "dato seri", "dato' seri", "dato sri", "dato' sri", "datuk seri", "datuk sri"]),
+    ('parliamentary_titles', 'exact', ['yb', 'yang berhormat']),
+    ('professional_titles', 'exact', ['ir', 'ir.', 'ts', 'ts.', 'dr', 'dr.', 'prof', 'prof.']),
+    ('religious_titles', 'contains',
+     ['haji', 'hajah', 'sheikh', 'syeikh', 'ustaz', 'ustazah', 'hajjah', 'hj.']),
+    ('military_titles', 'contains',
+     ['kapten', 'komander', 'general', 'admiral', 'colonel', 'major', 'brigadier']),
+    ('gender_titles', 'exact', ['tuan', 'puan', 'encik', 'cik']),
+    ('regional_titles', 'contains', ['panglima', 'wira', 'indera', 'paduka', 'utama']),
+)
+
+_CATEGORY_MATCHERS = [
+    (category, re.compile(trie_regex(keywords)).search if mode == 'contains' else frozenset(keywords).__contains__)
+    for category, mode, keywords in _CATEGORY_RULES
+]
+
+
+def categorize_honorific(title: str) -> Optional[str]:
+    """Category name for one title, or None if no rule applies."""
+    title_lower = title.lower().replace('’', "'")
+    for category, matches in _CATEGORY_MATCHERS:
+        if matches(title_lower):
+            return category
+    return None
+
+
+class HonorificLexicon:
+    """Compiled set of honorific titles with trie-based name matching."""
+
+    def __init__(self, titles: Iterable[str] = (), exclude: Iterable[str] = AMBIGUOUS_STANDALONE):
+        self.titles = set()
+        self._exclude = frozenset(exclude)
+        self._trie: Dict = {}
+        for title in titles:
+            self.add(title)
+
+    @classmethod
+    def from_document(cls, honorific_doc: Optional[Dict], extra: Iterable[str] = (), **kwargs) -> "HonorificLexicon":
+        """Build from an ``honorific_dictionary`` document (``{"categories": {...}}``)."""
+        titles = []
+        if honorific_doc:
+            for category_titles in honorific_doc.get('categories', {}).values():
+                if isinstance(category_titles, list):
+                    titles.extend(category_titles)
+        titles.extend(extra)
+        return cls(titles, **kwargs)
+
+    @classmethod
+    def from_collection(cls, collection, query: Optional[Dict] = None, extra: Iterable[str] = (),
+                        **kwargs) -> "HonorificLexicon":
+        return cls.from_document(collection.find_one(query or {}), extra, **kwargs)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self.titles
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def add(self, title: str):
+        """Add one title; the trie is updated in place, nothing is recompiled."""
+        title = title.strip()
+        if not title or title in self.titles:
+            return
+        self.titles.add(title)
+        key = [t for t in (normalize_token(tok) for tok in _tokens(title)) if t]
+        if not key or (len(key) == 1 and key[0] in self._exclude):
+            return
+        node = self._trie
+        for token in key:
+            node = node.setdefault(token, {})
+        node.setdefault(_END, title)
+
+    def _longest_at(self, keys: List[str], start: int) -> Tuple[int, Optional[str]]:
+        node = self._trie
+        best_len, best_title = 0, None
+        for i in range(start, len(keys)):
+            node = node.get(keys[i])
+            if node is None:
+                break
+            if _END in node:
+                best_len, best_title = i - start + 1, node[_END]
+        return best_len, best_title
+
+    def split(self, name: str) -> Tuple[List[str], List[str]]:
+        """(honorifics found, remaining tokens) of ``name``, longest title first at each position."""
+        tokens = _tokens(name)
+        keys = [normalize_token(t) for t in tokens]
+        found, rest = [], []
+        i = 0
+        while i < len(tokens):
+            length, title = self._longest_at(keys, i)
+            if length:
+                found.append(title)
+                i += length
+            else:
+                rest.append(tokens[i])
+                i += 1
+        return found, rest
+
+    def extract(self, name: str) -> List[str]:
+        """Known honorifics in ``name``, in order of appearance."""
+        return self.split(name)[0]
+
+    def strip(self, name: str) -> Tuple[str, List[str]]:
+        """``name`` without its known honorifics, plus the honorifics removed."""
+        found, rest = self.split(name)
+        return " ".join(rest), found
+
+    def is_title_token(self, token: str) -> bool:
+        """True if ``token`` alone is a complete honorific."""
+        node = self._trie.get(normalize_token(token))
+        return node is not None and _END in node
+
+    def pattern(self, ignore_case: bool = True) -> str:
+        """Prefix-factored regex source for the titles as written."""
+        return trie_regex(self.titles, ignore_case=ignore_case)
+
+    def categorize(self, titles: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """Titles grouped by category (all known titles by default)."""
+        categorized = {category: [] for category in HONORIFIC_CATEGORIES}
+        for title in (self.titles if titles is None else titles):
+            category = categorize_honorific(title)
+            if category:
+                categorized[category].append(title)
+        return categorized
@@ -0,0 +1,218 @@
+"""
+Targeted HTML extraction for the parliament website scrapers.
+
+Profile pages (``mp_and_honorific.py``) are parsed with ``lxml.html`` and read
+through precompiled XPath selectors and precompiled label regexes, instead of
+building a full BeautifulSoup tree and walking every table and div. The output
+is the same key/value pairs, text-pattern captures and picture URL the old
+three-method BeautifulSoup walk produced, so the scraper's field mapping is
+unchanged.
+
+Archive term pages (``history_mp_honorific.py``) keep BeautifulSoup because
+``extract_mp_from_html`` works on its elements, but are first parsed with a
+``SoupStrainer`` that keeps only the member-list ``<ul>`` containers, on the
+lxml backend. The full page is only parsed when that container is missing
+(older archive layouts).
+
+lxml is optional: without it everything falls back to ``html.parser``.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer, UnicodeDammit
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - depends on the environment
+    lxml = None
+
+PARSER = "lxml" if lxml is not None else "html.parser"
+
+# ============================================================================
+# MP profile pages
+# ============================================================================
+
+# Text patterns for the "Label value" layout of the profile page. Kept exactly
+# as the scraper has always used them; only compiled once here.
+PROFILE_TEXT_PATTERNS = {
+    field_name: re.compile(pattern, re.DOTALL | re.IGNORECASE)
+    for field_name, pattern in {
+        'name': r'Nama\s*([^Jawatan]+?)(?=Jawatan|$)',
+        'position_parliament': r'Jawatan dalam Parlimen\s*([^Jawatan]+?)(?=Jawatan dalam Kabinet|Parti|$)',
+        'position_cabinet': r'Jawatan dalam Kabinet\s*([^Parti]+?)(?=Parti|$)',
+        'party': r'Parti\s*([^Tempat]+?)(?=Tempat|$)',
+        'seat': r'Tempat Duduk\s*([^Parlimen]+?)(?=Parlimen|$)',
+        'parliament_code': r'Parlimen\s*([^Kawasan]+?)(?=Kawasan|$)',
+        'constituency': r'Kawasan\s*([^Negeri]+?)(?=Negeri|$)',
+        'state': r'Negeri\s*([^No\.\s*Telefon]+?)(?=No\.\s*Telefon|$)',
+        'phone': r'No\.\s*Telefon\s*([^No\.\s*Faks]+?)(?=No\.\s*Faks|$)',
+        'fax': r'No\.\s*Faks\s*([^Email]+?)(?=Email|$)',
+        'email': r'Email\s*([^Alamat]+?)(?=Alamat|$)',
+        'address': r'Alamat Surat-menyurat\s*(.+?)(?=\n|$)',
+    }.items()
+}
+
+PROFILE_LABEL = re.compile(r'Nama|Jawatan|Parti|Parlimen|Kawasan|Negeri|Telefon|Faks|Email|Alamat')
+PICTURE_HINTS = ('profile', 'mp', 'ahli')
+
+# Tags whose content BeautifulSoup's get_text() leaves out
+_NON_TEXT_TAGS = frozenset(('script', 'style', 'template'))
+
+if lxml is not None:
+    _REGEX_NS = {'re': 'http://exslt.org/regular-expressions'}
+    _TABLE_ROWS = etree.XPath('//table//tr')
+    _ROW_CELLS = etree.XPath('.//td | .//th')
+    _INFO_SECTIONS = etree.XPath(
+        "//*[(self::div or self::section) and re:test(@class, 'info|profile|detail')]",
+        namespaces=_REGEX_NS)
+    _IMAGES = etree.XPath('//img[@src]')
+
+
+@dataclass
+class ProfilePage:
+    """Raw fields found on one profile page, in the order the scraper applies them."""
+    key_values: List[Tuple[str, str]] = field(default_factory=list)
+    text_fields: Dict[str, str] = field(default_factory=dict)
+    picture_src: Optional[str] = None
+
+
+def _is_element(node) -> bool:
+    return isinstance(node.tag, str)
+
+
+def _strings(el) -> Iterator[str]:
+    # Text nodes under ``el`` as BeautifulSoup sees them for get_text()
+    if el.tag not in _NON_TEXT_TAGS and el.text:
+        yield el.text
+    for child in el:
+        if _is_element(child) and child.tag not in _NON_TEXT_TAGS:
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _text(el, strip: bool = False) -> str:
+    if strip:
+        return "".join(s.strip() for s in _strings(el))
+    return "".join(_strings(el))
+
+
+def _single_string(el) -> Optional[str]:
+    # BeautifulSoup's Tag.string: the only child's text, descending through
+    # elements that have exactly one child
+    children = (1 if el.text else 0) + sum(2 if child.tail else 1 for child in el)
+    if children != 1:
+        return None
+    if el.text:
+        return el.text
+    child = el[0]
+    if not _is_element(child):
+        return child.text
+    return _single_string(child)
+
+
+def _next_element_sibling(el):
+    sibling = el.getnext()
+    while sibling is not None and not _is_element(sibling):
+        sibling = sibling.getnext()
+    return sibling
+
+
+def _decode(content) -> str:
+    if isinstance(content, str):
+        return content
+    return UnicodeDammit(content, is_html=True).unicode_markup
+
+
+def _parse_profile_soup(content) -> ProfilePage:
+    # Same extraction on a BeautifulSoup tree, for environments without lxml
+    soup = BeautifulSoup(content, PARSER)
+    page = ProfilePage()
+    for table in soup.find_all('table'):
+        for row in table.find_all('tr'):
+            cells = row.find_all(['td', 'th'])
+            if len(cells) >= 2:
+                page.key_values.append((cells[0].get_text(strip=True), cells[1].get_text(strip=True)))
+    for section in soup.find_all(['div', 'section'], class_=re.compile(r'info|profile|detail')):
+        for label in section.find_all(['label', 'span', 'div'], string=PROFILE_LABEL):
+            value_element = label.find_next_sibling() or label.parent.find_next_sibling()
+            if value_element:
+                page.key_values.append((label.get_text(strip=True), value_element.get_text(strip=True)))
+    page.text_fields = match_profile_text(soup.get_text())
+    for img in soup.find_all('img', src=True):
+        src = img.get('src')
+        if src and any(hint in src.lower() for hint in PICTURE_HINTS):
+            page.picture_src = src
+            break
+    return page
+
+
+def match_profile_text(page_text: str) -> Dict[str, str]:
+    """Non-empty captures of ``PROFILE_TEXT_PATTERNS`` over the page text."""
+    fields = {}
+    for field_name, pattern in PROFILE_TEXT_PATTERNS.items():
+        match = pattern.search(page_text)
+        if match:
+            value = match.group(1).strip()
+            if value:
+                fields[field_name] = value
+    return fields
+
+
+def parse_profile_page(content) -> ProfilePage:
+    """Extract the profile fields of one ``profile-ahli.html`` page (bytes or str)."""
+    if lxml is None:
+        return _parse_profile_soup(content)
+
+    root = lxml.html.document_fromstring(_decode(content))
+    page = ProfilePage()
+
+    # Method 1: two-cell table rows
+    for row in _TABLE_ROWS(root):
+        cells = _ROW_CELLS(row)
+        if len(cells) >= 2:
+            page.key_values.append((_text(cells[0], strip=True), _text(cells[1], strip=True)))
+
+    # Method 2: labelled elements inside info/profile/detail containers
+    for section in _INFO_SECTIONS(root):
+        for label in section.iterdescendants('label', 'span', 'div'):
+            label_text = _single_string(label)
+            if label_text is None or not PROFILE_LABEL.search(label_text):
+                continue
+            value_element = _next_element_sibling(label)
+            if value_element is None:
+                value_element = _next_element_sibling(label.getparent())
+            if value_element is not None:
+                page.key_values.append((_text(label, strip=True), _text(value_element, strip=True)))
+
+    # Method 3: label patterns over the page text
+    page.text_fields = match_profile_text(_text(root))
+
+    for img in _IMAGES(root):
+        src = img.get('src')
+        if src and any(hint in src.lower() for hint in PICTURE_HINTS):
+            page.picture_src = src
+            break
+    return page
+
+
+# ============================================================================
+# Parliament archive term pages
+# ============================================================================
+
+MEMBER_LIST_CLASS = 'list tiles member-of-parliament'
+_MEMBER_LISTS = SoupStrainer('ul', attrs={'class': MEMBER_LIST_CLASS})
+
+
+def archive_member_lists(content) -> list:
+    """Current-format member ``<ul>`` containers, parsing nothing else of the page."""
+    soup = BeautifulSoup(content, PARSER, parse_only=_MEMBER_LISTS)
+    return soup.find_all('ul', class_=MEMBER_LIST_CLASS)
+
+
+def full_soup(content) -> BeautifulSoup:
+    """Whole-page parse, for the older archive layouts."""
+    return BeautifulSoup(content, PARSER)
@@ -0,0 +1,201 @@
+"""
+On-disk HTTP cache for the parliament website scrapers.
+
+``CachingAdapter`` is mounted on a ``requests.Session`` and answers GET
+requests from a SQLite store (``~/hansard_http_cache/http_cache.sqlite3``,
+next to the OCR cache). Fresh entries, younger than the TTL of the first
+matching ``ttls`` rule, are served without touching the network. Stale
+entries are revalidated with ``If-None-Match``/``If-Modified-Since``, and a
+304 reply serves the stored body.
+
+Modes, also settable with the ``HANSARD_HTTP_CACHE`` environment variable:
+
+- ``online`` (default): serve fresh entries, revalidate stale ones.
+- ``offline``: replay whatever is stored, never use the network; a miss
+  raises ``OfflineCacheMiss``.
+- ``refresh``: revalidate every entry regardless of age.
+- ``off``: bypass the cache entirely.
+
+Rate limiting passed as ``before_network`` only applies to requests that
+really go out, so replaying a scrape from the cache does not wait on it.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DEFAULT_HTTP_CACHE_PATH = Path.home() / "hansard_http_cache" / "http_cache.sqlite3"
+CACHE_MODES = ("online", "offline", "refresh", "off")
+DEFAULT_TTL = 24 * 3600
+
+
+class OfflineCacheMiss(requests.ConnectionError):
+    """Offline mode was asked for a URL that is not in the cache."""
+
+
+class CachedEntry(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    fetched_at: float
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        headers = CaseInsensitiveDict(self.headers)
+        conditional = {}
+        if headers.get("ETag"):
+            conditional["If-None-Match"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            conditional["If-Modified-Since"] = headers["Last-Modified"]
+        return conditional
+
+
+class HttpCache:
+    """URL -> last successful GET response, in SQLite. Safe to share across threads."""
+
+    def __init__(self, path=DEFAULT_HTTP_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_responses (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[CachedEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, fetched_at FROM http_responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, headers, body, fetched_at = row
+        return CachedEntry(status, json.loads(headers), bytes(body), fetched_at)
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_responses VALUES (?, ?, ?, ?, ?)",
+                (url, status, json.dumps(dict(headers)), body, time.time()),
+            )
+            self._conn.commit()
+
+    def touch(self, url: str):
+        """Mark an entry as just revalidated."""
+        with self._lock:
+            self._conn.execute("UPDATE http_responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachingAdapter(HTTPAdapter):
+    """Transport adapter that serves and stores GET responses through ``HttpCache``.
+
+    ``ttls`` is a sequence of (URL regex, seconds); the first rule whose regex
+    matches the URL applies, otherwise ``default_ttl``. Extra keyword
+    arguments go to ``HTTPAdapter`` (e.g. ``pool_maxsize``).
+    """
+
+    def __init__(self, cache: HttpCache, mode: Optional[str] = None,
+                 ttls: Iterable[Tuple[str, float]] = (), default_ttl: float = DEFAULT_TTL,
+                 before_network: Optional[Callable[[str], None]] = None, **adapter_kwargs):
+        super().__init__(**adapter_kwargs)
+        mode = mode or os.getenv("HANSARD_HTTP_CACHE", "online")
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown HTTP cache mode {mode!r}, expected one of {CACHE_MODES}")
+        self.cache = cache
+        self.mode = mode
+        self.ttls = [(re.compile(pattern), seconds) for pattern, seconds in ttls]
+        self.default_ttl = default_ttl
+        self.before_network = before_network
+        self.stats = {"hits": 0, "revalidated": 0, "fetched": 0}
+        self._stats_lock = threading.Lock()
+
+    def ttl_for(self, url: str) -> float:
+        for pattern, seconds in self.ttls:
+            if pattern.search(url):
+                return seconds
+        return self.default_ttl
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _from_cache(self, request, entry: CachedEntry) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry.status
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response._content = entry.body
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.reason = "OK"
+        response.connection = self
+        response.from_cache = True
+        return response
+
+    def _network(self, request, **kwargs) -> requests.Response:
+        if self.before_network:
+            self.before_network(request.url)
+        return super().send(request, **kwargs)
+
+    def send(self, request, **kwargs):
+        if request.method != "GET" or self.mode == "off":
+            return self._network(request, **kwargs)
+
+        url = request.url
+        entry = self.cache.get(url)
+        if self.mode == "offline":
+            if entry is None:
+                raise OfflineCacheMiss(f"Not in HTTP cache (offline mode): {url}", request=request)
+            self._count("hits")
+            return self._from_cache(request, entry)
+
+        if entry is not None and self.mode == "online" and time.time() - entry.fetched_at < self.ttl_for(url):
+            self._count("hits")
+            return self._from_cache(request, entry)
+
+        if entry is not None and entry.validators:
+            request = request.copy()
+            request.headers.update(entry.validators)
+
+        response = self._network(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self.cache.touch(url)
+            self._count("revalidated")
+            return self._from_cache(request, entry)
+        if response.status_code == 200:
+            self.cache.put(url, response.status_code, response.headers, response.content)
+        self._count("fetched")
+        return response
+
+
+def mount_cache(session: requests.Session, cache: Optional[HttpCache] = None, **adapter_kwargs) -> CachingAdapter:
+    """Mount a ``CachingAdapter`` on ``session`` for http and https; returns it."""
+    adapter = CachingAdapter(cache or HttpCache(), **adapter_kwargs)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
@@ -0,0 +1,116 @@
+"""
+Polite concurrent fetching for the parliament website scrapers.
+
+Instead of a fixed ``time.sleep`` before every request, each host gets a token
+bucket: ``rate`` requests per second on average with bursts of up to ``burst``.
+Worker threads block on the bucket, so the request rate stays the same however
+many workers run, while parsing in one worker overlaps with downloads in the
+others.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .http_cache import CachingAdapter, HttpCache
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is free."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """One ``TokenBucket`` per host, created on first use."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """Transport adapter that waits on ``rate_limiter`` before every request."""
+
+    def __init__(self, rate_limiter: Optional[HostRateLimiter] = None, **adapter_kwargs):
+        super().__init__(**adapter_kwargs)
+        self.rate_limiter = rate_limiter
+
+    def send(self, request, **kwargs):
+        if self.rate_limiter:
+            self.rate_limiter.acquire(request.url)
+        return super().send(request, **kwargs)
+
+
+def make_session(pool_size: int = 10, headers: Optional[Dict[str, str]] = None,
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 cache: Optional[HttpCache] = None, **cache_kwargs) -> requests.Session:
+    """A ``requests.Session`` whose connection pool fits ``pool_size`` worker threads.
+
+    ``rate_limiter`` is applied to every request that reaches the network. With
+    ``cache``, GETs go through a ``CachingAdapter`` (``cache_kwargs``: mode,
+    ttls, default_ttl) and cache hits skip the rate limiter.
+    """
+    session = requests.Session()
+    pool = dict(pool_connections=pool_size, pool_maxsize=pool_size)
+    if cache is not None:
+        before_network = rate_limiter.acquire if rate_limiter else None
+        adapter = CachingAdapter(cache, before_network=before_network, **cache_kwargs, **pool)
+    else:
+        adapter = RateLimitedAdapter(rate_limiter, **pool)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def fetch_concurrently(fn: Callable[[T], R], items: Iterable[T],
+                       max_workers: int = 8) -> Iterator[Tuple[T, R]]:
+    """Run ``fn`` over ``items`` on a thread pool, yielding (item, result) as each finishes.
+
+    ``fn`` should fetch and parse one item and handle its own errors; results
+    stream out in completion order so the caller can save while others are
+    still downloading.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,183 @@
+"""
+Shared stage ledger: which documents each pipeline stage still has to process.
+
+Each stage used to work this out on its own: segmentation built a ``$nin``
+of every processed ``ObjectId``, CPATF loaded every ``parent_doc_id`` into a
+set, ``flag_messDoc.py`` reset every document, and the OCR scripts filtered
+on whether ``ocr_text`` exists (so a changed input was never redone). Every
+resume cost a pass over the corpus. ``StageLedger`` keeps one small entry
+per (stage, document) in ``LEDGER_COLLECTION``:
+
+    doc_id, stage, status, version, input_fingerprint, output_fingerprint,
+    upstream ({upstream stage: its output fingerprint}), duration, updated_at
+
+When a stage records a document with an output fingerprint, the same
+unordered ``bulk_write`` upserts the entries of its downstream stages
+(``PIPELINE_STAGES``) and marks them stale if that fingerprint differs from
+the one they last saw. Finding work is then an indexed query:
+``stale(stage, version)`` returns the entries that are stale, failed last
+time, or were done by another ``version`` of the stage's code, so a resume
+or rerun reads only what changed.
+
+The input fingerprint ``stale`` returns is the server's hash of the entry's
+``upstream`` when it was read. Recording the run passes it back, and the
+write keeps the entry STALE if ``upstream`` has changed since, so an
+upstream change that lands while a stage is working is not overwritten.
+
+Source text enters through ``sync_source``: MongoDB hashes each document's
+``SOURCE_FIELDS`` (``$toHashedIndexKey``, MongoDB 7.0+) and compares it with
+the ledger, so only the ids of changed documents reach the client.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+LEDGER_COLLECTION = 'pipeline_ledger'
+
+# stage -> stages whose output it reads
+PIPELINE_STAGES = {
+    'source': (),                                               # HansardDocument content_text
+    'text_quality': ('source',),                                # 01_scraping/flag_messDoc.py
+    'ocr_tesseract': ('text_quality',),                         # 01_scraping/ocr/tessaract_ocr.py
+    'ocr_vision': ('ocr_tesseract',),                           # 01_scraping/ocr/googlevision_ocr.py
+    'segmentation': ('source', 'ocr_tesseract', 'ocr_vision'),  # 04_segmentation
+    'cpatf': ('segmentation',),                                 # 05_preprocessing_cpatf
+}
+
+SOURCE_FIELDS = ('content_text', 'hansardDate')
+SOURCE_VERSION = '1'
+
+DONE = 'done'
+SKIPPED = 'skipped'  # looked at, nothing to do (e.g. no OCR needed)
+FAILED = 'failed'
+STALE = 'stale'
+
+# Server-side hash of the upstream fingerprints an entry has seen ($toHashedIndexKey, MongoDB 7.0+)
+_UPSTREAM_FINGERPRINT = {'$toString': {'$toHashedIndexKey': {'$ifNull': ['$upstream', {}]}}}
+
+LEDGER_INDEXES = (
+    ([('stage', 1), ('doc_id', 1)], {'name': 'stage_doc_idx', 'unique': True}),
+    ([('stage', 1), ('status', 1)], {'name': 'stage_status_idx'}),
+    ([('stage', 1), ('version', 1)], {'name': 'stage_version_idx'}),
+)
+
+
+def fingerprint(value) -> str:
+    """Short stable hash of bytes or any JSON-like value (other types by ``str``)."""
+    if not isinstance(value, bytes):
+        value = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8')
+    return hashlib.blake2b(value, digest_size=16).hexdigest()
+
+
+class StageLedger:
+    """Per-document, per-stage processing state, with invalidation along ``stages``."""
+
+    def __init__(self, collection, stages: Dict = PIPELINE_STAGES):
+        self.collection = collection
+        self.stages = stages
+        self._downstream = {stage: tuple(other for other, upstream in stages.items() if stage in upstream)
+                            for stage in stages}
+
+    def ensure_indexes(self):
+        for keys, options in LEDGER_INDEXES:
+            self.collection.create_index(keys, **options)
+
+    def stale(self, stage: str, version: str) -> Iterator[Dict]:
+        """``{'doc_id', 'input_fingerprint', 'version'}`` for each document ``stage`` has to (re)run.
+
+        ``version`` is the one last recorded, None if ``stage`` never
+        recorded the document (its entry was created by an upstream stage).
+        """
+        query = {'stage': stage, '$or': [{'status': {'$in': [STALE, FAILED]}}, {'version': {'$ne': version}}]}
+        pipeline = [{'$match': query},
+                    {'$project': {'_id': 0, 'doc_id': 1, 'version': 1, 'input_fingerprint': _UPSTREAM_FINGERPRINT}}]
+        for entry in self.collection.aggregate(pipeline):
+            yield {'doc_id': entry['doc_id'], 'input_fingerprint': entry['input_fingerprint'],
+                   'version': entry.get('version')}
+
+    def stale_ids(self, stage: str, version: str) -> List:
+        return [entry['doc_id'] for entry in self.stale(stage, version)]
+
+    def operations(self, doc_id, stage: str, version: str, status: str = DONE,
+                   input_fingerprint: Optional[str] = None, output_fingerprint: Optional[str] = None,
+                   duration: Optional[float] = None) -> List:
+        """Bulk operations recording one run of ``stage`` on ``doc_id``.
+
+        With an ``output_fingerprint``, downstream stages whose last seen
+        fingerprint differs are marked stale (their entry is created if new).
+        For a stage with upstream stages, an ``input_fingerprint`` from
+        ``stale`` that no longer matches the entry leaves its status STALE.
+        """
+        from pymongo import UpdateOne
+
+        new_status = {'$literal': status}
+        if input_fingerprint is not None and self.stages.get(stage):
+            # Upstream output recorded since stale() was read: the run used old input
+            new_status = {'$cond': [{'$eq': [_UPSTREAM_FINGERPRINT, {'$literal': input_fingerprint}]},
+                                    new_status, STALE]}
+        operations = [UpdateOne({'stage': stage, 'doc_id': doc_id}, [{'$set': {
+            'status': new_status,
+            'version': {'$literal': version},
+            'input_fingerprint': {'$literal': input_fingerprint},
+            'output_fingerprint': {'$literal': output_fingerprint},
+            'duration': {'$literal': duration},
+            'updated_at': {'$literal': datetime.utcnow()},
+        }}], upsert=True)]
+        if output_fingerprint is not None:
+            seen = {'$literal': output_fingerprint}
+            for downstream in self._downstream[stage]:
+                operations.append(UpdateOne({'stage': downstream, 'doc_id': doc_id}, [
+                    {'$set': {'status': {'$cond': [{'$eq': [f'$upstream.{stage}', seen]}, '$status', STALE]}}},
+                    {'$set': {'upstream': {'$mergeObjects': [{'$ifNull': ['$upstream', {}]}, {stage: seen}]}}},
+                ], upsert=True))
+        return operations
+
+    def write(self, operations: List):
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+    def record(self, doc_id, stage: str, version: str, **kwargs):
+        self.write(self.operations(doc_id, stage, version, **kwargs))
+
+    def sync_source(self, source, query: Optional[Dict] = None, batch_size: int = 1000) -> int:
+        """Record a ``source`` entry for every ``source`` document whose ``SOURCE_FIELDS`` changed.
+
+        ``source`` must be in the ledger's database. Returns the number of
+        changed documents; their downstream stages become stale.
+        """
+        pipeline = [{'$match': query}] if query else []
+        pipeline += [
+            {'$project': {'fingerprint': {'$toString': {'$toHashedIndexKey': {
+                field: f'${field}' for field in SOURCE_FIELDS}}}}},
+            {'$lookup': {
+                'from': self.collection.name,
+                'let': {'doc': '$_id'},
+                'pipeline': [
+                    {'$match': {'$expr': {'$and': [{'$eq': ['$stage', 'source']}, {'$eq': ['$doc_id', '$$doc']}]}}},
+                    {'$project': {'_id': 0, 'output_fingerprint': 1}},
+                ],
+                'as': 'ledger',
+            }},
+            {'$match': {'$expr': {'$ne': ['$fingerprint', {'$arrayElemAt': ['$ledger.output_fingerprint', 0]}]}}},
+            {'$project': {'fingerprint': 1}},
+        ]
+        changed = 0
+        operations: List = []
+        for doc in source.aggregate(pipeline, batchSize=batch_size, allowDiskUse=True):
+            operations.extend(self.operations(doc['_id'], 'source', SOURCE_VERSION,
+                                              input_fingerprint=doc['fingerprint'],
+                                              output_fingerprint=doc['fingerprint']))
+            changed += 1
+            if len(operations) >= batch_size:
+                self.write(operations)
+                operations = []
+        self.write(operations)
+        return changed
+
+    def status_counts(self, stage: str) -> Dict[str, int]:
+        return {row['_id']: row['count'] for row in self.collection.aggregate([
+            {'$match': {'stage': stage}},
+            {'$group': {'_id': '$status', 'count': {'$sum': 1}}},
+        ])}
@@ -0,0 +1,19 @@
+"""
+MongoDB aggregation expressions shared by the pipeline's server-side projections.
+
+``first_text`` resolves a sitting's text the way ``hansard_core500`` is
+built: ``full_text``, else ``ocr_text``, else ``content_text``. It is used by
+``pattern_analysis.STREAM_PROJECTION``, ``segmentation.SEGMENTATION_PROJECTION``
+and ``segment_store``'s embedded view.
+"""
+
+from typing import Dict
+
+
+def first_text(*fields) -> Dict:
+    """Aggregation expression: the first of ``fields`` that is a non-blank string."""
+    expression = ''
+    for field in reversed(fields):
+        non_blank = {'$gt': [{'$strLenCP': {'$trim': {'input': {'$ifNull': [f'${field}', '']}}}}, 0]}
+        expression = {'$cond': [non_blank, f'${field}', expression]}
+    return expression
@@ -0,0 +1,95 @@
+"""
+Term-level batch matching for the historical MP scraper.
+
+``history_mp_honorific.py`` used to resolve a term's MPs one at a time, so an
+early scraped name could claim a stored MP that a later, better-matching name
+should have had. The batch path works on the whole term:
+
+1. ``name_gate_matrix`` scores every scraped name against every stored
+   identity with rapidfuzz's ``cdist`` (all cores) and keeps the pairs that
+   can pass the matcher's mandatory rules: compatible gender, first names at
+   98%+ and last names at 95%+. rapidfuzz's ratio is the InDel similarity,
+   which is never lower than python-Levenshtein's or difflib's ratio, and the
+   cutoffs sit half a point below the rounded thresholds, so no pair the
+   per-MP rules would accept is dropped.
+2. The scraper runs its exact ``calculate_98_percent_similarity`` on the
+   surviving pairs only.
+3. ``assign_one_to_one`` takes pairs at or above the threshold in descending
+   score order (ties broken by name), so each scraped name and each stored
+   MP is used at most once and the result does not depend on page order.
+
+Without rapidfuzz, ``name_gate_matrix`` is unavailable (``HAVE_CDIST`` is
+False) and the scraper falls back to its blocking index for candidates.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    from rapidfuzz import fuzz
+    from rapidfuzz.process import cdist
+    HAVE_CDIST = True
+except ImportError:  # optional speed-up
+    HAVE_CDIST = False
+
+FIRST_NAME_CUTOFF = 97.5  # fuzz.ratio rounds, so 97.5 already scores 98
+LAST_NAME_CUTOFF = 94.5   # ... and 94.5 scores 95
+
+
+def name_gate_matrix(query_identities: Sequence[Dict], candidate_identities: Sequence[Dict],
+                     first_cutoff: float = FIRST_NAME_CUTOFF, last_cutoff: float = LAST_NAME_CUTOFF,
+                     workers: int = -1) -> "np.ndarray":
+    """Boolean (queries x candidates) matrix of pairs that pass the gender and name gates.
+
+    Identities are ``extract_core_identity`` dicts (``first_name``,
+    ``last_name``, ``gender``).
+    """
+    if not HAVE_CDIST:
+        raise ImportError("name_gate_matrix needs rapidfuzz and numpy")
+    shape = (len(query_identities), len(candidate_identities))
+    if not shape[0] or not shape[1]:
+        return np.zeros(shape, dtype=bool)
+
+    def column(identities, field):
+        return [identity[field].lower() for identity in identities]
+
+    first = cdist(column(query_identities, 'first_name'), column(candidate_identities, 'first_name'),
+                  scorer=fuzz.ratio, score_cutoff=first_cutoff, dtype=np.float32, workers=workers)
+    last = cdist(column(query_identities, 'last_name'), column(candidate_identities, 'last_name'),
+                 scorer=fuzz.ratio, score_cutoff=last_cutoff, dtype=np.float32, workers=workers)
+
+    query_gender = np.array([identity.get('gender', '') for identity in query_identities])[:, None]
+    candidate_gender = np.array([identity.get('gender', '') for identity in candidate_identities])[None, :]
+    gender_ok = (query_gender == '') | (candidate_gender == '') | (query_gender == candidate_gender)
+
+    return (first >= first_cutoff) & (last >= last_cutoff) & gender_ok
+
+
+def gated_pairs(query_identities: Sequence[Dict], candidate_identities: Sequence[Dict],
+                **kwargs) -> List[Tuple[int, int]]:
+    """(query index, candidate index) for every True cell of ``name_gate_matrix``."""
+    mask = name_gate_matrix(query_identities, candidate_identities, **kwargs)
+    return [(int(q), int(c)) for q, c in zip(*np.nonzero(mask))]
+
+
+def assign_one_to_one(scored_pairs: Sequence[Tuple[float, int, int]], threshold: float,
+                      tie_key: Optional[Callable[[int, int], Any]] = None) -> Dict[int, Tuple[int, float]]:
+    """query index -> (candidate index, score), one candidate per query and vice versa.
+
+    ``scored_pairs`` are (score, query index, candidate index). Highest scores
+    are assigned first. Equal scores are ordered by ``tie_key(query,
+    candidate)``; pass one built from the names (not their positions) to keep
+    ties independent of page order. The default orders by index.
+    """
+    def order(pair):
+        score, query, candidate = pair
+        return (-score, tie_key(query, candidate) if tie_key else (query, candidate))
+
+    assigned: Dict[int, Tuple[int, float]] = {}
+    taken = set()
+    for score, query, candidate in sorted(scored_pairs, key=order):
+        if score < threshold or query in assigned or candidate in taken:
+            continue
+        assigned[query] = (candidate, score)
+        taken.add(candidate)
+    return assigned
@@ -0,0 +1,145 @@
+"""
+Persistent store of raw OCR output, one row per page.
+
+Results are keyed by the PDF's sha256 plus everything that changes what the OCR
+engine returns (engine, language, DPI, engine version), and are stored before
+any cleaning. Re-running a cleaning change therefore only reads this store, and
+an interrupted run resumes from the first page that has no row yet.
+
+The store is a local SQLite file (``~/hansard_ocr_cache/ocr_cache.sqlite3`` by
+default, next to the scraper's ``hansard_checkpoints``), so it survives crashes
+and never bills Vision twice for the same page.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_CACHE_PATH = Path.home() / "hansard_ocr_cache" / "ocr_cache.sqlite3"
+
+_KEY_COLUMNS = ("pdf_sha256", "engine", "language", "dpi", "engine_version")
+
+
+@dataclass(frozen=True)
+class OcrKey:
+    """Identity of one OCR run over one PDF."""
+    pdf_sha256: str
+    engine: str
+    language: str
+    dpi: int
+    engine_version: str
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class OcrCache:
+    """Page-level OCR result store backed by SQLite. Safe to share across threads."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS ocr_pages (
+                pdf_sha256 TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                language TEXT NOT NULL,
+                dpi INTEGER NOT NULL,
+                engine_version TEXT NOT NULL,
+                page_no INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (pdf_sha256, engine, language, dpi, engine_version, page_no)
+            );
+            CREATE TABLE IF NOT EXISTS ocr_documents (
+                pdf_sha256 TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                language TEXT NOT NULL,
+                dpi INTEGER NOT NULL,
+                engine_version TEXT NOT NULL,
+                page_count INTEGER NOT NULL,
+                completed_at TEXT NOT NULL,
+                PRIMARY KEY (pdf_sha256, engine, language, dpi, engine_version)
+            );
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _key_params(key: OcrKey) -> tuple:
+        return tuple(getattr(key, column) for column in _KEY_COLUMNS)
+
+    def get_pages(self, key: OcrKey) -> Dict[int, str]:
+        """All cached pages for ``key`` as {page_no: raw text}."""
+        where = " AND ".join(f"{c} = ?" for c in _KEY_COLUMNS)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT page_no, text FROM ocr_pages WHERE {where}", self._key_params(key)
+            ).fetchall()
+        return {page_no: text for page_no, text in rows}
+
+    def put_page(self, key: OcrKey, page_no: int, text: str):
+        self.put_pages(key, {page_no: text})
+
+    def put_pages(self, key: OcrKey, pages: Dict[int, str]):
+        now = datetime.now().isoformat()
+        rows = [self._key_params(key) + (page_no, text, now) for page_no, text in pages.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ocr_pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def mark_complete(self, key: OcrKey, page_count: int):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_documents VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._key_params(key) + (page_count, datetime.now().isoformat()),
+            )
+            self._conn.commit()
+
+    def page_count(self, key: OcrKey) -> Optional[int]:
+        """Page count if every page of ``key`` has been stored, else None."""
+        where = " AND ".join(f"{c} = ?" for c in _KEY_COLUMNS)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT page_count FROM ocr_documents WHERE {where}", self._key_params(key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_document(self, key: OcrKey) -> Optional[List[str]]:
+        """Raw page texts in page order, or None if the document is incomplete."""
+        page_count = self.page_count(key)
+        if page_count is None:
+            return None
+        pages = self.get_pages(key)
+        if any(page_no not in pages for page_no in range(1, page_count + 1)):
+            return None
+        return [pages[page_no] for page_no in range(1, page_count + 1)]
+
+    def missing_pages(self, key: OcrKey, page_count: int) -> List[int]:
+        done = self.get_pages(key)
+        return [page_no for page_no in range(1, page_count + 1) if page_no not in done]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
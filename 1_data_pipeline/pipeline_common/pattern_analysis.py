@@ -0,0 +1,523 @@
+"""
+Field completion and pattern discovery over Hansard sittings
+(``CombinedParliamentaryAnalyzer``, used by ``patternAnalysis.ipynb``).
+
+``run_complete_analysis`` works on a loaded list of documents, as before.
+``run_streaming_analysis`` consumes any iterable of documents (normally a
+MongoDB cursor over ``STREAM_PROJECTION``) in chunks of ``chunk_size`` and
+runs the ``ensure_*`` completions and ``_analyze_patterns`` in a process
+pool. Each worker returns the partial aggregates of its chunk
+(``partial_state``: ``decade_headers``, ``honorific_variations``,
+``language_code_switching``, completion stats, field coverage and the decade
+distribution), and the parent adds them up with ``merge_state``. Counts are
+sums, so the result does not depend on which worker saw which document, and
+only ``max_pending`` chunks are in flight at once: memory stays flat however
+large the collection is.
+
+The class lives here rather than in the notebook so the pool's workers can
+import it under any multiprocessing start method.
+"""
+
+import itertools
+import os
+import random
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from pipeline_common.mongo_exprs import first_text
+
+COMPLETION_FIELDS = ('header', 'attendance', 'discussion_start')
+
+_WORD = re.compile(r'\w+')
+
+# Language marker words, counted in one pass over the lower-cased text
+_MARKER_LANGUAGE = {word: 'malay' for word in ('yang', 'dan', 'adalah', 'akan')}
+_MARKER_LANGUAGE.update({word: 'english' for word in ('the', 'and', 'is', 'with')})
+_LANGUAGE_MARKERS = re.compile(r'\b(?:' + '|'.join(_MARKER_LANGUAGE) + r')\b')
+
+
+def _empty_stream_counts() -> Dict:
+    return {'documents': 0, 'processed': 0, 'decade_distribution': Counter(), 'field_coverage': Counter()}
+
+
+# Fields the analyzer reads. HansardDocument has no ``full_text``, so it is
+# taken from ocr_text, then content_text, as when hansard_core500 is built.
+STREAM_PROJECTION = {
+    'hansardDate': 1,
+    'header': 1,
+    'attendance': 1,
+    'discussion_start': 1,
+    'content_text': 1,
+    'text': 1,
+    'full_text': first_text('full_text', 'ocr_text', 'content_text'),
+}
+
+
+class PhraseIndex:
+    """Which of ``phrases`` occur in a line as ``\\b{re.escape(phrase)}\\b`` (case-insensitive).
+
+    Each phrase is filed under its first word. A line is tokenised once, and
+    only the phrases filed under one of its words are checked, each with its
+    own precompiled pattern, instead of every phrase on every line. A match of
+    ``\\bphrase\\b`` always starts with a whole word of the line equal to the
+    phrase's first word, so no occurrence is missed. Phrases that do not start
+    with a word character are always checked.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases = list(phrases)
+        self._patterns = [re.compile(rf'\b{re.escape(phrase)}\b', re.I) for phrase in self.phrases]
+        self._by_first_word: Dict[str, List[int]] = defaultdict(list)
+        self._unindexed: List[int] = []
+        for i, phrase in enumerate(self.phrases):
+            first = _WORD.match(phrase)
+            if first:
+                self._by_first_word[first.group().lower()].append(i)
+            else:
+                self._unindexed.append(i)
+
+    def _candidates(self, line: str) -> List[int]:
+        candidates = set(self._unindexed)
+        for word in {word.lower() for word in _WORD.findall(line)}:
+            candidates.update(self._by_first_word.get(word, ()))
+        return sorted(candidates)
+
+    def matches(self, line: str) -> List[int]:
+        """Indexes (in phrase order) of every phrase occurring in ``line``."""
+        return [i for i in self._candidates(line) if self._patterns[i].search(line)]
+
+    def search(self, line: str) -> bool:
+        return any(self._patterns[i].search(line) for i in self._candidates(line))
+
+
+class CombinedParliamentaryAnalyzer:
+    def __init__(self, honorific_dict: Dict):
+        self.honorific_dict = honorific_dict
+        self._honorific_index = PhraseIndex(honorific_dict.keys())
+        self._honorific_standard = list(honorific_dict.values())
+        self.pattern_discoveries = {
+            'decade_headers': defaultdict(Counter),
+            'honorific_variations': defaultdict(Counter),
+            'language_code_switching': defaultdict(Counter),
+        }
+        self.completion_stats = {
+            'header': {'found': 0, 'created': 0, 'failed': 0},
+            'attendance': {'found': 0, 'created': 0, 'failed': 0},
+            'discussion_start': {'found': 0, 'created': 0, 'failed': 0}
+        }
+        self.stream_counts = _empty_stream_counts()
+
+    def run_complete_analysis(self, docs: List[Dict], sample_size: int = 500) -> Dict:
+        completed = self.complete_all_documents(docs)
+        patterns = self.analyze_document_patterns(completed, sample_size)
+        return {
+            'data_completion': {
+                'original_document_count': len(docs),
+                'completed_document_count': len(completed),
+                'completion_statistics': self.completion_stats,
+                'field_coverage': self.verify_field_coverage(completed)
+            },
+            'pattern_analysis': patterns
+        }
+
+    def complete_all_documents(self, docs: List[Dict]) -> List[Dict]:
+        result = []
+        for i, doc in enumerate(docs):
+            if i % 100 == 0:
+                print(f"  Completing {i+1}/{len(docs)}")
+            d = doc.copy()
+            d['header'] = self.ensure_header(doc)
+            d['attendance'] = self.ensure_attendance(doc)
+            d['discussion_start'] = self.ensure_discussion_start(doc)
+            result.append(d)
+        self.print_completion_summary(len(docs))
+        return result
+
+    def ensure_header(self, doc: Dict) -> str:
+        if (h := doc.get('header', '')) and len(h.strip()) > 5:
+            self.completion_stats['header']['found'] += 1
+            return h
+        if (txt := doc.get('full_text', '')):
+            if (ex := self.extract_header_from_text(txt)):
+                self.completion_stats['header']['created'] += 1
+                return ex
+        fb = self.create_header_from_metadata(doc) or "DEWAN RAKYAT"
+        self.completion_stats['header']['created'] += 1
+        return fb
+
+    def ensure_attendance(self, doc: Dict) -> List[Dict]:
+        if doc.get('attendance'):
+            self.completion_stats['attendance']['found'] += 1
+            return doc['attendance']
+        for field in ['full_text', 'content_text', 'text']:
+            if (txt := doc.get(field, '')):
+                if (ex := self.extract_attendance_from_text(txt)):
+                    self.completion_stats['attendance']['created'] += 1
+                    return ex
+        self.completion_stats['attendance']['created'] += 1
+        return [{'note': 'Attendance not found'}]
+
+    def ensure_discussion_start(self, doc: Dict) -> str:
+        if (s := doc.get('discussion_start', '')) and len(s.strip()) > 5:
+            self.completion_stats['discussion_start']['found'] += 1
+            return s
+        if (txt := doc.get('full_text', '')):
+            if (ex := self.extract_discussion_start_from_text(txt)):
+                self.completion_stats['discussion_start']['created'] += 1
+                return ex
+        date = doc.get('hansardDate', '')
+        fb = f"Mesyuarat dimulakan pada {date}" if date else "Mesyuarat dimulakan"
+        self.completion_stats['discussion_start']['created'] += 1
+        return fb
+
+    def extract_header_from_text(self, txt: str) -> Optional[str]:
+        lines = txt.split('\n')[:20]
+        header = []
+        for line in lines:
+            line = line.strip()
+            if not line: continue
+            if (len(line) < 120 and
+                (line.isupper() or
+                 any(k in line.upper() for k in ['DEWAN', 'PARLIMEN', 'MESYUARAT', 'BIL']) or
+                 re.match(r'^(Bil|DR|Page|No)[\.\s]*\d+', line, re.I))):
+                header.append(line)
+            elif ':' in line and any(t in line for t in ['Yang Berhormat', 'Dato']):
+                break
+        return '\n'.join(header) if header else None
+
+    def create_header_from_metadata(self, doc: Dict) -> str:
+        parts = ['DEWAN RAKYAT']
+        if (date := doc.get('hansardDate')):
+            try:
+                d = datetime.strptime(date[:10], '%Y-%m-%d')
+                malay_days = ['Isnin', 'Selasa', 'Rabu', 'Khamis', 'Jumaat', 'Sabtu', 'Ahad']
+                malay_months = ['Januari', 'Februari', 'Mac', 'April', 'Mei', 'Jun',
+                                'Julai', 'Ogos', 'September', 'Oktober', 'November', 'Disember']
+                parts.append(f"{malay_days[d.weekday()]}, {d.day} {malay_months[d.month-1]} {d.year}")
+            except: parts.append(str(date))
+        return '\n'.join(parts)
+
+    def extract_discussion_start_from_text(self, txt: str) -> Optional[str]:
+        lines = txt.split('\n')
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line or len(line) < 20 or any(k in line.upper() for k in ['DEWAN', 'KEHADIRAN']): continue
+            if any(p in line.lower() for p in ['yang berhormat', 'tuan speaker']) and ':' in line:
+                return '\n'.join(lines[max(0,i-1):i+2]).strip()
+        return None
+
+    def extract_attendance_from_text(self, txt: str) -> Optional[List[Dict]]:
+        modern = [
+            r'KEHADIRAN\s+AHLI[\s-]*AHLI\s+PARLIMEN[\s\S]*?(?=Ahli[\s-]*Ahli\s+Yang\s+Tidak|Senator|PERTANYAAN)',
+            r'Ahli[\s-]*Ahli\s+Yang\s+Hadir\s*[:\-][\s\S]*?(?=Ahli[\s-]*Ahli\s+Yang\s+Tidak|Senator)',
+        ]
+        for p in modern:
+            if (m := re.search(p, txt, re.I)):
+                parsed = self._parse_modern_attendance(m.group(0))
+                if len(parsed) >= 50: return parsed
+
+        historical = [
+            r'PRESENT\s*[:\-][\s\S]*?(?=ABSENT|QUESTIONS|The sitting)',
+            r'MEMBERS\s+PRESENT[\s\S]*?(?=MEMBERS\s+ABSENT|ABSENT)',
+        ]
+        for p in historical:
+            if (m := re.search(p, txt, re.I)):
+                parsed = self._parse_historical_attendance(m.group(0))
+                if len(parsed) >= 30: return parsed
+        return None
+
+    def _parse_modern_attendance(self, block: str) -> List[Dict]:
+        entries = []
+        lines = [l.strip() for l in block.split('\n') if l.strip()]
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            if any(h in line.upper() for h in ['KEHADIRAN', 'AHLI', 'HADIR']): 
+                i += 1; continue
+            m = re.match(r'(\d+)\.\s*(.+)', line)
+            if not m: 
+                i += 1; continue
+            num, content = m.groups()
+            i += 1
+            while i < len(lines) and not re.match(r'^\d+\.', lines[i]):
+                content += " " + lines[i].strip()
+                i += 1
+            const = re.search(r'[\[\(]([^]\)]+)[\]\)]', content)
+            constituency = const.group(1).strip() if const else ""
+            name_part = re.sub(r'[\[\(][^]\)]+[\]\)]', '', content).strip()
+            title, name = self._split_title_name(name_part)
+            entries.append({
+                'number': int(num),
+                'title': title,
+                'name': name or name_part,
+                'constituency': constituency,
+                'party': self._extract_party(constituency),
+                'format': 'modern'
+            })
+        return self._deduplicate_entries(entries)
+
+    def _parse_historical_attendance(self, block: str) -> List[Dict]:
+        entries = []
+        for line in block.split('\n'):
+            line = line.strip()
+            if any(skip in line.upper() for skip in ['PRESENT', 'MEMBERS']): continue
+            m = re.match(r"(?:The Honourable )?([A-Z]['A-Z\s]+)\s*\(([^)]+)\)", line, re.I)
+            if not m:
+                m = re.match(r"([A-Z]['A-Z\s]+)\s*\(([^)]+)\)", line, re.I)
+            if not m: continue
+            name_part, constituency = m.groups()
+            title, name = self._split_title_name(name_part)
+            entries.append({
+                'number': len(entries) + 1,
+                'title': title,
+                'name': name or name_part,
+                'constituency': constituency,
+                'party': None,
+                'format': 'historical'
+            })
+        return self._deduplicate_entries(entries)
+
+    def _split_title_name(self, text: str) -> tuple[str, str]:
+        matched_titles = []
+        remaining = text
+        for raw, std in sorted(self.honorific_dict.items(), key=lambda x: len(x[0]), reverse=True):
+            pattern = re.escape(raw)
+            if re.search(rf'\b{pattern}\b', text, re.I):
+                matched_titles.append(std)
+                remaining = re.sub(rf'\b{pattern}\b', '', remaining, flags=re.I)
+        title_str = ' '.join(matched_titles)
+        name = re.sub(r'\s+', ' ', remaining.strip())
+        return title_str, name
+
+    def _extract_party(self, const: str) -> Optional[str]:
+        m = re.search(r'-\s*([A-Z]{2,6})\b', const) or re.search(r'\[([A-Z]{2,6})\]', const)
+        return m.group(1) if m else None
+
+    def _deduplicate_entries(self, entries: List[Dict]) -> List[Dict]:
+        seen = set()
+        unique = []
+        for e in entries:
+            key = f"{e['name'].lower()}_{e['constituency'].lower()}"
+            if key not in seen:
+                seen.add(key)
+                unique.append(e)
+        return unique
+
+    def analyze_document_patterns(self, docs: List[Dict], sample_size: int = 500) -> Dict:
+        sample = random.sample(docs, min(sample_size, len(docs)))
+        processed = 0
+        decade_dist = defaultdict(int)
+        for doc in sample:
+            txt = doc.get('full_text', '')
+            if not txt: continue
+            if not self._assess_document_quality(txt)['usable']: continue
+            decade = self._extract_decade_from_document(doc)
+            decade_dist[decade] += 1
+            self._analyze_patterns(decade, txt)
+            processed += 1
+        return {
+            'processing_summary': {
+                'successfully_processed': processed,
+                'decade_distribution': dict(decade_dist)
+            },
+            'discovered_patterns': dict(self.pattern_discoveries)
+        }
+
+    def _analyze_patterns(self, decade: str, txt: str):
+        lines = txt.split('\n')
+        for line in lines[:25]:
+            line = line.strip()
+            if not line: continue
+            if self._is_header(line):
+                self.pattern_discoveries['decade_headers'][decade][line] += 1
+        for line in self._extract_speakers(txt, limit=15):
+            for i in self._honorific_index.matches(line):
+                self.pattern_discoveries['honorific_variations'][decade][self._honorific_standard[i]] += 1
+        self._analyze_language(txt, decade)
+
+    def _is_header(self, line: str) -> bool:
+        return len(line) < 120 and (line.isupper() or any(k in line.upper() for k in ['DEWAN','PARLIMEN','BIL']))
+
+    def _extract_speakers(self, txt: str, limit: Optional[int] = None) -> List[str]:
+        speaker_lines = []
+        for line in txt.split('\n'):
+            line = line.strip()
+            if not line or len(line) > 250 or line.startswith('('): continue
+            if ':' not in line: continue
+            if self._honorific_index.search(line):
+                speaker_lines.append(line)
+                if len(speaker_lines) == limit:
+                    break
+        return speaker_lines
+
+    def _analyze_language(self, txt: str, decade: str):
+        counts = Counter(_MARKER_LANGUAGE[m.group()] for m in _LANGUAGE_MARKERS.finditer(txt.lower()))
+        malay, eng = counts['malay'], counts['english']
+        total = malay + eng
+        if total > 10:
+            if malay > eng * 1.5:
+                self.pattern_discoveries['language_code_switching'][decade]['malay'] += 1
+            elif eng > malay * 1.5:
+                self.pattern_discoveries['language_code_switching'][decade]['english'] += 1
+            else:
+                self.pattern_discoveries['language_code_switching'][decade]['mixed'] += 1
+
+    def _assess_document_quality(self, txt: str) -> Dict:
+        wc = len(txt.split())
+        rel = sum(1 for w in ['yang berhormat','dewan rakyat','parlimen','soalan'] if w in txt.lower()) / 4.0
+        score = max(0.0, min(1.0, wc/2000)*0.4 + rel*0.6)
+        return {'usable': score > 0.25 and wc > 50}
+
+    def _extract_decade_from_document(self, doc: Dict) -> str:
+        date = doc.get('hansardDate')
+        if not date:
+            return "unknown"
+        try:
+            match = re.search(r'(19[5-9]\d|20[0-2]\d)', str(date))
+            if match:
+                year = int(match.group(1))
+                return f"{(year // 10) * 10}s"
+        except (ValueError, AttributeError):
+            pass
+        return "unknown"
+
+    def print_completion_summary(self, total: int):
+        print("\nFIELD COMPLETION")
+        for f, s in self.completion_stats.items():
+            cov = (s['found'] + s['created']) / total * 100
+            print(f"{f.title():15}: {cov:5.1f}%")
+
+    def verify_field_coverage(self, docs: List[Dict]) -> Dict:
+        return {f: {'percentage': sum(1 for d in docs if d.get(f))/len(docs)*100} for f in ['header','attendance','discussion_start']}
+
+    def display_combined_results(self, res: Dict):
+        print("\n" + "="*60)
+        print("ANALYSIS SUMMARY")
+        print("="*60)
+        c = res['data_completion']
+        print(f"Docs: {c['original_document_count']}")
+        for f, cov in c['field_coverage'].items():
+            print(f"  {f:18}: {cov['percentage']:5.1f}%")
+        print(f"Pattern docs: {res['pattern_analysis']['processing_summary']['successfully_processed']}")
+
+
+    def reset_aggregates(self):
+        """Zero every aggregate (a worker calls this before each chunk)."""
+        self.pattern_discoveries = {key: defaultdict(Counter) for key in self.pattern_discoveries}
+        self.completion_stats = {field: dict.fromkeys(stats, 0) for field, stats in self.completion_stats.items()}
+        self.stream_counts = _empty_stream_counts()
+
+    def analyze_document(self, doc: Dict):
+        """Complete and analyse one document, adding to the aggregates only."""
+        completed = {field: getattr(self, f'ensure_{field}')(doc) for field in COMPLETION_FIELDS}
+        self.stream_counts['documents'] += 1
+        self.stream_counts['field_coverage'].update(field for field, value in completed.items() if value)
+
+        txt = doc.get('full_text', '')
+        if not txt or not self._assess_document_quality(txt)['usable']:
+            return
+        decade = self._extract_decade_from_document(doc)
+        self.stream_counts['decade_distribution'][decade] += 1
+        self._analyze_patterns(decade, txt)
+        self.stream_counts['processed'] += 1
+
+    def partial_state(self) -> Dict:
+        return {
+            'pattern_discoveries': self.pattern_discoveries,
+            'completion_stats': self.completion_stats,
+            'stream_counts': self.stream_counts,
+        }
+
+    def merge_state(self, part: Dict):
+        """Add another analyzer's ``partial_state`` to this one."""
+        for key, by_decade in part['pattern_discoveries'].items():
+            for decade, counts in by_decade.items():
+                self.pattern_discoveries[key][decade].update(counts)
+        for field, stats in part['completion_stats'].items():
+            for outcome, count in stats.items():
+                self.completion_stats[field][outcome] += count
+        for key, value in part['stream_counts'].items():
+            if isinstance(value, Counter):
+                self.stream_counts[key].update(value)
+            else:
+                self.stream_counts[key] += value
+
+    def run_streaming_analysis(self, docs: Iterable[Dict], workers: Optional[int] = None,
+                               chunk_size: int = 16, max_pending: Optional[int] = None,
+                               progress_every: int = 500) -> Dict:
+        """``run_complete_analysis`` over every document of ``docs`` in constant memory.
+
+        ``workers=0`` analyses in this process (no pool). Returns the same
+        structure as ``run_complete_analysis``.
+        """
+        self.reset_aggregates()
+        docs = iter(docs)
+        chunks = iter(lambda: list(itertools.islice(docs, chunk_size)), [])
+        reported = 0
+
+        def report():
+            nonlocal reported
+            done = self.stream_counts['documents']
+            if done - reported >= progress_every:
+                print(f"  Analysed {done} documents")
+                reported = done
+
+        if workers == 0:
+            for chunk in chunks:
+                for doc in chunk:
+                    self.analyze_document(doc)
+                report()
+        else:
+            workers = workers or os.cpu_count() or 1
+            max_pending = max_pending or 2 * workers
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.honorific_dict,)) as pool:
+                pending = set()
+                for chunk in chunks:
+                    pending.add(pool.submit(_analyze_chunk, chunk))
+                    if len(pending) >= max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self.merge_state(future.result())
+                        report()
+                for future in pending:
+                    self.merge_state(future.result())
+
+        total = self.stream_counts['documents']
+        if total:
+            self.print_completion_summary(total)
+        return {
+            'data_completion': {
+                'original_document_count': total,
+                'completed_document_count': total,
+                'completion_statistics': self.completion_stats,
+                'field_coverage': {field: {'percentage': self.stream_counts['field_coverage'][field] / total * 100
+                                           if total else 0.0}
+                                   for field in COMPLETION_FIELDS},
+            },
+            'pattern_analysis': {
+                'processing_summary': {
+                    'successfully_processed': self.stream_counts['processed'],
+                    'decade_distribution': dict(self.stream_counts['decade_distribution']),
+                },
+                'discovered_patterns': dict(self.pattern_discoveries),
+            },
+        }
+
+
+_worker_analyzer: Optional[CombinedParliamentaryAnalyzer] = None
+
+
+def _init_worker(honorific_dict: Dict):
+    global _worker_analyzer
+    _worker_analyzer = CombinedParliamentaryAnalyzer(honorific_dict)
+
+
+def _analyze_chunk(docs: List[Dict]) -> Dict:
+    _worker_analyzer.reset_aggregates()
+    for doc in docs:
+        _worker_analyzer.analyze_document(doc)
+    return _worker_analyzer.partial_state()
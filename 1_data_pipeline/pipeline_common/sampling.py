@@ -0,0 +1,187 @@
+"""
+Seeded stratified sampling of HansardDocument by (decade, docLength,
+scrapMethod).
+
+``stratifiedSampling.ipynb`` used to ``$push`` every document id into its
+stratum in one ``$group``, sample in pandas, and pull the chosen documents
+back with a single ``find({'_id': {'$in': ...}})`` before re-inserting them.
+This module keeps the full documents on the server:
+
+1. ``ensure_strata_index`` creates ``STRATA_INDEX`` on (decade, docLength,
+   scrapMethod, _id). ``_id`` is the last key so that the stratum counts and
+   the id stream below are covered queries: they read the index only, never
+   a document.
+2. ``stratum_counts`` runs a covered ``$group`` (one row per stratum), and
+   ``allocate`` turns the counts into per-stratum sizes that add up to the
+   target exactly (proportional, at least one per stratum, largest
+   remainders first).
+3. ``reservoir_sample`` streams ``(_id, stratum)`` pairs once and keeps, per
+   stratum, the ``k`` ids with the smallest seeded hash (a bottom-k reservoir
+   in a heap). The result depends only on the seed and the ids, not on the
+   order the cursor returns them, and with the same seed a larger sample
+   contains the smaller one stratum by stratum.
+4. ``materialise_sample`` copies the chosen documents into the sample
+   collection with ``$match`` + ``$merge`` in chunks of ``chunk_size`` ids, so
+   no document body crosses the wire and no single ``$in`` has to hold the
+   whole sample.
+
+Memory on the client is the stratum table plus the sampled ids.
+"""
+
+import hashlib
+import heapq
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+STRATA_FIELDS = ('decade', 'docLength', 'scrapMethod')
+
+STRATA_INDEX_NAME = 'strata_sampling_idx'
+STRATA_INDEX = [(field, 1) for field in STRATA_FIELDS] + [('_id', 1)]
+
+# All flags are strings; a $type bound (unlike $exists) keeps the scan covered
+STRATA_QUERY = {field: {'$type': 'string'} for field in STRATA_FIELDS}
+
+Stratum = Tuple[str, str, str]
+
+
+def ensure_strata_index(collection):
+    """Create the covering strata index if it does not exist yet."""
+    return collection.create_index(STRATA_INDEX, name=STRATA_INDEX_NAME)
+
+
+def stratum_label(stratum: Stratum) -> str:
+    """'scrapMethod-docLength-decade', as in the sampling log."""
+    decade, doc_length, scrap_method = stratum
+    return f"{scrap_method}-{doc_length}-{decade}"
+
+
+def sample_key(seed: int, doc_id) -> int:
+    """Deterministic 64-bit sort key of ``doc_id`` under ``seed``."""
+    digest = hashlib.blake2b(f"{seed}:{doc_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def stratum_counts(collection, query: Optional[Dict] = None) -> Dict[Stratum, int]:
+    """Documents per (decade, docLength, scrapMethod), read from the index."""
+    pipeline = [
+        {'$match': {**STRATA_QUERY, **(query or {})}},
+        {'$group': {'_id': {field: f'${field}' for field in STRATA_FIELDS}, 'count': {'$sum': 1}}},
+    ]
+    options = {'hint': STRATA_INDEX_NAME} if not query else {}
+    return {tuple(row['_id'][field] for field in STRATA_FIELDS): row['count']
+            for row in collection.aggregate(pipeline, **options)}
+
+
+def allocate(counts: Dict[Stratum, int], target: int, min_per_stratum: int = 1) -> Dict[Stratum, int]:
+    """Per-stratum sample sizes summing to ``min(target, total)``.
+
+    Proportional to stratum size, at least ``min_per_stratum`` (capped by the
+    stratum size), then largest fractional remainders (ties by larger
+    stratum, then by label) take the seats left over. Seats over the target
+    come off the largest strata first; if the minimums alone exceed it, the
+    smallest strata are left out.
+    """
+    total = sum(counts.values())
+    target = min(target, total)
+    if not total or target <= 0:
+        return {stratum: 0 for stratum in counts}
+
+    quotas = {stratum: count * target / total for stratum, count in counts.items()}
+    sizes = {stratum: min(count, max(min_per_stratum, int(quotas[stratum])))
+             for stratum, count in counts.items()}
+    by_remainder = sorted(counts, key=lambda s: (-(quotas[s] - int(quotas[s])), -counts[s], s))
+    by_size = sorted(counts, key=lambda s: (-counts[s], s))
+
+    surplus = sum(sizes.values()) - target
+    while surplus > 0:
+        above_minimum = [s for s in by_size if sizes[s] > min(min_per_stratum, counts[s])]
+        stratum = above_minimum[0] if above_minimum else next(s for s in reversed(by_size) if sizes[s])
+        sizes[stratum] -= 1
+        surplus -= 1
+    while surplus < 0:
+        for stratum in by_remainder:
+            if surplus < 0 and sizes[stratum] < counts[stratum]:
+                sizes[stratum] += 1
+                surplus += 1
+    return sizes
+
+
+def stream_strata(collection, query: Optional[Dict] = None,
+                  batch_size: int = 5000) -> Iterable[Tuple[object, Stratum]]:
+    """(_id, stratum) for every flagged document, via a covered index scan."""
+    projection = {field: 1 for field in STRATA_FIELDS}
+    cursor = collection.find({**STRATA_QUERY, **(query or {})}, projection, batch_size=batch_size)
+    if not query:
+        cursor = cursor.hint(STRATA_INDEX_NAME)
+    for doc in cursor:
+        yield doc['_id'], tuple(doc[field] for field in STRATA_FIELDS)
+
+
+def reservoir_sample(collection, sizes: Dict[Stratum, int], seed: int = 42,
+                     query: Optional[Dict] = None, batch_size: int = 5000) -> Dict[Stratum, List]:
+    """The ``sizes[stratum]`` ids of each stratum with the smallest ``sample_key``, in one pass."""
+    reservoirs: Dict[Stratum, list] = {stratum: [] for stratum, size in sizes.items() if size > 0}
+    for doc_id, stratum in stream_strata(collection, query, batch_size):
+        heap = reservoirs.get(stratum)
+        if heap is None:
+            continue
+        # Max-heap on the key (negated), so the root is the id to evict
+        entry = (-sample_key(seed, doc_id), str(doc_id), doc_id)
+        if len(heap) < sizes[stratum]:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    return {stratum: [doc_id for _, _, doc_id in sorted(heap, reverse=True)]
+            for stratum, heap in reservoirs.items()}
+
+
+def materialise_sample(collection, doc_ids: List, into: str, extra_fields: Optional[Dict] = None,
+                       chunk_size: int = 1000) -> int:
+    """Copy ``doc_ids`` from ``collection`` into ``into`` server-side with ``$merge``.
+
+    ``extra_fields`` are ``$set`` on the copies (not the source documents).
+    Existing copies are replaced, so re-running a draw is idempotent.
+    """
+    stages = [{'$set': extra_fields}] if extra_fields else []
+    for start in range(0, len(doc_ids), chunk_size):
+        chunk = doc_ids[start:start + chunk_size]
+        collection.aggregate([
+            {'$match': {'_id': {'$in': chunk}}},
+            *stages,
+            {'$merge': {'into': into, 'on': '_id', 'whenMatched': 'replace', 'whenNotMatched': 'insert'}},
+        ])
+    return collection.database[into].count_documents({})
+
+
+def draw_stratified_sample(collection, target: int, seed: int = 42, into: Optional[str] = None,
+                           sample_group: Optional[str] = None, query: Optional[Dict] = None,
+                           min_per_stratum: int = 1, drop_existing: bool = True) -> Dict:
+    """Allocate, sample and (if ``into`` is given) materialise a stratified sample.
+
+    Returns ``ids`` (stratum order), ``strata`` (stratum -> ids), ``log``
+    (one row per stratum as the notebook prints it), ``materialised`` (the
+    size of ``into``, or None) and ``processing_time``.
+    """
+    start = time.time()
+    ensure_strata_index(collection)
+    counts = stratum_counts(collection, query)
+    sizes = allocate(counts, target, min_per_stratum)
+    strata = reservoir_sample(collection, sizes, seed, query)
+
+    ids = [doc_id for stratum in sorted(strata) for doc_id in strata[stratum]]
+    log = [{'strata': stratum_label(stratum), 'total': counts[stratum], 'sampled': len(strata.get(stratum, [])),
+            'percentage': len(strata.get(stratum, [])) / counts[stratum] * 100}
+           for stratum in sorted(counts, key=lambda s: -counts[s])]
+
+    materialised = None
+    if into:
+        if drop_existing:
+            collection.database[into].drop()
+        extra = {'sample_seed': seed, 'sampling_timestamp': datetime.now()}
+        if sample_group:
+            extra['sample_group'] = sample_group
+        materialised = materialise_sample(collection, ids, into, extra)
+
+    return {'ids': ids, 'strata': strata, 'log': log, 'materialised': materialised,
+            'processing_time': time.time() - start}
@@ -0,0 +1,122 @@
+"""
+Normalised storage for segmentation output.
+
+``hansard_segmented500`` kept each sitting as one document: metadata, a
+second copy of ``full_text`` and the whole ``segmentation_output`` array.
+Finding "all speeches by MP X in 2019" meant scanning and unwinding every
+sitting, and long sittings approach MongoDB's 16 MB document limit. Here a
+sitting is split in two:
+
+- a sittings collection, one small document per sitting (``_id`` is the
+  source document's ``_id``; metadata, ``decade``, ``segment_count``; no text);
+- a segments collection, one document per speech: ``parent_id``,
+  ``ordinal``, ``speaker_id`` (the MP's ``_id`` in the ``MP`` collection),
+  ``speaker``, ``constituency``, ``date``, the speech ``text`` and its
+  ``start_line``/``end_line`` span in the parent's cleaned lines. The
+  sitting's full text is referenced through ``parent_id``, not copied.
+
+``SEGMENT_INDEXES`` serve (speaker, date) range queries and ordered reads of
+one sitting; (parent, ordinal) is unique, so a rerun replaces a sitting's
+segments in place. ``create_embedded_view`` defines a read-only view with
+the old embedded shape (``segmentation_output`` rebuilt by a ``$lookup`` in
+ordinal order, ``full_text`` optionally looked up from the source) for code
+that still reads that form.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from pipeline_common.mongo_exprs import first_text
+
+SEGMENT_FIELDS = ('speaker', 'constituency', 'start_line', 'end_line', 'text')
+
+# (keys, options) for create_index on the segments collection
+SEGMENT_INDEXES = (
+    ([('speaker_id', 1), ('date', 1)], {'name': 'speaker_date_idx'}),
+    ([('parent_id', 1), ('ordinal', 1)], {'name': 'parent_ordinal_idx', 'unique': True}),
+)
+
+
+def ensure_segment_indexes(segments):
+    for keys, options in SEGMENT_INDEXES:
+        segments.create_index(keys, **options)
+
+
+def parent_id(record: Dict):
+    """The source document's ``_id`` for a segmented record (``original_id`` is its string form)."""
+    from bson import ObjectId
+
+    original_id = record['original_id']
+    return ObjectId(original_id) if ObjectId.is_valid(original_id) else original_id
+
+
+def split_record(record: Dict) -> Tuple[Dict, List[Dict]]:
+    """(sitting document, segment documents) for a ``Segmenter.segmented_record``.
+
+    ``speaker_id`` is the one the segmenter resolved against the MPs of the
+    sitting's parliament term.
+    """
+    pid = parent_id(record)
+    sitting = {key: value for key, value in record.items()
+               if key not in ('segmentation_output', 'full_text')}
+    sitting['_id'] = pid
+    segments = [{
+        'parent_id': pid,
+        'ordinal': ordinal,
+        'speaker_id': segment.get('speaker_id'),
+        'date': record.get('hansardDate'),
+        **{field: segment.get(field) for field in SEGMENT_FIELDS},
+    } for ordinal, segment in enumerate(record['segmentation_output'])]
+    return sitting, segments
+
+
+def write_operations(record: Dict) -> Tuple[List, List]:
+    """Bulk operations (sittings, segments) that store ``record``, replacing any earlier run."""
+    from pymongo import DeleteMany, ReplaceOne
+
+    sitting, segments = split_record(record)
+    pid = sitting['_id']
+    segment_ops = [ReplaceOne({'parent_id': pid, 'ordinal': segment['ordinal']}, segment, upsert=True)
+                   for segment in segments]
+    # Segments beyond this run's count are left over from an earlier, longer segmentation
+    segment_ops.append(DeleteMany({'parent_id': pid, 'ordinal': {'$gte': len(segments)}}))
+    return [ReplaceOne({'_id': pid}, sitting, upsert=True)], segment_ops
+
+
+def embedded_view_pipeline(segments_name: str, source_name: Optional[str] = None) -> List[Dict]:
+    """Aggregation over the sittings collection giving the old embedded documents."""
+    pipeline = [{'$lookup': {
+        'from': segments_name,
+        'let': {'parent': '$_id'},
+        'pipeline': [
+            {'$match': {'$expr': {'$eq': ['$parent_id', '$$parent']}}},
+            {'$sort': {'ordinal': 1}},
+            {'$project': {'_id': 0, **{field: 1 for field in SEGMENT_FIELDS}}},
+        ],
+        'as': 'segmentation_output',
+    }}]
+    if source_name:
+        pipeline += [
+            {'$lookup': {
+                'from': source_name,
+                'let': {'parent': '$_id'},
+                'pipeline': [
+                    {'$match': {'$expr': {'$eq': ['$_id', '$$parent']}}},
+                    {'$project': {'_id': 0, 'full_text': first_text('full_text', 'ocr_text', 'content_text')}},
+                ],
+                'as': '_source',
+            }},
+            {'$set': {'full_text': {'$arrayElemAt': ['$_source.full_text', 0]}}},
+            {'$unset': '_source'},
+        ]
+    return pipeline
+
+
+def create_embedded_view(db, view_name: str, sittings_name: str, segments_name: str,
+                         source_name: Optional[str] = None):
+    """Create (or redefine) ``view_name`` over the sittings with the embedded shape."""
+    pipeline = embedded_view_pipeline(segments_name, source_name)
+    if view_name in db.list_collection_names(filter={'name': view_name}):
+        db.command('collMod', view_name, viewOn=sittings_name, pipeline=pipeline)
+    else:
+        db.create_collection(view_name, viewOn=sittings_name, pipeline=pipeline)
+    return db[view_name]
@@ -0,0 +1,333 @@
+"""
+Speaker segmentation of Hansard sittings (``Segmenter``, used by
+``segmentation.ipynb``) and the engine that runs it over a whole collection.
+
+The notebook used to load every document with ``list(find(...))``, submit all
+of them to a 20-thread ``ThreadPoolExecutor`` and gather ``insert_many``
+batches through ``as_completed``. Segmentation is pure-Python regex and fuzzy
+matching, so the threads took turns on the GIL. ``run_segmentation`` instead:
+
+- reads ``SEGMENTATION_PROJECTION`` through an aggregation cursor in batches
+  of ``read_batch`` (``full_text`` is resolved on the server, so
+  HansardDocument works as well as ``hansard_core500``);
+- hands chunks of ``chunk_size`` documents to a ``ProcessPoolExecutor``
+  whose workers each build one ``Segmenter`` at start-up, from the honorific
+  titles and the MP tenure records passed once as initializer arguments;
+- keeps at most ``max_pending`` chunks in flight, so memory stays bounded
+  whatever the collection size;
+- writes the results as chunks finish, in unordered ``bulk_write`` batches
+  of ``write_batch`` sittings, to the normalised sittings and segments
+  collections of ``segment_store`` (upserts keyed by the source ``_id`` and
+  (parent, ordinal), so an interrupted run can simply be run again).
+
+With a ``ledger.StageLedger``, only the documents the ledger lists as stale
+for ``'segmentation'`` (source text or OCR output changed, last run failed,
+or ``SEGMENTATION_VERSION`` changed) are read, by ``_id`` in batches, and
+each result is recorded with its duration and an output fingerprint that
+marks the document stale for CPATF when its segments change.
+
+Throughput grows with the number of workers until the database read or
+write side becomes the limit (see ``benchmarks/bench_segmentation.py``).
+``workers=0`` segments in this process (no pool).
+"""
+
+import itertools
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from pipeline_common.honorifics import trie_regex
+from pipeline_common.ledger import DONE, FAILED, SKIPPED, fingerprint
+from pipeline_common.mongo_exprs import first_text
+from pipeline_common.segment_store import ensure_segment_indexes, write_operations
+from pipeline_common.speaker_tags import SpeakerTagLexer
+from pipeline_common.speakers import DatedSpeakerResolver
+from pipeline_common.tenure import TENURE_PROJECTION, TenureIndex, as_date
+from pipeline_common.textnorm import iter_content_lines
+
+# Bump when a change alters segmentation output; the ledger then reruns every document
+SEGMENTATION_VERSION = '2'  # 2: speaker_id from the sitting's term, not the first MP with the name
+
+METADATA_FIELDS = ('split_type', 'mesyuarat', 'parlimen', 'parlimen_range', 'penggal')
+
+# Fields segmentation reads; full_text falls back to ocr_text, then content_text
+SEGMENTATION_PROJECTION = {
+    'hansardDate': 1,
+    **{field: 1 for field in METADATA_FIELDS},
+    'full_text': first_text('full_text', 'ocr_text', 'content_text'),
+}
+
+ATTENDANCE_KEYWORDS = ("KEHADIRAN AHLI-AHLI", "AHLI-AHLI YANG HADIR", "KEHADIRAN")
+HEADER_KEYWORDS = ATTENDANCE_KEYWORDS + ("NASKHAH BELUM DISEM", "DEWAN RAKYAT", "PENGGAL", "MESYUARAT",
+                                         "KANDUNGAN", "WAKTU PERTANYAAN", "BIL.")
+
+
+def get_decade(year: int) -> str:
+    return "pre1970" if year < 1970 else "post1970"
+
+
+class Segmenter:
+    """Splits a sitting's text into speeches by the MPs sitting that day."""
+
+    def __init__(self, honorifics: Iterable[str], tenure_index: TenureIndex, cdist_workers: int = -1):
+        honorifics = set(honorifics)
+        self.speaker_lexer = SpeakerTagLexer(honorifics)
+        # Any title appearing in an (upper-cased) header line
+        self.honorific_in_text = re.compile(trie_regex(honorifics))
+        # Per term: exact-name fast path, LRU cache of candidate -> (MP, score), rapidfuzz for misses
+        self.speaker_resolver = DatedSpeakerResolver(tenure_index, cdist_workers=cdist_workers)
+
+    def skip_header_and_doa(self, lines: Sequence[str], max_lines: int = 300) -> int:
+        start_idx = 0
+        in_attendance = False
+        for i, line in enumerate(lines[:max_lines]):
+            stripped = line.strip().upper()
+            if any(kw in stripped for kw in HEADER_KEYWORDS):
+                start_idx = i + 1
+                if any(kw in stripped for kw in ATTENDANCE_KEYWORDS):
+                    in_attendance = True
+            if "DOA" in stripped and len(stripped.split()) < 10:  # Short DOA line
+                start_idx = max(start_idx, i + 1)
+            # Exit attendance mode when real speech starts
+            if in_attendance and (":" in stripped and self.honorific_in_text.search(stripped)):
+                in_attendance = False
+                start_idx = i
+        return start_idx
+
+    def speaker_candidates(self, line: str, decade: str):
+        """(candidate, constituency) for each speaker-tag grammar matching the line, in the order tried."""
+        return self.speaker_lexer.candidates(line, decade)
+
+    def extract_speaker(self, line: str, decade: str, resolver):
+        # resolver: speaker_resolver.for_date(sitting date), i.e. only that parliament's MPs
+        for candidate, constituency in self.speaker_candidates(line, decade):
+            best_match = resolver.match(candidate)  # score > 85
+            if best_match:
+                return best_match, constituency
+        return None, None
+
+    def segment_document(self, doc_id, text: str, year: int, sitting_date=None) -> Dict:
+        lines = list(iter_content_lines(text.splitlines()))
+        decade = get_decade(year)
+        start_idx = self.skip_header_and_doa(lines)
+        # Only MPs of the parliament sitting that day; all MPs if the date is unknown
+        resolver = self.speaker_resolver.for_date(sitting_date)
+        # Score this document's new speaker tags in one batch; the loop below then hits the cache
+        resolver.prime(candidate for line in lines[start_idx:]
+                       for candidate, _ in self.speaker_candidates(line, decade))
+
+        segments = []
+        current_speaker = None
+        current_constituency = None
+        current_text = []
+        current_start_line = start_idx
+
+        for i, line in enumerate(lines[start_idx:], start=start_idx):
+            speaker, constituency = self.extract_speaker(line, decade, resolver)
+            if speaker:
+                if current_speaker and current_text:
+                    segments.append({
+                        "speaker": current_speaker,
+                        "speaker_id": resolver.speaker_id(current_speaker),
+                        "constituency": current_constituency,
+                        "start_line": current_start_line,
+                        "end_line": i,
+                        "text": " ".join(current_text).strip()
+                    })
+                current_speaker = speaker
+                current_constituency = constituency
+                # Pure speech content after colon
+                content = line.split(':', 1)[1].strip() if ':' in line else line
+                current_text = [content] if content else []
+                current_start_line = i
+            elif current_speaker:
+                current_text.append(line)
+
+        if current_speaker and current_text:
+            segments.append({
+                "speaker": current_speaker,
+                "speaker_id": resolver.speaker_id(current_speaker),
+                "constituency": current_constituency,
+                "start_line": current_start_line,
+                "end_line": len(lines),
+                "text": " ".join(current_text).strip()
+            })
+
+        return {
+            "document_id": str(doc_id),
+            "hansardDate": year,
+            "decade": decade,
+            "segment_count": len(segments),
+            "segments": segments
+        }
+
+    def segmented_record(self, doc: Dict) -> Optional[Dict]:
+        """Embedded segmentation record for ``doc`` (see segment_store); None without text or a readable date."""
+        text = doc.get("full_text") or doc.get("content_text") or ""
+        sitting_date = as_date(doc.get("hansardDate"))
+        if not text or sitting_date is None:
+            return None
+        segmented_result = self.segment_document(doc["_id"], text, sitting_date.year, sitting_date)
+        # Combine original metadata + segmentation output
+        return {
+            "original_id": str(doc["_id"]),
+            "hansardDate": doc.get("hansardDate"),
+            **{field: doc.get(field) for field in METADATA_FIELDS},
+            "decade": segmented_result["decade"],
+            "segment_count": segmented_result["segment_count"],
+            "segmentation_output": segmented_result["segments"]  # Main result
+        }
+
+
+class SegmentationFailure(NamedTuple):
+    """Stands in for the record of a document whose segmentation raised ``error``."""
+    error: str
+
+
+SegmentResult = Tuple[object, Union[Dict, SegmentationFailure, None], float]
+
+
+def segment_stream(docs: Iterable[Dict], honorifics: Iterable[str], mps: Sequence[Dict],
+                   workers: Optional[int] = None, chunk_size: int = 4,
+                   max_pending: Optional[int] = None) -> Iterator[SegmentResult]:
+    """(``_id``, ``Segmenter.segmented_record``, seconds) for every document of ``docs``, in completion order.
+
+    ``mps`` are MP documents with the ``TENURE_PROJECTION`` fields. The
+    record is None for documents that cannot be segmented, and a
+    ``SegmentationFailure`` for those whose segmentation raised, so one bad
+    document does not stop the stream. At most ``max_pending`` chunks
+    (default two per worker) are held at once.
+    """
+    honorifics = list(honorifics)
+    docs = iter(docs)
+    chunks = iter(lambda: list(itertools.islice(docs, chunk_size)), [])
+    if workers == 0:
+        segmenter = Segmenter(honorifics, TenureIndex(mps))
+        for chunk in chunks:
+            yield from _timed_records(segmenter, chunk)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(honorifics, list(mps))) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_segment_chunk, chunk))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in pending:
+            yield from future.result()
+
+
+def _documents_by_id(source, ids: List, read_batch: int, id_batch: int = 1000) -> Iterator[Dict]:
+    for start in range(0, len(ids), id_batch):
+        pipeline = [{'$match': {'_id': {'$in': ids[start:start + id_batch]}}},
+                    {'$project': SEGMENTATION_PROJECTION}]
+        yield from source.aggregate(pipeline, batchSize=read_batch)
+
+
+def run_segmentation(source, sittings, segments, honorifics: Iterable[str], mp_collection,
+                     query: Optional[Dict] = None, ledger=None, only_stale: bool = True,
+                     workers: Optional[int] = None, chunk_size: int = 4, read_batch: int = 64,
+                     write_batch: int = 50, progress_every: int = 500) -> Dict:
+    """Segment ``source`` documents into ``sittings`` and ``segments``.
+
+    Without a ``ledger`` every document matching ``query`` is segmented.
+    With one, every result is recorded in it and, if ``only_stale``, only the
+    documents it lists as stale are read (``query`` is then ignored).
+    Rerunning over documents that were already written replaces their
+    sitting and segments instead of adding duplicates. A document whose
+    segmentation raised is recorded FAILED, so the next run retries it.
+    Returns read/written/skipped/failed counts and timings.
+    """
+    start = time.time()
+    ensure_segment_indexes(segments)
+    mps = list(mp_collection.find({}, TENURE_PROJECTION))
+    inputs: Dict = {}
+    if ledger is not None and only_stale:
+        inputs = {entry['doc_id']: entry['input_fingerprint']
+                  for entry in ledger.stale('segmentation', SEGMENTATION_VERSION)}
+        print(f"  Ledger: {len(inputs)} documents to segment")
+        docs = _documents_by_id(source, list(inputs), read_batch)
+    else:
+        pipeline = ([{'$match': query}] if query else []) + [{'$project': SEGMENTATION_PROJECTION}]
+        docs = source.aggregate(pipeline, batchSize=read_batch, allowDiskUse=True)
+
+    counts = {'read': 0, 'written': 0, 'skipped': 0, 'failed': 0, 'segments': 0}
+    sitting_ops: List = []
+    segment_ops: List = []
+    ledger_ops: List = []
+
+    def flush():
+        if segment_ops:
+            segments.bulk_write(segment_ops, ordered=False)
+        if sitting_ops:
+            # Sittings after their segments: a sitting is only listed once its speeches are stored
+            result = sittings.bulk_write(sitting_ops, ordered=False)
+            counts['written'] += result.upserted_count + result.matched_count
+        if ledger_ops:
+            # Last, so a crash before this point leaves the documents stale
+            ledger.write(ledger_ops)
+        for operations in (sitting_ops, segment_ops, ledger_ops):
+            operations.clear()
+
+    for doc_id, record, seconds in segment_stream(docs, honorifics, mps, workers=workers, chunk_size=chunk_size):
+        counts['read'] += 1
+        if isinstance(record, SegmentationFailure):
+            counts['failed'] += 1
+            print(f"  Error segmenting {doc_id}: {record.error}")
+            if ledger is not None:
+                ledger_ops.extend(ledger.operations(doc_id, 'segmentation', SEGMENTATION_VERSION, status=FAILED,
+                                                    input_fingerprint=inputs.get(doc_id), duration=seconds))
+        elif record is None:
+            counts['skipped'] += 1
+        else:
+            counts['segments'] += record['segment_count']
+            record_sitting_ops, record_segment_ops = write_operations(record)
+            sitting_ops.extend(record_sitting_ops)
+            segment_ops.extend(record_segment_ops)
+        if ledger is not None and not isinstance(record, SegmentationFailure):
+            ledger_ops.extend(ledger.operations(
+                doc_id, 'segmentation', SEGMENTATION_VERSION, status=SKIPPED if record is None else DONE,
+                input_fingerprint=inputs.get(doc_id), duration=seconds,
+                output_fingerprint=fingerprint(record['segmentation_output']) if record else None))
+        if counts['read'] % write_batch == 0:
+            flush()
+        if counts['read'] % progress_every == 0:
+            elapsed = time.time() - start
+            print(f"  Segmented {counts['read']} documents ({counts['read'] / elapsed:.1f} docs/s)")
+    flush()
+
+    counts['processing_time'] = time.time() - start
+    counts['docs_per_second'] = counts['read'] / counts['processing_time'] if counts['processing_time'] else 0.0
+    return counts
+
+
+_worker_segmenter: Optional[Segmenter] = None
+
+
+def _init_worker(honorifics: List[str], mps: List[Dict]):
+    global _worker_segmenter
+    # The pool already runs one process per core; more cdist threads would only compete for them
+    _worker_segmenter = Segmenter(honorifics, TenureIndex(mps), cdist_workers=1)
+
+
+def _timed_records(segmenter: Segmenter, docs: List[Dict]) -> List[SegmentResult]:
+    results = []
+    for doc in docs:
+        start = time.perf_counter()
+        try:
+            record = segmenter.segmented_record(doc)
+        except Exception as e:
+            record = SegmentationFailure(f"{type(e).__name__}: {e}")
+        results.append((doc['_id'], record, time.perf_counter() - start))
+    return results
+
+
+def _segment_chunk(docs: List[Dict]) -> List[SegmentResult]:
+    return _timed_records(_worker_segmenter, docs)
@@ -0,0 +1,81 @@
+"""
+Line-start lexer for speaker tags ("Dato' Seri Anwar bin Ibrahim [Tambun]: ...").
+
+Segmentation ran up to three regexes over every line with a colon:
+``PRIMARY_PATTERN`` (the honorific alternation, then the name),
+``FALLBACK_PATTERN`` and, for pre-1970 sittings, ``ENGLISH_OLD_PATTERN``.
+Their name groups were lazy with nothing required after them, so
+``([A-Za-z'\\s]+?)`` stopped after one character and the candidate sent to the
+MP matcher was "Tuan L" for "Tuan Lim Guan Eng [Bagan]:" (the fallback kept
+two letters). ``SpeakerTagLexer`` reads the same grammars and keeps the whole
+tag:
+
+- honorifics are matched as a prefix trie (``honorifics.trie_regex``: escaped
+  terms, shared prefixes factored, the longest title followed by a space
+  tried first);
+- the name is one greedy run of letters, apostrophes and spaces, followed by
+  at most one bracketed constituency, so a grammar reads the line once without
+  backtracking into the name;
+- the grammars a decade uses are compiled once into a single anchored pattern
+  whose optional lookaheads capture every grammar's reading in one ``match``.
+
+Lines are expected in the form ``textnorm.iter_content_lines`` yields them:
+whitespace collapsed to single spaces, no leading or trailing space.
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pipeline_common.honorifics import trie_regex
+
+Candidate = Tuple[str, Optional[str]]
+
+ENGLISH_OLD_TITLES = ("Mr.", "Encik", "Tuan", "Enche'")
+
+# Grammars tried in order for each decade (see get_decade in segmentation.ipynb)
+GRAMMARS = {
+    'pre1970': ('english_old', 'primary', 'fallback'),
+    'post1970': ('primary', 'fallback'),
+}
+
+# Per grammar: an optional lookahead at the line start, and how its groups make a candidate
+_GRAMMAR_RULES: Dict[str, Tuple[str, int, Callable[[tuple], Candidate]]] = {
+    # Mr./Encik/Tuan/Enche', name, colon (1950s-60s English Hansards)
+    'english_old': (r"(?:(?=({english_titles}) ([A-Za-z\s]+):))?", 2,
+                    lambda g: (f"{g[0]} {g[1].strip()}", None)),
+    # honorific, name [constituency]
+    'primary': (r"(?:(?=({honorific}) ([A-Za-z'\s]+)(?:\[([A-Za-z\s\-]+)\])?))?", 3,
+                lambda g: (f"{g[0]} {g[1].strip()}", g[2])),
+    # Name [anything up to the first closing bracket]
+    'fallback': (r"(?:(?=([A-Z][A-Za-z'\s]+)(?:\[([^\]]*)\])?))?", 2,
+                 lambda g: (g[0].strip(), g[1])),
+}
+
+
+class SpeakerTagLexer:
+    """(candidate name, constituency) pairs for a line, one per grammar that accepts it."""
+
+    def __init__(self, honorifics: Iterable[str]):
+        sources = {
+            'english_titles': trie_regex(ENGLISH_OLD_TITLES, ignore_case=True),
+            'honorific': trie_regex(honorifics, ignore_case=True),
+        }
+        self._grammars = {}
+        for decade, names in GRAMMARS.items():
+            readers, offset = [], 0
+            for name in names:
+                _, width, read = _GRAMMAR_RULES[name]
+                readers.append((offset, offset + width, read))
+                offset += width
+            pattern = re.compile(''.join(_GRAMMAR_RULES[name][0].format(**sources) for name in names),
+                                 re.IGNORECASE)
+            self._grammars[decade] = (pattern, tuple(readers))
+
+    def candidates(self, line: str, decade: str) -> List[Candidate]:
+        """Every grammar's reading of ``line`` for ``decade``, in the order to try them."""
+        if ':' not in line:  # Must have colon for speaker tag
+            return []
+        pattern, readers = self._grammars.get(decade, self._grammars['post1970'])
+        groups = pattern.match(line).groups()
+        # A grammar whose lookahead failed leaves its first group None
+        return [read(groups[start:end]) for start, end, read in readers if groups[start] is not None]
@@ -0,0 +1,164 @@
+"""
+Speaker-tag resolution for segmentation.
+
+``segmentation.ipynb`` used to call ``fuzzywuzzy.process.extractOne(candidate,
+mp_names)`` for up to three candidates on every line with a colon, scoring
+each against every MP name in Python, although a sitting repeats the same few
+dozen tags ("Tuan Yang di-Pertua", the ministers, the regular speakers)
+thousands of times. ``SpeakerResolver`` answers the same question in three
+steps:
+
+1. Candidates and MP names are normalised the way fuzzywuzzy's default
+   processor does (non-word characters to spaces, lower case, trimmed). A
+   candidate equal to a normalised MP name resolves to it with score 100,
+   which is the only way WRatio can reach 100.
+2. Everything else goes through a bounded ``LRUCache`` keyed by the
+   normalised candidate, so a repeated tag is scored once per process.
+3. Cache misses are scored with rapidfuzz's WRatio against the pre-normalised
+   names, one ``extractOne`` per candidate or, through ``prime``, one
+   ``cdist`` over all of a document's new candidates at once (``cdist_workers``
+   threads: all cores by default, one inside a segmentation worker process,
+   where the pool already uses every core).
+
+Scores are rounded to integers like fuzzywuzzy's and ties go to the first
+name in ``names`` order, as with ``extractOne``. Names that cannot score above
+``min_score`` are pruned early (``score_cutoff``) and reported as no match.
+rapidfuzz's WRatio differs from fuzzywuzzy's by a point or so on some pairs.
+Without rapidfuzz the resolver falls back to fuzzywuzzy for misses (the cache
+and the exact path still apply).
+
+``DatedSpeakerResolver`` keeps one ``SpeakerResolver`` per parliament term,
+over the MPs a ``TenureIndex`` lists for that term, so a sitting's tags are
+scored against a couple of hundred names instead of every MP since 1959.
+Each of those resolvers also holds the MPs' ``_id``s, so ``speaker_id`` gives
+the id of the member of that term, not of an earlier MP with the same name.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pipeline_common.memo import LRUCache
+from pipeline_common.tenure import TenureIndex, term_for_date
+
+try:
+    import numpy as np
+    from rapidfuzz import fuzz, process
+    HAVE_RAPIDFUZZ = True
+except ImportError:  # optional speed-up
+    HAVE_RAPIDFUZZ = False
+
+MIN_SPEAKER_SCORE = 85  # a match must score above this
+SPEAKER_CACHE_SIZE = 16384
+
+_NON_WORD = re.compile(r'(?ui)\W')
+
+
+def normalize_speaker(text: str) -> str:
+    """fuzzywuzzy's ``full_process``: non-word characters to spaces, lower case, trimmed."""
+    return _NON_WORD.sub(' ', text).lower().strip()
+
+
+class SpeakerResolver:
+    """Best-matching MP name (and score) for a speaker-tag candidate."""
+
+    def __init__(self, names: Sequence[str], cache_size: int = SPEAKER_CACHE_SIZE,
+                 min_score: int = MIN_SPEAKER_SCORE, ids: Optional[Sequence] = None,
+                 cdist_workers: int = -1):
+        self.names = list(names)
+        self.cdist_workers = cdist_workers  # rapidfuzz threads for prime; -1 = all cores
+        # MP _id per name, parallel to names; the first MP listed under a name wins
+        self._ids = dict(reversed(list(zip(self.names, ids)))) if ids is not None else {}
+        self.min_score = min_score
+        # Lowest raw WRatio that rounds above min_score; lower scores are not reported
+        self._cutoff = min_score + 0.5
+        self._keys = [normalize_speaker(name) for name in self.names]
+        self._exact = {}
+        for i, key in enumerate(self._keys):
+            self._exact.setdefault(key, i)
+        self.cache = LRUCache(cache_size)
+        self.exact_hits = 0
+
+    def _score(self, key: str) -> Tuple[Optional[str], int]:
+        if not self.names:
+            return None, 0
+        if HAVE_RAPIDFUZZ:
+            best = process.extractOne(key, self._keys, scorer=fuzz.WRatio, processor=None,
+                                      score_cutoff=self._cutoff)
+            return (self.names[best[2]], int(round(best[1]))) if best else (None, 0)
+        from fuzzywuzzy import process as fuzzy_process
+        best_key, score = fuzzy_process.extractOne(key, self._keys)
+        return self.names[self._exact[best_key]], score
+
+    def resolve(self, candidate: str) -> Tuple[Optional[str], int]:
+        """(best MP name, score); (None, 0) if no name scores above ``min_score``."""
+        key = normalize_speaker(candidate)
+        if not key:
+            return None, 0
+        exact = self._exact.get(key)
+        if exact is not None:
+            self.exact_hits += 1
+            return self.names[exact], 100
+        return self.cache.get_or_compute(key, lambda: self._score(key))
+
+    def match(self, candidate: str) -> Optional[str]:
+        """The best MP name if it scores above ``min_score``, else None."""
+        name, score = self.resolve(candidate)
+        return name if score > self.min_score else None
+
+    def speaker_id(self, name: Optional[str]):
+        """MP ``_id`` for a name this resolver returned; None without ids."""
+        return self._ids.get(name)
+
+    def prime(self, candidates: Iterable[str], chunk_size: int = 512) -> int:
+        """Score every new candidate in one ``cdist`` and cache the results.
+
+        Returns the number of candidates scored. A no-op without rapidfuzz.
+        """
+        if not HAVE_RAPIDFUZZ or not self.names:
+            return 0
+        keys: List[str] = []
+        seen = set()
+        for candidate in candidates:
+            key = normalize_speaker(candidate)
+            if key and key not in seen and key not in self._exact and key not in self.cache:
+                seen.add(key)
+                keys.append(key)
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            scores = process.cdist(chunk, self._keys, scorer=fuzz.WRatio, processor=None,
+                                   score_cutoff=self._cutoff, workers=self.cdist_workers)
+            best = scores.argmax(axis=1)
+            for key, index, score in zip(chunk, best, scores[np.arange(len(chunk)), best]):
+                self.cache.put(key, (self.names[index], int(round(float(score)))) if score else (None, 0))
+        return len(keys)
+
+    def stats(self) -> dict:
+        return {'exact_hits': self.exact_hits, **self.cache.stats()}
+
+
+class DatedSpeakerResolver:
+    """``SpeakerResolver`` restricted to the MPs sitting on a date (one per term, built lazily)."""
+
+    def __init__(self, tenure_index: TenureIndex, **resolver_kwargs):
+        self.tenure_index = tenure_index
+        self._resolver_kwargs = resolver_kwargs
+        self._resolvers: Dict[Optional[int], SpeakerResolver] = {}
+        self._lock = threading.Lock()
+
+    def for_term(self, term: Optional[int]) -> SpeakerResolver:
+        with self._lock:
+            resolver = self._resolvers.get(term)
+            if resolver is None:
+                resolver = SpeakerResolver(self.tenure_index.names_for_term(term),
+                                           ids=self.tenure_index.ids_for_term(term), **self._resolver_kwargs)
+                self._resolvers[term] = resolver
+            return resolver
+
+    def for_date(self, sitting_date) -> SpeakerResolver:
+        """Resolver for the term sitting on ``sitting_date`` (all MPs if unknown)."""
+        return self.for_term(term_for_date(sitting_date))
+
+    def stats(self) -> dict:
+        return {term: {'names': len(resolver.names), **resolver.stats()}
+                for term, resolver in sorted(self._resolvers.items(), key=lambda item: item[0] or 0)}
@@ -0,0 +1,150 @@
+"""
+Which MPs could have sat on a given date.
+
+Segmentation used to match every speaker tag against every MP in the ``MP``
+collection, 1st to 15th parliament together: several thousand names where
+only the ~200 members of the sitting parliament are possible, and a 1960s
+"Tuan Tan" could resolve to a 2010s MP. ``TenureIndex`` files each MP under
+the parliament terms they served, as written by ``history_mp_honorific.py``
+(``parliamentary_history[].term_number``) and ``mp_and_honorific.py``
+(``parliament_term: '15th'``), and maps a sitting date to its term with a
+bisect over ``PARLIAMENT_TERM_STARTS``.
+
+A term runs from its general election to the next one, so members returned
+at by-elections are covered. MPs without any term data are kept in every
+candidate set rather than dropped. Dates before the 1st parliament or that
+cannot be read, and terms with no recorded members, fall back to all names.
+"""
+
+import bisect
+import re
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# General election dates of the Dewan Rakyat; term n lasts until term n+1 begins
+PARLIAMENT_TERM_STARTS = {
+    1: date(1959, 8, 19),
+    2: date(1964, 4, 25),
+    3: date(1969, 5, 10),
+    4: date(1974, 8, 24),
+    5: date(1978, 7, 8),
+    6: date(1982, 4, 22),
+    7: date(1986, 8, 3),
+    8: date(1990, 10, 21),
+    9: date(1995, 4, 25),
+    10: date(1999, 11, 29),
+    11: date(2004, 3, 21),
+    12: date(2008, 3, 8),
+    13: date(2013, 5, 5),
+    14: date(2018, 5, 9),
+    15: date(2022, 11, 19),
+}
+
+_TERMS = sorted(PARLIAMENT_TERM_STARTS)
+_STARTS = [PARLIAMENT_TERM_STARTS[term] for term in _TERMS]
+_TERM_LABEL = re.compile(r'(\d+)')
+
+TENURE_PROJECTION = {'full_name_with_titles': 1, 'parliament_term': 1, 'parliamentary_history.term_number': 1}
+
+
+def as_date(value) -> Optional[date]:
+    """A date from a datetime, date or 'YYYY-MM-DD...' string; None otherwise."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value[:10], '%Y-%m-%d').date()
+        except ValueError:
+            return None
+    return None
+
+
+def term_for_date(value) -> Optional[int]:
+    """Parliament term sitting on ``value``; None before the 1st or if unreadable."""
+    day = as_date(value)
+    if day is None:
+        return None
+    position = bisect.bisect_right(_STARTS, day)
+    return _TERMS[position - 1] if position else None
+
+
+def term_interval(term: int) -> Tuple[date, Optional[date]]:
+    """[start, end) of ``term``; end is None for the sitting parliament."""
+    position = _TERMS.index(term)
+    return _STARTS[position], _STARTS[position + 1] if position + 1 < len(_STARTS) else None
+
+
+def mp_terms(mp: Dict) -> Set[int]:
+    """Term numbers an MP document records, from its history and its primary term."""
+    terms = {entry['term_number'] for entry in mp.get('parliamentary_history') or ()
+             if isinstance(entry.get('term_number'), int)}
+    label = _TERM_LABEL.match(str(mp.get('parliament_term') or ''))
+    if label:
+        terms.add(int(label.group(1)))
+    return terms
+
+
+class TenureIndex:
+    """MP names by parliament term, looked up by sitting date."""
+
+    def __init__(self, mps: Iterable[Dict], name_field: str = 'full_name_with_titles'):
+        self.names: List[str] = []
+        self.ids: List = []  # the MP documents' _id, parallel to names
+        self._terms: List[Set[int]] = []
+        by_term: Dict[int, List[int]] = {}
+        untermed: List[int] = []
+        for mp in mps:
+            name = mp.get(name_field)
+            if not name:
+                continue
+            index = len(self.names)
+            terms = mp_terms(mp)
+            self.names.append(name)
+            self.ids.append(mp.get('_id'))
+            self._terms.append(terms)
+            for term in terms:
+                by_term.setdefault(term, []).append(index)
+            if not terms:
+                untermed.append(index)
+        # Members of each term plus the MPs with unknown tenure, in collection order.
+        # Only terms with members get an entry; the rest fall back to all names.
+        self._members_by_term = {term: sorted(indexes + untermed) for term, indexes in by_term.items()}
+        self._names_by_term = {term: tuple(self.names[i] for i in members)
+                               for term, members in self._members_by_term.items()}
+
+    @classmethod
+    def from_collection(cls, mp_collection, query: Optional[Dict] = None, **kwargs) -> "TenureIndex":
+        return cls(mp_collection.find(query or {}, TENURE_PROJECTION), **kwargs)
+
+    def names_for_term(self, term: Optional[int]) -> Tuple[str, ...]:
+        """Candidate names for ``term``; every name if ``term`` is None or has no members."""
+        if term is None or term not in self._names_by_term:
+            return tuple(self.names)
+        return self._names_by_term[term]
+
+    def ids_for_term(self, term: Optional[int]) -> Tuple:
+        """MP ``_id`` of each name ``names_for_term(term)`` returns, in the same order."""
+        if term is None or term not in self._members_by_term:
+            return tuple(self.ids)
+        return tuple(self.ids[i] for i in self._members_by_term[term])
+
+    def names_on(self, sitting_date) -> Tuple[str, ...]:
+        return self.names_for_term(term_for_date(sitting_date))
+
+    def tenure(self, index: int) -> List[Tuple[date, Optional[date]]]:
+        """Merged [start, end) intervals served by ``self.names[index]``."""
+        intervals: List[Tuple[date, Optional[date]]] = []
+        for term in sorted(self._terms[index]):
+            if term not in PARLIAMENT_TERM_STARTS:
+                continue
+            start, end = term_interval(term)
+            if intervals and intervals[-1][1] == start:
+                intervals[-1] = (intervals[-1][0], end)
+            else:
+                intervals.append((start, end))
+        return intervals
+
+    def term_sizes(self) -> Dict[int, int]:
+        return {term: len(names) for term, names in self._names_by_term.items()}
@@ -0,0 +1,246 @@
+"""
+Shared text normalisation for every cleaning stage of the Hansard pipeline.
+
+Cleaning rules are declared as data (``Rule``) and compiled by
+``TextNormalizer`` into one alternation regex, so a document is scanned once
+instead of once per rule. Character-level rewrites (tabs, deleted punctuation)
+go through ``str.translate`` before the regex pass.
+
+Rules in one normaliser are matched leftmost-first and, on a tie, in the order
+they are declared. A rule list is only safe to fuse when no rule's output can
+create a match for another rule - ``OCR_RULES`` below is written that way and
+reproduces the old six-pass ``clean_text`` chain exactly.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence, Union
+
+Replacement = Union[str, Callable[[re.Match], str]]
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One declarative rewrite: ``pattern`` is replaced by ``replacement``.
+
+    ``replacement`` is either a literal string or a callable that receives the
+    match object. Patterns must not use named groups of their own. ``first`` is
+    the body of a character class covering every character a match can start
+    with; when all rules of a normaliser declare it, the compiled regex skips
+    other positions without trying each alternative.
+    """
+    name: str
+    pattern: str
+    replacement: Replacement
+    first: Optional[str] = None
+
+
+class TextNormalizer:
+    """Compile a rule list into a single-pass normaliser.
+
+    ``inert`` is a one-character regex class that no rule can consume or look
+    at across; it marks safe cut points for ``normalize_stream``. Without it,
+    the stream is normalised as one string.
+    """
+
+    def __init__(self, rules: Sequence[Rule], translate: Optional[Dict[int, Optional[str]]] = None,
+                 strip: bool = True, inert: Optional[str] = None, chunk_size: int = 1 << 20):
+        self.rules = tuple(rules)
+        self.translate_table = translate
+        self.strip = strip
+        self.chunk_size = chunk_size
+        self._inert = re.compile(inert) if inert else None
+
+        self._dispatch = {}
+        parts = []
+        for i, rule in enumerate(self.rules):
+            group = f"r{i}"
+            parts.append(f"(?P<{group}>{rule.pattern})")
+            if callable(rule.replacement):
+                self._dispatch[group] = rule.replacement
+            else:
+                self._dispatch[group] = lambda m, _s=rule.replacement: _s
+        pattern = "|".join(parts)
+        if parts and all(rule.first for rule in self.rules):
+            pattern = "(?=[%s])(?:%s)" % ("".join(rule.first for rule in self.rules), pattern)
+        self._regex = re.compile(pattern) if parts else None
+
+    def _replace(self, match: re.Match) -> str:
+        return self._dispatch[match.lastgroup](match)
+
+    def _apply(self, text: str) -> str:
+        if self.translate_table:
+            text = text.translate(self.translate_table)
+        if self._regex is not None:
+            text = self._regex.sub(self._replace, text)
+        return text
+
+    def normalize(self, text: str) -> str:
+        """Normalise a whole document held in memory."""
+        if not text:
+            return ""
+        text = self._apply(text)
+        return text.strip() if self.strip else text
+
+    __call__ = normalize
+
+    def normalize_stream(self, lines: Iterable[str]) -> Iterator[str]:
+        """Normalise text arriving as lines (with their line endings) or chunks.
+
+        Yields normalised pieces whose concatenation equals
+        ``normalize("".join(lines))`` while holding at most about
+        ``chunk_size`` characters in memory.
+        """
+        if self._inert is None:
+            yield self.normalize("".join(lines))
+            return
+
+        buf = []
+        buf_len = 0
+        carry = ""  # last inert char of the previous chunk, kept for lookbehind
+        pending_ws = ""
+        started = False
+
+        def emit(piece):
+            nonlocal pending_ws, started
+            if self.strip:
+                if not started:
+                    piece = piece.lstrip()
+                    if not piece:
+                        return None
+                    started = True
+                body = piece.rstrip()
+                if not body:
+                    pending_ws += piece
+                    return None
+                out = pending_ws + body
+                pending_ws = piece[len(body):]
+                return out
+            return piece
+
+        for line in lines:
+            buf.append(line)
+            buf_len += len(line)
+            if buf_len < self.chunk_size:
+                continue
+            text = "".join(buf)
+            cut = self._last_inert(text)
+            if cut < 0:
+                continue
+            head, tail = text[:cut + 1], text[cut + 1:]
+            piece = self._apply(carry + head)[len(carry):]
+            carry = head[-1]
+            buf, buf_len = [tail], len(tail)
+            piece = emit(piece)
+            if piece:
+                yield piece
+
+        text = "".join(buf)
+        if text:
+            piece = emit(self._apply(carry + text)[len(carry):])
+            if piece:
+                yield piece
+        if not self.strip and pending_ws:
+            yield pending_ws
+
+    def _last_inert(self, text: str) -> int:
+        is_inert = self._inert.match
+        for i in range(len(text) - 1, -1, -1):
+            if is_inert(text, i):
+                return i
+        return -1
+
+
+# ============================================================================
+# OCR page text (Tesseract layout output and Google Vision full text)
+# ============================================================================
+
+def _dehyphenate(match: re.Match) -> str:
+    # The match is a chain "-\nw1-\nw2..." after a word. The old
+    # (\w+)-\n(\w+) substitution joined the breaks pairwise, left every other
+    # one as "-" and the newline then became a space.
+    parts = match.group().split("-\n")
+    out = [parts[1]]
+    rest = parts[2:]
+    for i in range(0, len(rest), 2):
+        out.append("- ")
+        out.extend(rest[i:i + 2])
+    return "".join(out)
+
+
+def _join_paragraph_newlines(match: re.Match) -> str:
+    # A run of k newlines before a word keeps k-1 of them (capped at a blank
+    # line) and joins the last one with a space.
+    kept = len(match.group()) - 1
+    return ("\n\n" if kept >= 3 else "\n" * kept) + " "
+
+
+OCR_RULES = (
+    Rule("pipe_spacing", r"\s*\|\s*", " | ", first=r"\s|"),
+    Rule("collapse_spaces", r"[ ]{2,}", " ", first=" "),
+    Rule("dehyphenate", r"(?<=\w)-\n\w+(?:-\n\w+)*", _dehyphenate, first=r"\-"),
+    Rule("join_newline_run", r"\n{2,}(?=\w)", _join_paragraph_newlines, first=r"\n"),
+    Rule("join_soft_newline", r"(?<![.!?:;])\n(?=\w)", " ", first=r"\n"),
+    Rule("collapse_blank_lines", r"\n{3,}", "\n\n", first=r"\n"),
+)
+
+ocr_normalizer = TextNormalizer(
+    OCR_RULES,
+    translate={ord("\t"): " "},
+    inert=r"[^\w\s|\-]",
+)
+
+
+def clean_ocr_text(text: str) -> str:
+    """Clean OCR output: tabs, spacing, hyphenation, soft line breaks, pipes."""
+    return ocr_normalizer.normalize(text)
+
+
+# ============================================================================
+# Person names (after honorifics have been removed)
+# ============================================================================
+
+NAME_RULES = (
+    Rule("leading_hyphen", r"^\s*-*\s*", ""),
+    Rule("trailing_hyphen", r"\s*-*\s*$", ""),
+    Rule("collapse_whitespace", r"\s+", " "),
+)
+
+name_normalizer = TextNormalizer(
+    NAME_RULES,
+    translate={ord("("): None, ord(")"): None, ord("'"): None},
+)
+
+
+def clean_name_text(name: str) -> str:
+    """Drop brackets/apostrophes, collapse spaces and trim stray hyphens."""
+    return name_normalizer.normalize(name)
+
+
+# ============================================================================
+# Line-oriented text (segmentation)
+# ============================================================================
+
+_HAS_LETTER = re.compile(r"[^\d\W]")
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse all whitespace runs to single spaces and trim the ends."""
+    return " ".join(text.split())
+
+
+def clean_line(line: str) -> Optional[str]:
+    """Collapse a line's whitespace; None if it holds no letters at all."""
+    line = " ".join(line.split())
+    if not line or not _HAS_LETTER.search(line):
+        return None
+    return line
+
+
+def iter_content_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Yield cleaned lines, skipping blank and pure number/symbol lines."""
+    has_letter = _HAS_LETTER.search
+    for line in lines:
+        line = " ".join(line.split())
+        if line and has_letter(line):
+            yield line
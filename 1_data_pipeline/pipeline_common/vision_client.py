@@ -0,0 +1,164 @@
+"""
+Page-windowed PDF OCR against Google Vision, or anything that speaks its API.
+
+``files:annotate`` returns at most 5 pages per request, so a PDF is split into
+5-page windows that run concurrently on a bounded pool and are reassembled in
+page order. The remote side sits behind ``VisionClient``:
+
+- ``GoogleVisionClient`` uses the official ``google-cloud-vision`` library.
+- ``RestVisionClient`` posts the same JSON as the REST API and is what the
+  local stub (``benchmarks/vision_stub.py``) answers, so benchmarks and dry
+  runs never reach Google.
+"""
+
+import base64
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+import requests
+
+MAX_PAGES_PER_REQUEST = 5
+DEFAULT_MODEL = "builtin/stable"
+
+
+@dataclass
+class PageBatch:
+    """Result of one annotate request: {page_no: raw text} and the PDF's page count."""
+    pages: Dict[int, str]
+    total_pages: int
+
+
+class VisionClient(ABC):
+    """Annotates selected pages of a PDF. Implementations must be thread-safe."""
+
+    #: Part of the OCR cache key, so results from different backends never mix.
+    version = "unknown"
+
+    @abstractmethod
+    def annotate_pages(self, pdf_bytes: bytes, pages: Sequence[int]) -> PageBatch:
+        ...
+
+
+class GoogleVisionClient(VisionClient):
+    def __init__(self, language_hints: Sequence[str], model: str = DEFAULT_MODEL):
+        from importlib.metadata import version
+        from google.cloud import vision
+        from google.cloud.vision_v1 import types
+
+        self._types = types
+        self._client = vision.ImageAnnotatorClient()
+        self.language_hints = list(language_hints)
+        self.model = model
+        self.version = f"google-cloud-vision {version('google-cloud-vision')}; {model}"
+
+    def annotate_pages(self, pdf_bytes, pages):
+        types = self._types
+        request = types.AnnotateFileRequest(
+            input_config=types.InputConfig(content=pdf_bytes, mime_type="application/pdf"),
+            features=[types.Feature(type_=types.Feature.Type.DOCUMENT_TEXT_DETECTION, model=self.model)],
+            image_context=types.ImageContext(language_hints=self.language_hints),
+            pages=list(pages),
+        )
+        file_response = self._client.batch_annotate_files(requests=[request]).responses[0]
+        texts = {}
+        for page_no, page_response in zip(pages, file_response.responses):
+            if page_response.error.message:
+                raise Exception(f"OCR error on page {page_no}: {page_response.error.message}")
+            texts[page_response.context.page_number or page_no] = page_response.full_text_annotation.text
+        return PageBatch(texts, file_response.total_pages)
+
+
+class RestVisionClient(VisionClient):
+    """``files:annotate`` over HTTP; point ``endpoint`` at the stub for local runs."""
+
+    def __init__(self, endpoint: str, language_hints: Sequence[str], model: str = DEFAULT_MODEL,
+                 api_key: Optional[str] = None, timeout: float = 300):
+        self.endpoint = endpoint
+        self.language_hints = list(language_hints)
+        self.model = model
+        self.params = {"key": api_key} if api_key else {}
+        self.timeout = timeout
+        self.version = f"rest {endpoint}; {model}"
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def annotate_pages(self, pdf_bytes, pages):
+        body = {"requests": [{
+            "inputConfig": {"content": base64.b64encode(pdf_bytes).decode("ascii"),
+                            "mimeType": "application/pdf"},
+            "features": [{"type": "DOCUMENT_TEXT_DETECTION", "model": self.model}],
+            "imageContext": {"languageHints": self.language_hints},
+            "pages": list(pages),
+        }]}
+        r = self._session().post(self.endpoint, json=body, params=self.params, timeout=self.timeout)
+        if r.status_code != 200:
+            raise Exception(f"Vision request failed ({r.status_code}): {r.text[:200]}")
+        file_response = r.json()["responses"][0]
+        texts = {}
+        for page_no, page_response in zip(pages, file_response.get("responses", [])):
+            if "error" in page_response:
+                raise Exception(f"OCR error on page {page_no}: {page_response['error'].get('message')}")
+            page_no = page_response.get("context", {}).get("pageNumber", page_no)
+            texts[page_no] = page_response.get("fullTextAnnotation", {}).get("text", "")
+        return PageBatch(texts, file_response.get("totalPages", 0))
+
+
+def page_windows(pages: Sequence[int], size: int = MAX_PAGES_PER_REQUEST) -> List[List[int]]:
+    pages = list(pages)
+    return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+
+def ocr_pdf(client: VisionClient, pdf_bytes: bytes, executor: ThreadPoolExecutor,
+            done: Optional[Dict[int, str]] = None,
+            on_pages: Optional[Callable[[Dict[int, str]], None]] = None,
+            total_pages: Optional[int] = None) -> List[str]:
+    """OCR every page not in ``done`` and return all page texts in page order.
+
+    Without ``total_pages``, one page is requested alone to learn the page
+    count: the first missing page, or the last page of ``done`` when
+    ``done`` runs unbroken from page 1 (the next page may not exist, and the
+    API rejects a page past the end). The missing pages then go out as
+    5-page windows on ``executor``, whose worker count is the in-flight
+    request limit (share one executor across documents to make it global).
+    ``on_pages`` receives each window as soon as it arrives, e.g. to write it
+    to the OCR cache.
+    """
+    pages = dict(done or {})
+    total = total_pages
+    if total is None:
+        first = 1
+        while first in pages:
+            first += 1
+        probe_page = min(first, max(pages)) if pages else first
+        probe = client.annotate_pages(pdf_bytes, [probe_page])
+        total = probe.total_pages
+        if probe_page not in pages and probe_page <= total:
+            pages.update(probe.pages)
+            if on_pages:
+                on_pages(probe.pages)
+
+    missing = [p for p in range(1, total + 1) if p not in pages]
+    futures = [executor.submit(client.annotate_pages, pdf_bytes, window)
+               for window in page_windows(missing)]
+    try:
+        for future in as_completed(futures):
+            batch = future.result()
+            pages.update(batch.pages)
+            if on_pages:
+                on_pages(batch.pages)
+    except Exception:
+        for future in futures:
+            future.cancel()
+        raise
+
+    absent = [p for p in range(1, total + 1) if p not in pages]
+    if absent:
+        raise Exception(f"Vision returned no text for pages {absent[:10]}")
+    return [pages[p] for p in range(1, total + 1)]
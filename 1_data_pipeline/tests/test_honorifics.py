@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pipeline_common.honorifics import HonorificLexicon, trie_regex
+
+
+def test_punctuation_only_tokens_after_a_title():
+    lexicon = HonorificLexicon(['Dato', 'Tan Sri', 'Dr', 'YB'])
+    assert lexicon.strip('Dato . Ali') == ('. Ali', ['Dato'])
+    assert lexicon.strip('YB ( Dr ) Ali') == ('( ) Ali', ['YB', 'Dr'])
+    assert not lexicon.is_title_token('.')
+
+
+def test_trie_regex_with_a_string_that_is_a_prefix_of_another():
+    import re
+    pattern = re.compile(trie_regex(['Dato', "Dato'", 'Datuk']) + '$')
+    assert all(pattern.match(s) for s in ('Dato', "Dato'", 'Datuk'))
+    assert not pattern.match('Dat')
@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pipeline_common.tenure import TenureIndex, term_for_date
+
+
+def test_term_without_members_falls_back_to_all_names():
+    index = TenureIndex([{'full_name_with_titles': 'A B', 'parliament_term': '15th'}])
+    assert term_for_date('1975-03-01') == 4
+    assert index.names_on('1975-03-01') == ('A B',)
+    assert index.term_sizes() == {15: 1}
+
+
+def test_term_with_members_keeps_untermed_mps():
+    index = TenureIndex([
+        {'full_name_with_titles': 'A B', 'parliament_term': '15th'},
+        {'full_name_with_titles': 'C D', 'parliamentary_history': [{'term_number': 4}]},
+        {'full_name_with_titles': 'E F'},
+    ])
+    assert index.names_on('1975-03-01') == ('C D', 'E F')
+    assert index.names_on('2023-01-10') == ('A B', 'E F')
+    assert index.names_on('1950-01-01') == ('A B', 'C D', 'E F')
+
+
+def test_ids_follow_the_names_of_each_term():
+    index = TenureIndex([
+        {'_id': 1, 'full_name_with_titles': 'Tuan Tan', 'parliamentary_history': [{'term_number': 2}]},
+        {'_id': 2, 'full_name_with_titles': 'Tuan Tan', 'parliament_term': '14th'},
+    ])
+    assert index.ids_for_term(2) == (1,)
+    assert index.ids_for_term(14) == (2,)
+    assert index.ids_for_term(None) == (1, 2)